@@ -80,7 +80,7 @@ class Altimeter:
 
         return result
 
-    def upload(self, callback=None):
+    def upload(self, callback=None, feeder=None, sink=None):
         '''Retrieve raw flight data.
 
         The altimeter flight data is split between header and content.
@@ -91,6 +91,13 @@ class Altimeter:
 
         Keyword arguments:
         callback -- A callable that take (int, int) argument (default: None).
+        feeder -- A DataParser.incremental() result, fed with data
+                  as it is received (default: None). Decoding errors
+                  do not stop the transfer: feeder.close() raises
+                  them.
+        sink -- An UploadSink, writing data to a file as it is
+                received (default: None). The result data is then
+                mapped from this file.
 
         The first argument of the callback is the read byte count.
         The second argument is the total data size.
@@ -100,7 +107,12 @@ class Altimeter:
                 ...
 
         NOTE: Take care not to perform blocking actions
-              in your callback implementation.'''
+              in your callback implementation.
+
+        feeder example:
+            feeder = DataParser().incremental()
+            altimeter.upload(feeder=feeder)
+            flights = feeder.close()'''
 
         # Ensure argument is valid.
         if callback and not callable(callback):
@@ -108,8 +120,14 @@ class Altimeter:
 
         # Extract raw data from device.
         #
-        # Result is a UploadedData object.
-        with self._device.opened() as device:
-            result = device.upload(callback)
+        # Result is a UploadedData object. Sink is aborted
+        # as well if the device can not even be opened.
+        try:
+            with self._device.opened() as device:
+                result = device.upload(callback, feeder, sink)
+        except:
+            if sink:
+                sink.abort()
+            raise
 
         return result
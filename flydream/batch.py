@@ -0,0 +1,126 @@
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from functools import partial
+
+from collections import namedtuple
+
+from flydream.exception import FlyDreamAltimeterException
+
+BatchReport = namedtuple('BatchReport', 'path, output, records, error')
+
+
+def find_files(paths, extension):
+    '''Expand command line paths to a file list.
+
+    Directories are searched recursively for files with given
+    extension, glob patterns are expanded. Other paths are kept
+    as is, so that missing files are reported when processed.
+
+    Result is in paths order, without duplicates.'''
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(_find_in_directory(path, extension))
+        elif os.path.exists(path):
+            found.append(path)
+        else:
+            found.extend(sorted(glob.glob(path)) or [path])
+
+    seen = set()
+    result = []
+    for path in found:
+        key = os.path.normpath(path)
+        if key not in seen:
+            seen.add(key)
+            result.append(path)
+    return result
+
+
+def _find_in_directory(directory, extension):
+    result = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        result.extend(os.path.join(root, name) for name in sorted(files)
+                      if os.path.splitext(name)[1].lower() == extension)
+    return result
+
+
+def run_batch(function, paths, jobs=1):
+    '''Call function on each path, yield a BatchReport per path.
+
+    function(path) returns its processed record count. What it
+    prints is captured in report output, and a failure to read
+    or parse a file is kept in report error.
+
+    Keyword arguments:
+    jobs -- Worker process count (default: 1). Reports are yielded
+            in paths order anyway.'''
+    task = partial(_run_task, function)
+    if jobs < 2 or len(paths) < 2:
+        for path in paths:
+            yield task(path)
+        return
+
+    pool = multiprocessing.Pool(min(jobs, len(paths)))
+    try:
+        for report in pool.imap(task, paths):
+            yield report
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _run_task(function, path):
+    stdout = sys.stdout
+    sys.stdout = output = StringIO()
+    try:
+        records, error = function(path), None
+    except (EnvironmentError, FlyDreamAltimeterException) as e:
+        records, error = 0, str(e)
+    finally:
+        sys.stdout = stdout
+    return BatchReport(path, output.getvalue(), records, error)
+
+
+class BatchStatistics:
+    ''' Batch throughput, from the creation of this object.'''
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._start = clock()
+        self.files = 0
+        self.failures = 0
+        self.records = 0
+
+    def add(self, report):
+        '''Account for given BatchReport.'''
+        self.files += 1
+        self.records += report.records
+        if report.error is not None:
+            self.failures += 1
+
+    @property
+    def elapsed(self):
+        '''Seconds since batch start.'''
+        return self._clock() - self._start
+
+    @property
+    def files_per_second(self):
+        return self._rate(self.files)
+
+    @property
+    def records_per_second(self):
+        return self._rate(self.records)
+
+    def _rate(self, count):
+        elapsed = self.elapsed
+        return count / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,213 @@
+import json
+import mmap
+import os
+import struct
+import sys
+
+from array import array
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    # NumPy is optional: columns are then read as arrays.
+    numpy = None
+
+from flydream.storage import array_bytes, array_extend
+
+
+class ColumnFlight:
+    ''' Flight metadata and (time, temperature, altitude) columns.
+
+    Flights read from a ColumnFile only copy a column when it is
+    first accessed as an array: numpy_column() does not copy it
+    at all.'''
+
+    COLUMNS = 'time', 'temperature', 'altitude'
+
+    def __init__(self, info, columns):
+        '''Arguments:
+        info -- Flight metadata, as (key, value) pairs.
+        columns -- Time, temperature and altitude array.array
+                   columns.'''
+        self.info = OrderedDict(info)
+        self._columns = dict(zip(self.COLUMNS, columns))
+        self._stored = {}  # Name: (buffer, dtype, offset, count).
+
+    @staticmethod
+    def _from_buffer(info, buffer, data_start, descriptors):
+        flight = ColumnFlight(info, ())
+        for descriptor in descriptors:
+            flight._stored[descriptor['name']] = (buffer,
+                    descriptor['dtype'], data_start + descriptor['offset'],
+                    descriptor['count'])
+        return flight
+
+    @property
+    def index(self):
+        return self.info.get('flight')
+
+    @property
+    def sampling_freq(self):
+        return self.info.get('sampling_frequency')
+
+    @property
+    def times(self):
+        return self.column('time')
+
+    @property
+    def temperatures(self):
+        return self.column('temperature')
+
+    @property
+    def altitudes(self):
+        return self.column('altitude')
+
+    def column(self, name):
+        '''Column of given name, as an array.array object.'''
+        if name not in self._columns:
+            buffer, dtype, offset, count = self._stored[name]
+            column = array(_typecode(dtype))
+            array_extend(column, buffer[offset:offset +
+                                        column.itemsize * count])
+            if sys.byteorder != 'little':
+                column.byteswap()
+            self._columns[name] = column
+        return self._columns[name]
+
+    def numpy_column(self, name):
+        '''Column of given name, as a NumPy array.
+
+        Columns read from a file are read-only views on its mapped
+        content: they are never copied. Requires NumPy.'''
+        if name in self._stored:
+            buffer, dtype, offset, count = self._stored[name]
+            return numpy.frombuffer(buffer, dtype, count, offset)
+        column = self._columns[name]
+        return numpy.frombuffer(column, column.typecode)
+
+
+class ColumnFile:
+    ''' Self-describing binary file of flight columns.
+
+    File layout:
+        header: magic, version, description length
+        description: JSON object, UTF-8 encoded
+        columns: raw little endian values, each column
+                 starting on an ALIGNMENT bytes boundary
+
+    The description holds, for each flight, its metadata object
+    ("info") and the name, NumPy data type, offset and value count
+    of its columns. Offsets are relative to the first ALIGNMENT
+    bytes boundary past the description.
+
+    Example:
+        ColumnFile(flights).to_file('flights.fdb')
+        for flight in ColumnFile.from_file('flights.fdb').flights:
+            altitudes = flight.numpy_column('altitude')'''
+
+    VERSION = 1
+    EXTENSION = '.fdb'
+    ALIGNMENT = 64
+
+    _header = struct.Struct('<4sBxxxI')  # Magic, version, JSON length.
+    _magic = b'FDB\x00'
+
+    def __init__(self, flights):
+        '''Arguments:
+        flights -- ColumnFlight list.'''
+        self.flights = flights
+
+    @staticmethod
+    def from_file(filename):
+        '''Read a column file.
+
+        File is memory-mapped: columns are only read when accessed.
+        Raise ValueError if file is not a column file.'''
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < ColumnFile._header.size:
+                raise ValueError('Not a column file: %s' % filename)
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, length = ColumnFile._header.unpack_from(content)
+        if magic != ColumnFile._magic:
+            raise ValueError('Not a column file: %s' % filename)
+        if version != ColumnFile.VERSION:
+            raise ValueError('Unsupported column file version: %d'
+                    % version)
+
+        start = ColumnFile._header.size
+        description = json.loads(content[start:start + length]
+                                 .decode('utf-8'),
+                                 object_pairs_hook=OrderedDict)
+
+        # Column offsets are relative to the aligned data start.
+        data_start = ColumnFile._align(start + length)
+        return ColumnFile([ColumnFlight._from_buffer(flight['info'],
+                                                     content, data_start,
+                                                     flight['columns'])
+                           for flight in description['flights']])
+
+    def to_file(self, filename):
+        columns = [[_little_endian(flight.column(name))
+                    for name in ColumnFlight.COLUMNS]
+                   for flight in self.flights]
+
+        position = 0
+        flights = []
+        for flight, flight_columns in zip(self.flights, columns):
+            descriptors = []
+            for name, column in zip(ColumnFlight.COLUMNS, flight_columns):
+                position = self._align(position)
+                descriptors.append(OrderedDict([('name', name),
+                        ('dtype', _dtype(column)), ('offset', position),
+                        ('count', len(column))]))
+                position += column.itemsize * len(column)
+            flights.append(OrderedDict([('info', flight.info),
+                                        ('columns', descriptors)]))
+        description = json.dumps({'flights': flights}).encode('utf-8')
+
+        with open(filename, 'wb') as f:
+            f.write(self._header.pack(self._magic, self.VERSION,
+                                      len(description)))
+            f.write(description)
+
+            position = self._header.size + len(description)
+            for column in (column for flight_columns in columns
+                           for column in flight_columns):
+                padding = self._align(position) - position
+                content = array_bytes(column)
+                f.write(b'\0' * padding)
+                f.write(content)
+                position += padding + len(content)
+
+    @classmethod
+    def _align(cls, position):
+        return position + -position % cls.ALIGNMENT
+
+
+def _dtype(column):
+    # NumPy data type of little endian array content.
+    kind = 'f' if column.typecode in 'fd' else \
+            'u' if column.typecode.isupper() else 'i'
+    return '<%s%d' % (kind, column.itemsize)
+
+
+def _typecode(dtype):
+    # Array type code of NumPy data type.
+    kind, size = dtype[1], int(dtype[2:])
+    candidates = {'f': 'fd', 'i': 'bhilq', 'u': 'BHILQ'}[kind]
+    for typecode in candidates:
+        try:
+            if array(typecode).itemsize == size:
+                return typecode
+        except ValueError:
+            pass  # Not supported by Python 2.
+    raise ValueError('Unsupported column type: %s' % dtype)
+
+
+def _little_endian(column):
+    if sys.byteorder != 'little':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
@@ -0,0 +1,122 @@
+from flydream.flight import record_blocks
+
+
+class RecordSink:
+    ''' Destination of flight records, see FlightConverter.
+
+    Output formats (see flydream.sinks) subclass it, and override
+    the methods they need: for each flight, begin_flight() is called,
+    then write_records() with each block of its records, then
+    end_flight(). close() is called once all flights are converted,
+    or abort() if conversion failed.
+
+    Formats that can not be written record by record (columnar ones,
+    for instance) can ignore record blocks, and write the whole
+    flight columns from end_flight().
+
+    Progress messages, if any, are returned by begin_message(),
+    flight_message() and close_message().'''
+
+    def begin_flight(self, flight):
+        pass
+
+    def write_records(self, flight, times, temperatures, altitudes):
+        '''Write a block of flight records, given as columns.'''
+        pass
+
+    def end_flight(self, flight):
+        pass
+
+    def close(self):
+        pass
+
+    def abort(self):
+        '''Stop conversion, removing incomplete output.'''
+        pass
+
+    def begin_message(self, flights):
+        '''Message shown before converting flights, or None.'''
+        return None
+
+    def flight_message(self, flight):
+        '''Message shown once a flight is converted, or None.'''
+        return None
+
+    def close_message(self):
+        '''Message shown once the sink is closed, or None.'''
+        return None
+
+
+class FlightConverter:
+    ''' Convert flights to several output formats at once.
+
+    Records are read once: each block of flight columns is given
+    to all sinks, in sinks order. Flights being received can be
+    converted as their records are decoded, see write_records().
+
+    Example:
+        converter = FlightConverter([CsvFileSink('flight'),
+                                     SqliteSink('flights.db', source)], print)
+        try:
+            converter.convert(flights)
+            converter.close()
+        except:
+            converter.abort()
+            raise'''
+
+    def __init__(self, sinks, progress=None):
+        '''Arguments:
+        sinks -- RecordSink list.
+
+        Keyword arguments:
+        progress -- Callable given sinks progress messages
+                    (default: None).'''
+        self.sinks = sinks
+        self._progress = progress
+
+    def convert(self, flights):
+        self.begin(flights)
+        for flight in flights:
+            self.convert_flight(flight)
+
+    def begin(self, flights):
+        '''Tell sinks which flights are converted, see convert().'''
+        for sink in self.sinks:
+            self._report(sink.begin_message(flights))
+
+    def convert_flight(self, flight):
+        self.begin_flight(flight)
+        self.write_records(flight)
+        self.end_flight(flight)
+
+    def begin_flight(self, flight):
+        for sink in self.sinks:
+            sink.begin_flight(flight)
+
+    def write_records(self, flight, start=0):
+        '''Give flight records, from the start one, to all sinks.'''
+        if not self.sinks:
+            return
+
+        for block in record_blocks(flight, start):
+            for sink in self.sinks:
+                sink.write_records(flight, *block)
+
+    def end_flight(self, flight):
+        for sink in self.sinks:
+            sink.end_flight(flight)
+        for sink in self.sinks:
+            self._report(sink.flight_message(flight))
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+            self._report(sink.close_message())
+
+    def abort(self):
+        for sink in self.sinks:
+            sink.abort()
+
+    def _report(self, message):
+        if message is not None and self._progress:
+            self._progress(message)
@@ -0,0 +1,43 @@
+from flydream.flight import record_blocks
+
+
+class CsvWriter:
+    ''' Batched writer of flight records, as CSV lines.
+
+    Each record line is "<time>,<temperature>,<altitude>", formatted
+    as '%.3f,%d,%.1f'. Records are formatted by blocks: each block is
+    a single string, built by a single '%' operation and given to a
+    single write() call.
+
+    Example:
+        with open('flight.csv', 'w') as f:
+            CsvWriter(f).write_records(flight)'''
+
+    RECORD_FORMAT = '%.3f,%d,%.1f\n'
+
+    def __init__(self, out):
+        '''Arguments:
+        out -- Text file object.'''
+        self._out = out
+
+    def write_records(self, flight, start=0, prefix=''):
+        '''Write flight records, from the start one.
+
+        Keyword arguments:
+        start -- First record index (default: 0).
+        prefix -- Text written at the beginning of each line
+                  (default: '').'''
+        for block in record_blocks(flight, start):
+            self.write_columns(*block, prefix=prefix)
+
+    def write_columns(self, times, temperatures, altitudes, prefix=''):
+        '''Write a block of records, given as columns.
+
+        Keyword arguments:
+        prefix -- Text written at the beginning of each line
+                  (default: '').'''
+        values = [None] * (3 * len(times))
+        for i, column in enumerate((times, temperatures, altitudes)):
+            values[i::3] = column
+        self._out.write(((prefix + self.RECORD_FORMAT) * len(times))
+                        % tuple(values))
@@ -1,22 +1,41 @@
 # vim:nosi:
 
+import hashlib
+import multiprocessing
+import re
 import struct
 
+from array import array
+from collections import OrderedDict
+from functools import partial
+
 try:
-    from StringIO import StringIO
+    import numpy
 except ImportError:
-    from io import BytesIO as StringIO
-
+    # NumPy is optional: records are then decoded in pure Python.
+    numpy = None
 
 from flydream.exception import FlyDreamAltimeterProtocolError
 
 from flydream import serialprotocol as sp
 
+from flydream.flight import Flight, FlightRecord
+
 from collections import namedtuple
 RawFlight = namedtuple('RawFlight', 'sampling_rate, data')
-FlightRecord = namedtuple('FlightRecord', 'time, temperature, altitude')
-Flight = namedtuple('Flight', 'index, sampling_freq, duration, '
-                    'temperature_unit, length_unit, records')
+
+
+class FlightIndexEntry(namedtuple('FlightIndexEntry',
+        'index, offset, length, sampling_freq, record_count')):
+    ''' Flight location in raw data.
+
+    offset and length are the byte range of flight records.'''
+
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        return self.record_count * 1.0 / self.sampling_freq
 
 
 class DataParser:
@@ -29,11 +48,50 @@ class DataParser:
 
     PRESSURE_REFERENCE = 101325  # Reference pressure (zero elevation).
 
+    # Decoding results version, to be changed with them:
+    # flights cached by older versions are then ignored.
+    VERSION = 1
+
+    # Sampling rate byte to frequency, in hertz.
+    _rate_to_freq = {
+            sp.FREQ_1_HERTZ: 1.0,
+            sp.FREQ_2_HERTZ: 2.0,
+            sp.FREQ_4_HERTZ: 4.0,
+            sp.FREQ_8_HERTZ: 8.0,
+    }
+
+    # Regular expressions scan any buffer (bytes, mmap, memoryview).
+    _separator_pattern = re.compile(re.escape(sp.RAW_FLIGHTS_SEPARATOR))
+
+    # Flight columns array type codes, according to units.
+    _temperature_typecodes = {
+            TEMPERATURE_UNIT_CELSIUS: 'b',  # Raw signed byte.
+            TEMPERATURE_UNIT_FAHRENHEIT: 'd'
+    }
+    _altitude_typecodes = {
+            LENGTH_UNIT_METER: 'd',
+            LENGTH_UNIT_FEET: 'l'  # Rounded to integer.
+    }
+
     def __init__(self, length_unit=LENGTH_UNIT_METER,
-                 temperature_unit=TEMPERATURE_UNIT_CELSIUS):
+                 temperature_unit=TEMPERATURE_UNIT_CELSIUS,
+                 use_numpy=True, workers=1, cache=None):
         self.length_unit = length_unit
         self.temperature_unit = temperature_unit
 
+        # Decode whole flights at once when NumPy is available.
+        self.use_numpy = use_numpy and numpy is not None
+
+        # With several workers, extract_flights() decodes all
+        # flights at once, in as many processes.
+        self.workers = workers
+
+        # Decoded flights may be kept on disk (see FlightCache).
+        self.cache = cache
+
+        # Pressure to elevation conversions are memoized.
+        self.elevation_cache = ElevationCache(self._to_elevation)
+
     def parse_header(self, header):
         '''Extract information from upload header.
 
@@ -76,10 +134,68 @@ class DataParser:
 
         return data_size, max_size
 
-    def extract_flights(self, uploaded_data):
-        ''' Parse raw data according to given units.'''
-        return self._parse_raw_data(uploaded_data,
-                self.length_unit, self.temperature_unit)
+    def extract_flights(self, uploaded_data, entries=None):
+        ''' Parse raw data according to given units.
+
+        Returns a list of Flight objects. Flight records
+        are only decoded when first accessed, unless the
+        parser has several workers.
+
+        With a parser cache, flights decoded before are
+        read from cache instead of being decoded again.
+
+        Keyword arguments:
+        entries -- Flights to extract, as provided by index_flights()
+                   (default: None, all flights).'''
+        if entries is None:
+            entries = self.index_flights(uploaded_data)
+        flights = [self.extract_flight(uploaded_data, entry)
+                   for entry in entries]
+
+        if self.workers > 1 and len(flights) > 1:
+            self._decode_flights(flights)
+
+        return flights
+
+    def extract_flight(self, uploaded_data, entry):
+        ''' Get a single flight according to given units.
+
+        Arguments:
+        uploaded_data -- Raw data the entry was found in.
+        entry -- FlightIndexEntry, see index_flights().
+
+        Returns a Flight object, records are not decoded yet.'''
+        end = entry.offset + entry.length
+        records = memoryview(uploaded_data)[entry.offset:end]
+        return self._make_lazy_flight(entry.index, entry.sampling_freq,
+                records, self.length_unit, self.temperature_unit)
+
+    def index_flights(self, uploaded_data):
+        ''' Locate flights in raw data, without decoding records.
+
+        Returns a list of FlightIndexEntry(index, offset, length,
+        sampling_freq, record_count) tuples. Records of a flight
+        are the length bytes found at offset in raw data.'''
+        view = memoryview(uploaded_data)
+
+        entries = []
+        for start, end in self._flight_chunks(uploaded_data):
+            # Expected pattern:
+            #    <constant_byte> <sampling_rate> <data_records...>
+            rate = view[start + 1:start + 2].tobytes()
+            hertz = self._sampling_freq(rate)
+
+            length = end - start - 2
+            self._check_records_length(length)
+
+            entries.append(FlightIndexEntry(len(entries), start + 2, length,
+                    hertz, length // 4))
+
+        return entries
+
+    def incremental(self, on_records=None, on_flight=None):
+        ''' Create a push-style parser, see IncrementalParser.'''
+        return IncrementalParser(self, on_records, on_flight)
 
     def _make_flight(self, flight_data_chunck):
         # First byte of chunck tells us about sampling rate.
@@ -90,82 +206,183 @@ class DataParser:
         #
         # Ignore first byte, as it value does not
         # seem to be always compliant with specifications.
-        return RawFlight(flight_data_chunck[1:2], flight_data_chunck[2:])
+        #
+        # Chunck is a memoryview: records are not copied.
+        return RawFlight(flight_data_chunck[1:2].tobytes(),
+                         flight_data_chunck[2:])
+
+    def _find_separators(self, data):
+        # Offsets of all flight separators, found in a single scan.
+        return [match.start()
+                for match in self._separator_pattern.finditer(data)]
+
+    def _flight_chunks(self, data):
+        # (start, end) offsets of non-empty data between separators.
+        separator_length = len(sp.RAW_FLIGHTS_SEPARATOR)
+
+        chunks = []
+        start = 0
+        for end in self._find_separators(data) + [len(data)]:
+            if end > start:
+                chunks.append((start, end))
+            start = end + separator_length
+
+        return chunks
 
     def _split_raw_flight(self, data):
-        chunks = data.split(sp.RAW_FLIGHTS_SEPARATOR)
+        # Flights are provided as slices of a single view on data,
+        # so that no intermediate byte string is created.
+        view = memoryview(data)
+
         # Provide result as RawFlight objects.
-        return [self._make_flight(chunk) for chunk in chunks if len(chunk) > 0]
-
-    def _parse_raw_data(self, data, length_unit, temp_unit):
-        # Raw data contains several flights in binary format.
-        # First split them apart, then decode them.
-        raw_flights = self._split_raw_flight(data)
-        return [self._convert_raw_flight(raw_flight,
-                                         index,
-                                         length_unit,
-                                         temp_unit)
-                for index, raw_flight in enumerate(raw_flights)]
+        return [self._make_flight(view[start:end])
+                for start, end in self._flight_chunks(data)]
 
-    def _convert_raw_flight(self, raw_flight, index, length_unit, temp_unit):
-        # Get time interval according to sampling rate.
-        hertz = {
-                sp.FREQ_1_HERTZ: 1.0,
-                sp.FREQ_2_HERTZ: 2.0,
-                sp.FREQ_4_HERTZ: 4.0,
-                sp.FREQ_8_HERTZ: 8.0,
-        }[raw_flight.sampling_rate]
-        timeslice = 1 / hertz
+    def _decode_flights(self, flights):
+        # Flights are independent: decode them in worker processes.
+        #
+        # Workers are given raw records bytes and flight units,
+        # results come back in flights order. Cached flights
+        # are not decoded again.
+        flights = [flight for flight in flights
+                   if flight.samples._cached_projection(flight.length_unit,
+                           flight.temperature_unit,
+                           flight.pressure_reference) is None]
+        if not flights:
+            return
+
+        tasks = [(flight.samples._raw_records(), flight.length_unit,
+                  flight.temperature_unit, flight.pressure_reference)
+                 for flight in flights]
+
+        pool = multiprocessing.Pool(min(self.workers, len(tasks)),
+                _init_decoding_worker, (self.use_numpy,))
+        try:
+            results = pool.map(_decode_flight_worker, tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+        for flight, task, result in zip(flights, tasks, results):
+            _, length_unit, temp_unit, reference = task
+            pressures, temps, unit_temps, altitudes = result
+            flight.samples._load(pressures, temps,
+                    (length_unit, temp_unit, reference),
+                    unit_temps, altitudes)
+
+    def _sampling_freq(self, rate):
+        # Get sampling frequency from sampling rate byte.
+        try:
+            return self._rate_to_freq[rate]
+        except KeyError:
+            raise FlyDreamAltimeterProtocolError(
+                    'Unexpected sampling rate: %s' % repr(rate))
 
+    def _check_records_length(self, length):
         # Flight data are 4 bytes records.
-        if len(raw_flight.data) & 3 != 0:
+        if length & 3 != 0:
             raise FlyDreamAltimeterProtocolError(
                     'Unexpected data size (not multiple of 4): %d' \
-                            % len(raw_flight.data))
-
-        # Convert each 4 bytes records.
-        rel_time = 0.0
-        data_stream = StringIO(raw_flight.data)
-        records = []
-        while True:
-            # Parse data.
-            try:
-                record = data_stream.read(4)
-
-                # Break loop if data is not available.
-                #
-                # This same exception may come later
-                # from struct in Python 2 but Python 3
-                # triggers a different error.
-                if len(record) < 4:
-                    raise IndexError
-
-                # The first byte is the temperature in celsius degrees.
-                temp_info, = struct.unpack('b', record[:1])
-
-                # The 3 last bytes are the pressure in Pascal.
-                raw_pressure, = struct.unpack('>I', record)
-                pressure = raw_pressure & 0x00FFFFFF  # Keep only last 3 bytes.
-
-                # Convert values to suitable units.
-                temp = temp_info
-                if temp_unit == self.TEMPERATURE_UNIT_FAHRENHEIT:
-                    temp = self._to_fahrenheit(temp_info)
-
-                elevation = self._to_elevation(pressure,
-                        self.PRESSURE_REFERENCE, length_unit)
-
-                # Add to result.
-                records.append(FlightRecord(rel_time, temp, elevation))
-            except IndexError:
-                # No more data.
-                break
-
-            # Update timestamp.
-            rel_time += timeslice
+                            % length)
 
-        duration = len(records) * 1.0 / hertz
-        return Flight(index, hertz, duration, temp_unit, length_unit, records)
+    def _convert_raw_flight(self, raw_flight, index, length_unit, temp_unit):
+        hertz = self._sampling_freq(raw_flight.sampling_rate)
+        self._check_records_length(len(raw_flight.data))
+        return self._make_lazy_flight(index, hertz, raw_flight.data,
+                length_unit, temp_unit)
+
+    def _make_lazy_flight(self, index, hertz, records, length_unit, temp_unit):
+        # Records are fixed size: flight information
+        # is known without decoding them.
+        samples = FlightSamples(self, hertz, records)
+
+        # Convert each 4 bytes records on first access only.
+        reference = self.PRESSURE_REFERENCE
+        decode = partial(samples.project, length_unit, temp_unit, reference)
+
+        return Flight(index, hertz, temp_unit, length_unit,
+                len(samples), decode, samples, reference)
+
+    def _decode_samples(self, data):
+        # Result is raw (pressures, temperatures) arrays.
+        if self.use_numpy:
+            return self._decode_samples_numpy(data)
+
+        count = len(data) // 4
+        raw_records = struct.unpack('>%dI' % count, data)
+
+        # The first byte is the temperature in celsius degrees.
+        # Sign-extend it to get negative temperatures right.
+        temps = array('b', [((raw_record >> 24) ^ 0x80) - 0x80
+                            for raw_record in raw_records])
+
+        # The 3 last bytes are the pressure in Pascal.
+        pressures = array('l', [raw_record & 0x00FFFFFF
+                                for raw_record in raw_records])
+
+        return pressures, temps
+
+    def _decode_samples_numpy(self, data):
+        # Read all records at once as big-endian 4 bytes integers.
+        raw_records = numpy.frombuffer(data, dtype='>u4')
+
+        # The first byte is the temperature in celsius degrees.
+        # Cast to signed byte to get negative temperatures right.
+        temps = (raw_records >> 24).astype(numpy.uint8)
+
+        # The 3 last bytes are the pressure in Pascal.
+        pressures = raw_records & 0x00FFFFFF
+
+        # Provide compact arrays, like the pure Python decoding.
+        return (self._to_array('l', pressures),
+                self._to_array('b', temps.view(numpy.int8)))
+
+    def _project_samples(self, pressures, temps, length_unit, temp_unit,
+                         reference):
+        # Result is (temperatures, altitudes) arrays in given units.
+        if self.use_numpy:
+            return self._project_samples_numpy(pressures, temps,
+                    length_unit, temp_unit, reference)
+
+        if temp_unit == self.TEMPERATURE_UNIT_FAHRENHEIT:
+            temps = array('d', [self._to_fahrenheit(t) for t in temps])
+
+        elevations = array(self._altitude_typecodes[length_unit],
+                self.elevation_cache.convert(pressures,
+                    reference, length_unit))
+
+        return temps, elevations
+
+    def _project_samples_numpy(self, pressures, temps, length_unit,
+                               temp_unit, reference):
+        # Samples arrays are used in place, without copy.
+        if temp_unit == self.TEMPERATURE_UNIT_FAHRENHEIT:
+            temps = self._to_array('d', self._to_fahrenheit(
+                    numpy.frombuffer(temps, dtype=numpy.int8)))
+
+        # Pressure values repeat a lot within a flight, so convert
+        # each distinct value once. The scalar formula is kept for
+        # these few values: it guarantees the very same rounding
+        # as the pure Python decoding.
+        levels, level_indexes = numpy.unique(
+                numpy.frombuffer(pressures, dtype='l'), return_inverse=True)
+        elevations = numpy.array(self.elevation_cache.convert(
+                levels.tolist(), reference, length_unit))[level_indexes]
+
+        return temps, self._to_array(self._altitude_typecodes[length_unit],
+                                     elevations)
+
+    def _record_times(self, first, count, timeslice):
+        # Timestamps are exact multiples of the time interval.
+        if self.use_numpy:
+            return self._to_array('d',
+                    numpy.arange(first, first + count) * timeslice)
+        return array('d', [i * timeslice
+                           for i in range(first, first + count)])
+
+    def _to_array(self, typecode, values):
+        # Copy NumPy values into a standard array.
+        return array(typecode, values.astype(typecode).tobytes())
 
     def _to_fahrenheit(self, celsius):
         # Formula taken from Google search.
@@ -177,8 +394,422 @@ class DataParser:
 
         # Convert to wanted units.
         if unit == self.LENGTH_UNIT_FEET:
-            result = round(meters * 3.2808)
+            result = int(round(meters * 3.2808))
         else:
             result = round(meters, 1)
 
         return result
+
+
+class FlightSamples:
+    ''' Raw flight samples, with cached unit projections.
+
+    Samples are the values stored by the device: 24 bits pressures,
+    in Pascal, and signed temperature bytes, in celsius degrees.
+    They are decoded from raw records on first access only.
+
+    Projections of samples to given units and reference pressure
+    are computed in a single pass, then kept.'''
+
+    def __init__(self, parser, sampling_freq, data=None):
+        '''Arguments:
+        parser -- DataParser providing decoding and conversions.
+        sampling_freq -- Sampling frequency, in hertz.
+        data -- Raw 4 bytes records. Samples are appended with
+                _append() when not given.'''
+        self._parser = parser
+        self.sampling_freq = sampling_freq
+
+        self._data = data
+        self._samples = None
+        if data is None:
+            self._samples = array('l'), array('b')
+
+        self._times = None
+        self._projections = {}
+        self._digest = None  # Raw records hash, for parser cache.
+
+    def __len__(self):
+        if self._samples is None:
+            return len(self._data) // 4
+        return len(self._samples[0])
+
+    def _raw_records(self):
+        # Raw records as bytes, to be sent to other processes.
+        return memoryview(self._data).tobytes()
+
+    def _load(self, pressures, temperatures, key, temps, altitudes):
+        # Samples and projection decoded elsewhere (see workers).
+        self._keep_projection(key, (self.times, temps, altitudes))
+        self._samples = pressures, temperatures
+        self._data = None  # Release raw data.
+
+    def _cache_key(self, key):
+        # Parser cache key of projection, None without cache.
+        cache = self._parser.cache
+        if cache is None:
+            return None
+
+        if self._digest is None:
+            if self._data is None:
+                return None  # Received flight, no raw records.
+            self._digest = hashlib.sha1(self._data).hexdigest()
+
+        # Record times depend on sampling frequency.
+        return cache.key(self._digest, self._parser.VERSION,
+                         self.sampling_freq, *key)
+
+    def _cached_projection(self, *key):
+        # Projection from parser cache, or None.
+        cache_key = self._cache_key(key)
+        if cache_key is None:
+            return None
+
+        columns = self._parser.cache.get(cache_key)
+        if columns is not None:
+            self._projections[key] = columns
+        return columns
+
+    def _keep_projection(self, key, columns):
+        self._projections[key] = columns
+
+        cache_key = self._cache_key(key)
+        if cache_key is not None:
+            self._parser.cache.put(cache_key, columns)
+
+    def _get_samples(self):
+        if self._samples is None:
+            self._samples = self._parser._decode_samples(self._data)
+            self._data = None  # Release raw data.
+        return self._samples
+
+    @property
+    def pressures(self):
+        '''Raw pressures, in Pascal.'''
+        return self._get_samples()[0]
+
+    @property
+    def temperatures(self):
+        '''Raw temperatures, in celsius degrees.'''
+        return self._get_samples()[1]
+
+    @property
+    def times(self):
+        '''Sample timestamps, in seconds from flight start.'''
+        if self._times is None:
+            self._times = self._parser._record_times(0, len(self),
+                    1 / self.sampling_freq)
+        return self._times
+
+    def project(self, length_unit, temp_unit, reference):
+        '''Return (times, temperatures, altitudes) columns in given units.
+
+        Altitudes are computed against the reference pressure.'''
+        key = length_unit, temp_unit, reference
+        try:
+            return self._projections[key]
+        except KeyError:
+            pass
+
+        columns = self._cached_projection(*key)
+        if columns is not None:
+            return columns
+
+        pressures, temps = self._get_samples()
+        temps, altitudes = self._parser._project_samples(pressures, temps,
+                length_unit, temp_unit, reference)
+
+        columns = self.times, temps, altitudes
+        self._keep_projection(key, columns)
+        return columns
+
+    def project_range(self, start, stop, length_unit, temp_unit, reference):
+        '''Same as project(), for records start to stop (excluded) only.
+
+        If samples are not decoded yet, only the records of
+        the range are decoded. Nothing is kept.'''
+        key = length_unit, temp_unit, reference
+        if key in self._projections:
+            return tuple(column[start:stop]
+                         for column in self._projections[key])
+
+        if self._samples is None:
+            # Records are 4 bytes: range is found by arithmetic.
+            pressures, temps = self._parser._decode_samples(
+                    self._data[start * 4:stop * 4])
+        else:
+            pressures, temps = (column[start:stop]
+                                for column in self._samples)
+
+        times = self._parser._record_times(start, len(pressures),
+                1 / self.sampling_freq)
+        temps, altitudes = self._parser._project_samples(pressures, temps,
+                length_unit, temp_unit, reference)
+        return times, temps, altitudes
+
+    def _append(self, pressures, temperatures):
+        # Add samples, while a flight is received.
+        for column, values in zip(self._get_samples(),
+                                  (pressures, temperatures)):
+            column.extend(values)
+
+        # Projections are outdated.
+        self._times = None
+        self._projections.clear()
+
+
+# Parser of the current decoding worker process.
+_worker_parser = None
+
+
+def _init_decoding_worker(use_numpy):
+    global _worker_parser
+    _worker_parser = DataParser(use_numpy=use_numpy)
+
+
+def _decode_flight_worker(task):
+    # Result is (pressures, temperatures, unit temperatures, altitudes).
+    data, length_unit, temp_unit, reference = task
+    pressures, temps = _worker_parser._decode_samples(data)
+    return (pressures, temps) + _worker_parser._project_samples(
+            pressures, temps, length_unit, temp_unit, reference)
+
+
+class ElevationCache:
+    ''' Bounded pressure to elevation conversion cache.
+
+    Flight pressures repeat a lot: sensor resolution is 1 Pa
+    and a flight spans a few thousand Pa only. Converted values
+    are kept by (pressure, reference, unit), the least recently
+    used ones are evicted first when the cache is full.
+
+    The hits and misses attributes count conversions served
+    from the cache and computed ones.'''
+
+    DEFAULT_SIZE = 65536  # Values.
+
+    def __init__(self, to_elevation, size=DEFAULT_SIZE):
+        '''Arguments:
+        to_elevation -- A callable that take (pressure, reference, unit)
+                        arguments and return the elevation.
+        size -- Maximum number of kept values, at least 1.'''
+        if size < 1:
+            raise ValueError('Cache size must be at least 1', size)
+
+        self._to_elevation = to_elevation
+        self.size = size
+
+        self._values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def clear(self):
+        self._values.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def convert(self, pressures, reference, unit):
+        '''Return the elevations list of the given pressure list.'''
+        values = self._values
+        misses = 0
+
+        # Look up each distinct pressure once.
+        elevations = {}
+        for pressure in set(pressures):
+            key = pressure, reference, unit
+            try:
+                # Hit values are moved to the end: last used.
+                elevation = values.pop(key)
+            except KeyError:
+                misses += 1
+                elevation = self._to_elevation(pressure, reference, unit)
+                if len(values) >= self.size:
+                    values.popitem(last=False)
+            elevations[pressure] = values[key] = elevation
+
+        self.misses += misses
+        self.hits += len(pressures) - misses
+        return [elevations[pressure] for pressure in pressures]
+
+
+class IncrementalParser:
+    ''' Push-style flight data parser.
+
+    Raw data is given to feed() by chunks, as it is received.
+    Chunks may end anywhere, even in the middle of a record or
+    of a flight separator: incomplete data is kept until the
+    next call.
+
+    Records are decoded as soon as they are complete, using
+    the units of the creating DataParser. The flight being
+    received is available from the flight attribute.
+
+    Once data is found invalid, the parser is stopped: feed()
+    and close() raise the same FlyDreamAltimeterProtocolError.
+
+    Example:
+        feeder = DataParser().incremental()
+        for chunk in chunks:
+            feeder.feed(chunk)
+        flights = feeder.close()'''
+
+    def __init__(self, parser, on_records=None, on_flight=None):
+        '''Arguments:
+        parser -- DataParser providing units and record decoding.
+
+        Keyword arguments:
+        on_records -- A callable that take (Flight, int) arguments
+                      (default: None).
+        on_flight -- A callable that take a Flight argument
+                     (default: None).
+
+        on_records is called each time new records are decoded.
+        The second argument is the index of the first new record.
+        on_flight is called each time a flight is complete, before
+        records of the next flight are decoded.'''
+        self._parser = parser
+        self._on_records = on_records
+        self._on_flight = on_flight
+
+        self._buffer = bytearray()  # Not yet scanned for separator.
+        self._pending = bytearray()  # Current flight incomplete data.
+        self._chunk_size = 0  # Current flight byte count.
+        self._timeslice = None
+
+        self.flight = None
+        self.flights = []
+        self._error = None
+
+    def feed(self, data):
+        '''Parse next data chunk.
+
+        Returns the list of flights completed by this chunk.'''
+        return self._parse(self._feed, data)
+
+    def close(self):
+        '''Tell that all data was fed.
+
+        Returns the list of all parsed flights.'''
+        return self._parse(self._close)
+
+    def _parse(self, method, *args):
+        # Parser state is undefined after an error: keep it.
+        if self._error is not None:
+            raise self._error
+        try:
+            return method(*args)
+        except FlyDreamAltimeterProtocolError as e:
+            self._error = e
+            raise
+
+    def _feed(self, data):
+        self._buffer.extend(data)
+
+        # Complete flights ended by a separator.
+        completed = []
+        separator = sp.RAW_FLIGHTS_SEPARATOR
+        while True:
+            end = self._buffer.find(separator)
+            if end < 0:
+                break
+
+            self._consume(end)
+            del self._buffer[:len(separator)]
+
+            flight = self._end_flight()
+            if flight is not None:
+                completed.append(flight)
+
+        # Trailing bytes may be the beginning of a separator:
+        # keep them until more data is available.
+        kept = len(self._buffer) - len(self._buffer.rstrip(separator[:1]))
+        self._consume(len(self._buffer) - kept)
+
+        return completed
+
+    def _close(self):
+        self._consume(len(self._buffer))
+        self._end_flight()
+        return self.flights
+
+    def _consume(self, size):
+        # Move size scanned bytes to current flight.
+        if size == 0:
+            return
+        self._pending.extend(self._buffer[:size])
+        del self._buffer[:size]
+        self._chunk_size += size
+
+        # Expected pattern:
+        #    <constant_byte> <sampling_rate> <data_records...>
+        if self.flight is None:
+            if len(self._pending) < 2:
+                return
+            rate = bytes(self._pending[1:2])
+            del self._pending[:2]
+            self._start_flight(rate)
+
+        # Decode complete records only.
+        size = len(self._pending) & ~3
+        if size == 0:
+            return
+        records = bytes(self._pending[:size])
+        del self._pending[:size]
+
+        parser = self._parser
+        flight = self.flight
+        first = flight.record_count
+
+        # Keep raw samples along with converted records.
+        pressures, temps = parser._decode_samples(records)
+        flight.samples._append(pressures, temps)
+
+        temps, altitudes = parser._project_samples(pressures, temps,
+                flight.length_unit, flight.temperature_unit,
+                flight.pressure_reference)
+        times = parser._record_times(first, len(pressures), self._timeslice)
+        flight._append_columns(times, temps, altitudes)
+
+        if self._on_records:
+            self._on_records(flight, first)
+
+    def _start_flight(self, rate):
+        parser = self._parser
+        hertz = parser._sampling_freq(rate)
+        self._timeslice = 1 / hertz
+
+        # Flight columns grow as records are received.
+        length_unit = parser.length_unit
+        temp_unit = parser.temperature_unit
+        self.flight = Flight.from_columns(len(self.flights), hertz,
+                temp_unit, length_unit,
+                array('d'),
+                array(parser._temperature_typecodes[temp_unit]),
+                array(parser._altitude_typecodes[length_unit]),
+                FlightSamples(parser, hertz), parser.PRESSURE_REFERENCE)
+
+    def _end_flight(self):
+        # Flight separator or end of data found.
+        chunk_size, self._chunk_size = self._chunk_size, 0
+        if chunk_size == 0:
+            return None
+
+        flight = self.flight
+        if flight is None:
+            raise FlyDreamAltimeterProtocolError(
+                    'Missing flight sampling rate')
+
+        # Flight data are 4 bytes records.
+        if len(self._pending) != 0:
+            raise FlyDreamAltimeterProtocolError(
+                    'Unexpected data size (not multiple of 4): %d' \
+                            % (chunk_size - 2))
+
+        self.flight = None
+        self.flights.append(flight)
+        if self._on_flight:
+            self._on_flight(flight)
+        return flight
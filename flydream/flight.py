@@ -0,0 +1,269 @@
+try:
+    from itertools import izip as zip
+except ImportError:
+    pass
+
+import math
+
+from functools import partial
+
+from collections import namedtuple
+FlightRecord = namedtuple('FlightRecord', 'time, temperature, altitude')
+
+# Records formatted, or given to sinks, at once.
+BLOCK_SIZE = 16384
+
+
+def column_blocks(columns, start=0, size=None):
+    '''Iterate over slices of same length columns, as lists of
+    up to size values of each column, from the start index.
+
+    Keyword arguments:
+    start -- First value index (default: 0).
+    size -- Maximum block length (default: None, BLOCK_SIZE).'''
+    size = size or BLOCK_SIZE
+    for first in range(start, len(columns[0]), size):
+        yield [column[first:first + size] for column in columns]
+
+
+def record_blocks(flight, start=0, size=None):
+    '''Iterate over flight records, from the start one, as blocks
+    of [times, temperatures, altitudes] columns, see column_blocks().'''
+    return column_blocks((flight.times, flight.temperatures,
+                          flight.altitudes), start, size)
+
+
+class FlightRecords:
+    ''' Read-only sequence of FlightRecord objects.
+
+    Records are built on demand from the flight columns,
+    they are not stored.'''
+
+    def __init__(self, flight):
+        self._flight = flight
+
+    def __len__(self):
+        return self._flight.record_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        flight = self._flight
+        return FlightRecord(flight.times[index],
+                            flight.temperatures[index],
+                            flight.altitudes[index])
+
+    def __iter__(self):
+        flight = self._flight
+        return (FlightRecord(*values) for values in zip(flight.times,
+                                                        flight.temperatures,
+                                                        flight.altitudes))
+
+
+class Flight:
+    ''' Flight data handle.
+
+    Flight information (index, sampling frequency, units,
+    record count and duration) is always available.
+
+    Records are decoded on first access only, then kept.
+    They are stored by columns: times, temperatures and
+    altitudes are compact arrays (see array module) holding
+    one value per record.
+
+    Use the records attribute to get FlightRecord objects.
+
+    Flights read from raw data also keep the raw device samples
+    (see dataparser.FlightSamples): with_units() then provides the
+    same flight in other units without parsing data again.'''
+
+    def __init__(self, index, sampling_freq, temperature_unit, length_unit,
+                 record_count, decode, samples=None, pressure_reference=None):
+        '''Arguments:
+        record_count -- Flight record count, known before decoding.
+        decode -- A callable returning (times, temperatures, altitudes)
+                  columns. Called once, on first records access.
+
+        Keyword arguments:
+        samples -- Raw flight samples (default: None).
+        pressure_reference -- Zero altitude pressure, in Pascal
+                              (default: None).'''
+        self.index = index
+        self.sampling_freq = sampling_freq
+        self.temperature_unit = temperature_unit
+        self.length_unit = length_unit
+
+        self.record_count = record_count
+        self.duration = record_count * 1.0 / sampling_freq
+
+        self.samples = samples
+        self.pressure_reference = pressure_reference
+
+        self._decode = decode
+        self._columns = None
+
+    @staticmethod
+    def from_columns(index, sampling_freq, temperature_unit, length_unit,
+                     times, temperatures, altitudes,
+                     samples=None, pressure_reference=None):
+        '''Build a flight from already decoded columns.'''
+        columns = times, temperatures, altitudes
+        flight = Flight(index, sampling_freq, temperature_unit, length_unit,
+                        len(times), None, samples, pressure_reference)
+        flight._columns = columns
+        return flight
+
+    def with_units(self, length_unit=None, temperature_unit=None,
+                   pressure_reference=None):
+        '''Return this flight in other units.
+
+        Unspecified arguments keep this flight values. Conversion
+        is made from raw samples, and kept: asking again for the
+        same units is free.
+
+        Raise ValueError if raw samples are not available.'''
+        if self.samples is None:
+            raise ValueError('Flight raw samples are not available')
+
+        if length_unit is None:
+            length_unit = self.length_unit
+        if temperature_unit is None:
+            temperature_unit = self.temperature_unit
+        if pressure_reference is None:
+            pressure_reference = self.pressure_reference
+
+        decode = partial(self.samples.project,
+                length_unit, temperature_unit, pressure_reference)
+        return Flight(self.index, self.sampling_freq,
+                temperature_unit, length_unit,
+                self.record_count, decode,
+                self.samples, pressure_reference)
+
+    @property
+    def decoded(self):
+        '''True if records are already decoded.'''
+        return self._columns is not None
+
+    def _get_columns(self):
+        if self._columns is None:
+            self._columns = self._decode()
+            self._decode = None  # Release raw data.
+        return self._columns
+
+    @property
+    def times(self):
+        '''Record timestamps, in seconds from flight start.'''
+        return self._get_columns()[0]
+
+    @property
+    def temperatures(self):
+        '''Record temperatures, in flight temperature unit.'''
+        return self._get_columns()[1]
+
+    @property
+    def altitudes(self):
+        '''Record altitudes, in flight length unit.'''
+        return self._get_columns()[2]
+
+    @property
+    def records(self):
+        '''Sequence of FlightRecord(time, temperature, altitude).'''
+        return FlightRecords(self)
+
+    def _append_columns(self, times, temperatures, altitudes):
+        # Add decoded records, while a flight is received.
+        for column, values in zip(self._get_columns(),
+                                  (times, temperatures, altitudes)):
+            column.extend(values)
+        self.record_count = len(self.times)
+        self.duration = self.record_count * 1.0 / self.sampling_freq
+
+    def record_at(self, index):
+        '''Return the FlightRecord at index.
+
+        If records are not decoded yet, only this record is.'''
+        if index < 0:
+            index += self.record_count
+        if not 0 <= index < self.record_count:
+            raise IndexError('record index out of range')
+
+        times, temps, altitudes = self._columns_range(index, index + 1)
+        return FlightRecord(times[0], temps[0], altitudes[0])
+
+    def slice_time(self, start_time, end_time):
+        '''Return the part of this flight between given times.
+
+        Arguments are in seconds from flight start, both included.
+        Result is a Flight, with the same index and timestamps.
+
+        If records are not decoded yet, only the requested ones are.'''
+        start, stop = self.index_range(start_time, end_time)
+        times, temps, altitudes = self._columns_range(start, stop)
+        return Flight.from_columns(self.index, self.sampling_freq,
+                self.temperature_unit, self.length_unit,
+                times, temps, altitudes,
+                pressure_reference=self.pressure_reference)
+
+    def index_range(self, start_time, end_time):
+        '''Return the (start, stop) range of record indexes between
+        given times, see slice_time().'''
+        # Records are evenly spaced: record index is found by
+        # arithmetic, then checked against its exact timestamp.
+        timeslice = 1.0 / self.sampling_freq
+        count = self.record_count
+
+        start = min(max(int(math.ceil(start_time * self.sampling_freq)),
+                        0), count)
+        while start > 0 and (start - 1) * timeslice >= start_time:
+            start -= 1
+        while start < count and start * timeslice < start_time:
+            start += 1
+
+        stop = min(max(int(math.floor(end_time * self.sampling_freq)) + 1,
+                       start), count)
+        while stop > start and (stop - 1) * timeslice > end_time:
+            stop -= 1
+        while stop < count and stop * timeslice <= end_time:
+            stop += 1
+
+        return start, stop
+
+    def nearest_index(self, time):
+        '''Return the index of the record nearest to given time, in
+        seconds from flight start. Ties go to the earlier record.'''
+        if not self.record_count:
+            raise IndexError('flight has no record')
+
+        index = int(math.ceil(time * self.sampling_freq - 0.5))
+        return min(max(index, 0), self.record_count - 1)
+
+    def _columns_range(self, start, stop):
+        # Columns of records start to stop (excluded).
+        if self._columns is not None or self.samples is None:
+            return tuple(column[start:stop]
+                         for column in self._get_columns())
+
+        return self.samples.project_range(start, stop,
+                self.length_unit, self.temperature_unit,
+                self.pressure_reference)
+
+    def __eq__(self, other):
+        if not isinstance(other, Flight):
+            return NotImplemented
+        return (self.index, self.sampling_freq,
+                self.temperature_unit, self.length_unit,
+                self.record_count, self._get_columns()) == \
+               (other.index, other.sampling_freq,
+                other.temperature_unit, other.length_unit,
+                other.record_count, other._get_columns())
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __repr__(self):
+        return 'Flight(index=%d, sampling_freq=%r, records=%d)' % \
+                (self.index, self.sampling_freq, self.record_count)
@@ -0,0 +1,225 @@
+import json
+import os
+import struct
+import sys
+
+from array import array
+from collections import namedtuple
+
+from flydream.storage import write_file, array_bytes, array_extend
+
+CacheStats = namedtuple('CacheStats',
+        'path, entries, size, max_size, hits, misses')
+
+
+class FlightCache:
+    ''' Size-bounded on-disk cache of decoded flight columns.
+
+    Each entry is a file holding the (times, temperatures, altitudes)
+    columns of a flight, in a compact binary format: the raw content
+    of their arrays. Entries are keyed by the hash of the flight raw
+    records, the parser version, the sampling frequency and the
+    conversion units.
+
+    Reading an entry refreshes its modification time. Once the cache
+    exceeds its maximum size, least recently used entries are removed.
+    The cache size is tracked as entries are written: the cache
+    directory is only listed by the first write, and by evictions.
+
+    The hits and misses attributes count entries read from the cache
+    and missing ones. save_counters() adds them to the counters kept
+    in the cache directory, reported by stats().
+
+    Example:
+        parser = DataParser(cache=FlightCache())'''
+
+    VERSION = 2
+    EXTENSION = '.fdc'
+    COUNTERS_FILE = 'counters.json'
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+    # Entry layout: header, then for each column a
+    # descriptor followed by the array content.
+    _header = struct.Struct('<3sBc')  # Magic, version, byte order.
+    _column = struct.Struct('<cBI')  # Type code, item size, item count.
+    _magic = b'FDC'
+
+    def __init__(self, path=None, max_size=DEFAULT_MAX_SIZE):
+        '''Keyword arguments:
+        path -- Cache directory (default: None, see default_path()).
+        max_size -- Maximum cache size, in bytes
+                    (default: DEFAULT_MAX_SIZE).'''
+        self.path = path if path else self.default_path()
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # Unknown until first write.
+
+    @staticmethod
+    def default_path():
+        '''User cache directory: $XDG_CACHE_HOME/pyfda or ~/.cache/pyfda.'''
+        root = os.environ.get('XDG_CACHE_HOME') or \
+                os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(root, 'pyfda')
+
+    def key(self, digest, parser_version, sampling_freq, length_unit,
+            temp_unit, reference):
+        '''Entry key of a flight, given its raw records hash.'''
+        return '%s-%d-%d-%g-%d-%d-%s' % (digest, self.VERSION,
+                parser_version, sampling_freq, length_unit, temp_unit,
+                reference)
+
+    def get(self, key):
+        '''Return cached (times, temperatures, altitudes), or None.'''
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                columns = self._read_columns(f.read())
+            os.utime(path, None)
+        except (EnvironmentError, ValueError, struct.error):
+            columns = None
+
+        if columns is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return columns
+
+    def put(self, key, columns):
+        '''Store (times, temperatures, altitudes) columns.
+
+        Entry is silently not written if not possible.'''
+        content = [self._header.pack(self._magic, self.VERSION,
+                                     self._byte_order())]
+        for column in columns:
+            content.append(self._column.pack(column.typecode.encode('ascii'),
+                    column.itemsize, len(column)))
+            content.append(array_bytes(column))
+
+        content = b''.join(content)
+
+        try:
+            if self._size is None:
+                self._size = self._entries_size(self._entries())
+            path = self._entry_path(key)
+            if os.path.exists(path):
+                self._size -= os.path.getsize(path)
+
+            write_file(path, content)
+            self._size += len(content)
+            if self._size > self.max_size:
+                self._evict()
+        except EnvironmentError:
+            pass
+
+    def save_counters(self):
+        '''Add hits and misses to the cache counters, then reset them.
+
+        Counters are silently not written if not possible. Processes
+        saving counters at the same time may lose some counts.'''
+        hits, misses = self._read_counters()
+        content = json.dumps({'hits': hits + self.hits,
+                              'misses': misses + self.misses})
+        try:
+            write_file(os.path.join(self.path, self.COUNTERS_FILE),
+                       content.encode('ascii'))
+        except EnvironmentError:
+            return
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        '''Return cache CacheStats(path, entries, size, max_size,
+        hits, misses), with saved hit and miss counters.'''
+        entries = self._entries()
+        return CacheStats(self.path, len(entries),
+                self._entries_size(entries), self.max_size,
+                *self._read_counters())
+
+    def clear(self):
+        '''Remove all cache entries, and reset saved counters.'''
+        for _, _, path in self._entries():
+            os.remove(path)
+        try:
+            os.remove(os.path.join(self.path, self.COUNTERS_FILE))
+        except OSError:
+            pass
+        self._size = 0
+
+    def _read_columns(self, content):
+        magic, version, byte_order = self._header.unpack_from(content)
+        if magic != self._magic or version != self.VERSION:
+            return None
+
+        columns = []
+        offset = self._header.size
+        for _ in range(3):
+            typecode, itemsize, count = self._column.unpack_from(content,
+                                                                 offset)
+            offset += self._column.size
+
+            column = array(str(typecode.decode('ascii')))
+            if column.itemsize != itemsize:
+                return None  # Written by another platform.
+
+            end = offset + itemsize * count
+            if end > len(content):
+                return None
+            array_extend(column, content[offset:end])
+            if byte_order != self._byte_order():
+                column.byteswap()
+
+            columns.append(column)
+            offset = end
+
+        return tuple(columns)
+
+    def _byte_order(self):
+        return b'<' if sys.byteorder == 'little' else b'>'
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key + self.EXTENSION)
+
+    def _entries(self):
+        # List of (mtime, size, path) of cache entries.
+        if not os.path.isdir(self.path):
+            return []
+
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith(self.EXTENSION):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Removed meanwhile.
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _read_counters(self):
+        # Saved (hits, misses), (0, 0) if missing or invalid.
+        try:
+            with open(os.path.join(self.path, self.COUNTERS_FILE), 'r') as f:
+                content = json.load(f)
+            return int(content['hits']), int(content['misses'])
+        except (EnvironmentError, ValueError, KeyError, TypeError):
+            return 0, 0
+
+    def _entries_size(self, entries):
+        return sum(size for _, size, _ in entries)
+
+    def _evict(self):
+        # Entries written by other processes are found here.
+        entries = self._entries()
+        size = self._entries_size(entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            size -= entry_size
+        self._size = size
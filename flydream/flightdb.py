@@ -0,0 +1,205 @@
+import sqlite3
+
+from collections import namedtuple
+from itertools import repeat
+
+try:
+    from itertools import izip as zip
+except ImportError:
+    pass
+
+DatabaseFlight = namedtuple('DatabaseFlight', 'flight_id, source_hash, '
+        'source_name, flight_index, sampling_frequency, record_count, '
+        'duration, max_altitude, min_temperature, max_temperature, '
+        'temperature_unit, length_unit')
+
+
+class FlightDatabase:
+    ''' SQLite database of flights and their records.
+
+    Each flight is a row of the "flights" table, with statistics
+    computed once on insertion, and the hash and name of the upload
+    it comes from. Its records are rows of the "records" table,
+    indexed by (flight_id, time).
+
+    Flights of an upload are inserted in a single transaction, and
+    their records with executemany() calls, by blocks. The database
+    uses write-ahead logging: readers are not blocked by insertions.
+
+    Example:
+        database = FlightDatabase('flights.db')
+        database.add_flights(flights, upload_hash, 'upload', 'C', 'm')
+        database.close()'''
+
+    VERSION = 1
+
+    # Seconds to wait for another process writing to the database.
+    TIMEOUT = 60
+
+    _schema = [
+        '''CREATE TABLE IF NOT EXISTS flights (
+            id INTEGER PRIMARY KEY,
+            source_hash TEXT NOT NULL,
+            source_name TEXT,
+            flight_index INTEGER NOT NULL,
+            sampling_frequency REAL NOT NULL,
+            record_count INTEGER NOT NULL,
+            duration REAL NOT NULL,
+            max_altitude REAL,
+            min_temperature REAL,
+            max_temperature REAL,
+            temperature_unit TEXT NOT NULL,
+            length_unit TEXT NOT NULL,
+            UNIQUE (source_hash, flight_index, temperature_unit,
+                    length_unit))''',
+        '''CREATE TABLE IF NOT EXISTS records (
+            flight_id INTEGER NOT NULL REFERENCES flights (id),
+            time REAL NOT NULL,
+            temperature REAL NOT NULL,
+            altitude REAL NOT NULL)''',
+        '''CREATE INDEX IF NOT EXISTS records_flight_time
+            ON records (flight_id, time)''',
+    ]
+
+    def __init__(self, path):
+        '''Open, or create, the database.
+
+        Raise ValueError if the database was created by another
+        version.'''
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=self.TIMEOUT)
+
+        cursor = self._connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version not in (0, self.VERSION):
+            self.close()
+            raise ValueError('Unsupported flight database version: %d'
+                    % version)
+
+        with self._connection:
+            for statement in self._schema:
+                cursor.execute(statement)
+            cursor.execute('PRAGMA user_version=%d' % self.VERSION)
+
+    def close(self):
+        self._connection.close()
+
+    def add_flights(self, flights, source_hash, source_name,
+            temperature_unit, length_unit):
+        '''Insert flights of an upload, and their records.
+
+        Flights already inserted from the same upload, in the same
+        units, are replaced. Flights are inserted in a single
+        transaction.
+
+        Arguments:
+        flights -- Flights, with records in given units.
+        source_hash -- Upload content hash.
+        source_name -- Upload name, kept for reports.
+        temperature_unit, length_unit -- Unit names.
+
+        Returns the inserted flight id list.'''
+        flight_ids = []
+        with self._connection:
+            for flight in flights:
+                flight_id = self.add_flight(flight, source_hash,
+                        source_name, temperature_unit, length_unit)
+                self.add_records(flight_id, flight.times,
+                        flight.temperatures, flight.altitudes)
+                flight_ids.append(flight_id)
+
+        return flight_ids
+
+    def add_flight(self, flight, source_hash, source_name,
+            temperature_unit, length_unit):
+        '''Insert a flight, without its records, see add_flights().
+
+        Changes are only saved by commit().
+
+        Returns the inserted flight id.'''
+        source_name, temperature_unit, length_unit = [_text(value)
+                for value in (source_name, temperature_unit, length_unit)]
+
+        cursor = self._connection.cursor()
+        self._remove_flight(cursor, source_hash, flight.index,
+                temperature_unit, length_unit)
+
+        cursor.execute('INSERT INTO flights (source_hash, '
+                'source_name, flight_index, sampling_frequency, '
+                'record_count, duration, max_altitude, '
+                'min_temperature, max_temperature, '
+                'temperature_unit, length_unit) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (source_hash, source_name, flight.index,
+                 flight.sampling_freq, flight.record_count,
+                 flight.duration, _extremum(max, flight.altitudes),
+                 _extremum(min, flight.temperatures),
+                 _extremum(max, flight.temperatures),
+                 temperature_unit, length_unit))
+        return cursor.lastrowid
+
+    def add_records(self, flight_id, times, temperatures, altitudes):
+        '''Insert a block of flight records, given as columns.
+
+        Changes are only saved by commit().'''
+        self._connection.executemany('INSERT INTO records (flight_id, '
+                'time, temperature, altitude) VALUES (?, ?, ?, ?)',
+                zip(repeat(flight_id), times, temperatures, altitudes))
+
+    def commit(self):
+        self._connection.commit()
+
+    def flights(self):
+        '''DatabaseFlight list, sorted by source name and flight index.'''
+        cursor = self._connection.execute('SELECT id, source_hash, '
+                'source_name, flight_index, sampling_frequency, '
+                'record_count, duration, max_altitude, min_temperature, '
+                'max_temperature, temperature_unit, length_unit '
+                'FROM flights ORDER BY source_name, source_hash, '
+                'flight_index, id')
+        return [DatabaseFlight(*row) for row in cursor]
+
+    def records(self, flight_id, start=None, stop=None):
+        '''(time, temperature, altitude) records of a flight.
+
+        Keyword arguments:
+        start -- Only records from this time, in seconds (default: None).
+        stop -- Only records before this time, in seconds
+                (default: None).'''
+        query = 'SELECT time, temperature, altitude FROM records ' \
+                'WHERE flight_id = ?'
+        parameters = [flight_id]
+        if start is not None:
+            query += ' AND time >= ?'
+            parameters.append(start)
+        if stop is not None:
+            query += ' AND time < ?'
+            parameters.append(stop)
+
+        return self._connection.execute(query + ' ORDER BY time',
+                                        parameters).fetchall()
+
+    def _remove_flight(self, cursor, source_hash, index, temperature_unit,
+            length_unit):
+        flight_ids = [(row[0],) for row in cursor.execute(
+                'SELECT id FROM flights WHERE source_hash = ? AND '
+                'flight_index = ? AND temperature_unit = ? AND '
+                'length_unit = ?', (source_hash, index, temperature_unit,
+                                    length_unit))]
+        cursor.executemany('DELETE FROM records WHERE flight_id = ?',
+                           flight_ids)
+        cursor.executemany('DELETE FROM flights WHERE id = ?', flight_ids)
+
+
+def _extremum(function, column):
+    return function(column) if len(column) else None
+
+
+def _text(value):
+    # Python 2 sqlite3 module rejects encoded strings.
+    if isinstance(value, str) and not isinstance(value, type(u'')):
+        return value.decode('utf-8')
+    return value
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+
+from collections import namedtuple
+
+
+class IndexedFlight(namedtuple('IndexedFlight',
+        'index, offset, length, sampling_freq, record_count, '
+        'min_pressure, max_pressure, min_temperature, max_temperature')):
+    ''' Flight index entry, with raw sample extrema.
+
+    Like a FlightIndexEntry, it can be given to DataParser.extract_flight.
+
+    Extrema are raw sample values (Pascal and celsius degrees),
+    so that they do not depend on units. They are None for
+    flights without records.'''
+
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        return self.record_count * 1.0 / self.sampling_freq
+
+    def max_altitude(self, parser):
+        '''Maximum flight altitude, in parser length unit.'''
+        if self.min_pressure is None:
+            return None
+        return parser._to_elevation(self.min_pressure,
+                parser.PRESSURE_REFERENCE, parser.length_unit)
+
+
+class FlightIndexCache:
+    ''' Sidecar flight index of an FDA file.
+
+    The index is kept in a JSON file next to the FDA file, with
+    the .fdx extension. It is bound to the FDA file size, mtime
+    and content hash: it is used only if the FDA file did not
+    change since the index was built, otherwise it is rebuilt.
+
+    Example:
+        cache = FlightIndexCache('flight.fda')
+        flights = cache.flights(uploaded_data.data, DataParser())'''
+
+    EXTENSION = '.fdx'
+    VERSION = 1
+
+    # File hash computation read size.
+    READ_SIZE = 1 << 16
+
+    def __init__(self, fda_file):
+        self.fda_file = fda_file
+        self.path = os.path.splitext(fda_file)[0] + self.EXTENSION
+
+    def flights(self, data, parser):
+        '''Return the IndexedFlight list of the FDA file.
+
+        Arguments:
+        data -- FDA file raw data (see UploadedData).
+        parser -- DataParser used to rebuild a stale index.'''
+        flights = self.load()
+        if flights is None:
+            flights = self.build(data, parser)
+            self.save(flights)
+        return flights
+
+    def load(self):
+        '''Return indexed flights, or None if index is missing or stale.'''
+        try:
+            with open(self.path, 'r') as f:
+                content = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if not isinstance(content, dict) \
+                or content.get('version') != self.VERSION:
+            return None
+
+        # Cheap checks first. An unchanged content
+        # with a new mtime is still valid.
+        stat = os.stat(self.fda_file)
+        if content.get('size') != stat.st_size:
+            return None
+
+        try:
+            flights = [IndexedFlight(*values)
+                       for values in content['flights']]
+        except (KeyError, TypeError, ValueError):
+            return None
+        if content.get('mtime') != stat.st_mtime:
+            if content.get('sha1') != self._file_hash():
+                return None
+            self.save(flights)
+
+        return flights
+
+    def build(self, data, parser):
+        '''Index data flights, decoding their raw samples once.'''
+        flights = []
+        for entry in parser.index_flights(data):
+            samples = parser.extract_flight(data, entry).samples
+            extrema = [None] * 4
+            if entry.record_count:
+                extrema = [min(samples.pressures), max(samples.pressures),
+                           min(samples.temperatures),
+                           max(samples.temperatures)]
+            flights.append(IndexedFlight(*(tuple(entry) + tuple(extrema))))
+        return flights
+
+    def save(self, flights):
+        '''Write index file, bound to the current FDA file.
+
+        Index is silently not written if not possible.'''
+        stat = os.stat(self.fda_file)
+        content = {
+                'version': self.VERSION,
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'sha1': self._file_hash(),
+                'flights': [list(flight) for flight in flights]
+                }
+
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(content, f)
+        except (IOError, OSError):
+            pass
+
+    def _file_hash(self):
+        digest = hashlib.sha1()
+        with open(self.fda_file, 'rb') as f:
+            while True:
+                chunk = f.read(self.READ_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+        return digest.hexdigest()
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import struct
+
+from collections import namedtuple
+
+from flydream import serialprotocol as sp
+
+from flydream.dataparser import DataParser
+from flydream.uploadeddata import UploadedData
+from flydream.storage import write_file
+
+StoredUpload = namedtuple('StoredUpload', 'upload_id, name, flights')
+
+
+def flight_hash(chunk):
+    '''Content hash of a raw flight chunk.
+
+    A chunk is the data found between two flight separators:
+    <constant_byte> <sampling_rate> <data_records...>'''
+    return hashlib.sha1(chunk).hexdigest()
+
+
+class FlightStore:
+    ''' Content-addressed flight store.
+
+    Each distinct flight is stored once, in a file named after the
+    hash of its raw bytes. An upload is recorded as the list of its
+    flight hashes, and can be exported back to an FDA file.
+
+    Store directory layout:
+        flights/<2 first hash digits>/<flight hash>
+        uploads/<upload id>.json
+
+    Example:
+        store = FlightStore('archive')
+        upload, new_flights = store.import_file('flight.fda')
+        store.export_file(upload.upload_id, 'copy.fda')'''
+
+    FLIGHTS_DIR = 'flights'
+    UPLOADS_DIR = 'uploads'
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self._flights_dir = os.path.join(path, self.FLIGHTS_DIR)
+        self._uploads_dir = os.path.join(path, self.UPLOADS_DIR)
+
+    def import_file(self, fda_file):
+        '''Store the flights of an FDA file, see import_data().'''
+        raw_upload = UploadedData.from_file(fda_file, mapped=True)
+        name = os.path.splitext(os.path.basename(fda_file))[0]
+        return self.import_data(raw_upload.data, name)
+
+    def import_data(self, uploaded_data, name=None):
+        '''Store raw upload data flights.
+
+        Only flights missing from the store are written. Raise
+        FlyDreamAltimeterProtocolError if data is not valid: nothing
+        is written then.
+
+        Keyword arguments:
+        name -- Upload name, kept for listing (default: None).
+
+        Returns a (StoredUpload, new flight hash list) tuple.'''
+        hashes = []
+        new_flights = []
+        for key, chunk in self._hashed_chunks(uploaded_data):
+            if not self.has_flight(key):
+                write_file(self._flight_path(key), chunk)
+                new_flights.append(key)
+            hashes.append(key)
+
+        upload = StoredUpload(self._upload_id(hashes), name, hashes)
+        path = self._upload_path(upload.upload_id)
+        if not os.path.exists(path):
+            content = {'version': self.VERSION, 'name': name,
+                       'flights': hashes}
+            write_file(path, json.dumps(content).encode('utf-8'))
+
+        return upload, new_flights
+
+    def flight_hashes(self, uploaded_data):
+        '''Hash list of raw upload data flights, in upload order.
+
+        Flights are not stored, see import_data().'''
+        return [key for key, _ in self._hashed_chunks(uploaded_data)]
+
+    def has_flight(self, key):
+        return os.path.exists(self._flight_path(key))
+
+    def read_flight(self, key):
+        '''Raw flight chunk of given hash.'''
+        with open(self._flight_path(key), 'rb') as f:
+            return f.read()
+
+    def flights(self):
+        '''Sorted hash list of stored flights.'''
+        if not os.path.isdir(self._flights_dir):
+            return []
+        return sorted(name
+                for prefix in os.listdir(self._flights_dir)
+                for name in os.listdir(os.path.join(self._flights_dir,
+                                                    prefix)))
+
+    def uploads(self):
+        '''List of StoredUpload objects, sorted by name.'''
+        if not os.path.isdir(self._uploads_dir):
+            return []
+        result = [self._read_upload(os.path.splitext(name)[0])
+                  for name in os.listdir(self._uploads_dir)]
+        return sorted(result, key=lambda upload: (upload.name or '',
+                                                  upload.upload_id))
+
+    def upload(self, upload_id):
+        '''StoredUpload of given id, or unique id prefix.
+
+        Raise ValueError if no, or several, uploads match.'''
+        matches = [upload for upload in self.uploads()
+                   if upload.upload_id.startswith(upload_id)]
+        if len(matches) != 1:
+            raise ValueError('%s upload: %s' % (
+                    'Unknown' if not matches else 'Ambiguous', upload_id))
+        return matches[0]
+
+    def export_data(self, upload_id):
+        '''Rebuild an upload as an UploadedData object.
+
+        Data is the stored flights, each one preceded by a flight
+        separator, as uploaded from the device.'''
+        upload = self.upload(upload_id)
+        data = b''.join(sp.RAW_FLIGHTS_SEPARATOR + self.read_flight(key)
+                        for key in upload.flights)
+        occupied = struct.pack('>I', sp.EMPTY_ALTIMETER + len(data))
+        return UploadedData(sp.RESPONSE_UPLOAD + occupied, data)
+
+    def export_file(self, upload_id, filename):
+        '''Write an upload to an FDA file, see export_data().'''
+        self.export_data(upload_id).to_file(filename)
+
+    def _hashed_chunks(self, uploaded_data):
+        # (hash, raw flight chunk) of each upload flight. Flights
+        # are all checked before the first one is provided.
+        view = memoryview(uploaded_data)
+        for entry in DataParser().index_flights(uploaded_data):
+            # Chunk starts with <constant_byte> <sampling_rate>.
+            chunk = view[entry.offset - 2:
+                         entry.offset + entry.length].tobytes()
+            yield flight_hash(chunk), chunk
+
+    def _upload_id(self, hashes):
+        # Uploads are content-addressed too.
+        return hashlib.sha1(' '.join(hashes).encode('ascii')).hexdigest()
+
+    def _read_upload(self, upload_id):
+        with open(self._upload_path(upload_id), 'r') as f:
+            content = json.load(f)
+        return StoredUpload(upload_id, content['name'], content['flights'])
+
+    def _flight_path(self, key):
+        return os.path.join(self._flights_dir, key[:2], key)
+
+    def _upload_path(self, upload_id):
+        return os.path.join(self._uploads_dir, upload_id + '.json')
@@ -0,0 +1,154 @@
+import json
+
+from collections import OrderedDict
+
+from flydream.flight import column_blocks, record_blocks
+
+try:
+    from itertools import izip as zip
+except ImportError:
+    pass
+
+
+class JsonWriter:
+    ''' Streaming writer of flights, as JSON objects.
+
+    A flight is written as its info object, then its records, by
+    blocks: only a block of records is formatted at once, whatever
+    the flight length.
+
+    Default output is the same as json.dumps() of the
+    {"info": {...}, "records": [{"time": ..., "temperature": ...,
+    "altitude": ...}, ...]} flight object, with indent=2.
+
+    Compact output has no indentation, and records are stored by
+    columns: {"info": {...}, "records": {"time": [...],
+    "temperature": [...], "altitude": [...]}}.
+
+    Example:
+        with open('flight.json', 'w') as f:
+            JsonWriter(f).write_flight(flight, info)'''
+
+    COLUMNS = 'time', 'temperature', 'altitude'
+
+    _record_format = ('\n    {\n      "time": %s,\n      "temperature": %s,'
+                      '\n      "altitude": %s\n    }')
+
+    def __init__(self, out, compact=False):
+        '''Arguments:
+        out -- Text file object.
+
+        Keyword arguments:
+        compact -- Write compact columnar JSON (default: False).'''
+        self._out = out
+        self.compact = compact
+
+        self._records_written = 0
+
+    def write_flight(self, flight, info):
+        '''Write a flight object.
+
+        Arguments:
+        flight -- Flight to write records of.
+        info -- Flight info object, as (key, value) pairs.'''
+        if self.compact:
+            self._write_compact(OrderedDict(info), (flight.times,
+                    flight.temperatures, flight.altitudes))
+            return
+
+        self.begin_flight(info)
+        for block in record_blocks(flight):
+            self.write_columns(*block)
+        self.end_flight()
+
+    def begin_flight(self, info):
+        '''Start a flight object, records are then given to
+        write_columns(). Not available in compact mode.'''
+        if self.compact:
+            raise ValueError('Compact flights are written at once')
+
+        info = json.dumps(OrderedDict(info), indent=2,
+                          separators=(',', ': '))
+        self._out.write('{\n  "info": %s,\n  "records": [' %
+                        info.replace('\n', '\n  '))
+        self._records_written = 0
+
+    def write_columns(self, times, temperatures, altitudes):
+        '''Write a block of flight records, given as columns.'''
+        if not len(times):
+            return
+
+        values = [_json_values(column)
+                  for column in (times, temperatures, altitudes)]
+        if self._records_written:
+            self._out.write(',')
+        self._out.write(','.join(self._record_format % record
+                                 for record in zip(*values)))
+        self._records_written += len(times)
+
+    def end_flight(self):
+        self._out.write('\n  ]\n}' if self._records_written else ']\n}')
+
+    def _write_compact(self, info, columns):
+        self._out.write('{"info":%s,"records":{' %
+                        json.dumps(info, separators=(',', ':')))
+
+        for index, (name, column) in enumerate(zip(self.COLUMNS, columns)):
+            self._out.write('%s"%s":[' % (',' if index else '', name))
+            for count, (block,) in enumerate(column_blocks([column])):
+                if count:
+                    self._out.write(',')
+                self._out.write(','.join(_json_values(block)))
+            self._out.write(']')
+
+        self._out.write('}}')
+
+
+class JsonLinesWriter:
+    ''' Streaming writer of flight records, as JSON Lines.
+
+    Each record is a compact JSON object on its own line: given
+    flight info items, then record "time", "temperature" and
+    "altitude". Records are formatted by blocks, each one given
+    to a single write() call.
+
+    Example:
+        with open('flight.ndjson', 'w') as f:
+            JsonLinesWriter(f).write_records(flight, [('flight', 1)])'''
+
+    def __init__(self, out):
+        '''Arguments:
+        out -- Text file object.'''
+        self._out = out
+
+    def write_records(self, flight, info, start=0):
+        '''Write flight records, from the start one.
+
+        Arguments:
+        flight -- Flight to write records of.
+        info -- Items of each record object, as (key, value) pairs.
+
+        Keyword arguments:
+        start -- First record index (default: 0).'''
+        for block in record_blocks(flight, start):
+            self.write_columns(info, *block)
+
+    def write_columns(self, info, times, temperatures, altitudes):
+        '''Write a block of records, given as columns.
+
+        Arguments:
+        info -- Items of each record object, as (key, value) pairs.'''
+        head = json.dumps(OrderedDict(info), separators=(',', ':'))[:-1]
+        line_format = (head + ',' if info else head).replace('%', '%%') + \
+                '"time":%s,"temperature":%s,"altitude":%s}\n'
+
+        values = [_json_values(column)
+                  for column in (times, temperatures, altitudes)]
+        self._out.write(''.join(line_format % record
+                                for record in zip(*values)))
+
+
+def _json_values(column):
+    # JSON text of each value, as json.dumps() formats it.
+    text = json.dumps(list(column))[1:-1]
+    return text.split(', ') if text else []
@@ -1,3 +1,7 @@
+from __future__ import print_function
+
+import sys
+
 try:
     import serial
 except ImportError:
@@ -6,8 +10,10 @@ except ImportError:
     try:
         import pyserial as serial
     except:
+        # Keep standard output for data (see "convert -").
         print('''This software requires "pyserial" to be installed on your computer
-Please visit http://pyserial.sourceforge.net/pyserial.html#installation''')
+Please visit http://pyserial.sourceforge.net/pyserial.html#installation''',
+              file=sys.stderr)
 
 from contextlib import contextmanager
 
@@ -107,32 +113,71 @@ class SerialDevice:
 
         return True
 
-    def upload(self, callback=None):
-        ''' Send flight data retrieval command.'''
-        self._write(sp.COMMAND_UPLOAD)
-
-        # 1. Header is fixed-length.
-        header = self._read(sp.RAW_DATA_HEADER_LENGTH)
-        data_size, _ = DataParser().parse_header(header)
+    def upload(self, callback=None, feeder=None, sink=None):
+        ''' Send flight data retrieval command.
+
+        Keyword arguments:
+        callback -- Progression callable, see Altimeter.upload.
+        feeder -- IncrementalParser given data chunks as they
+                  are read, until data is found invalid
+                  (default: None).
+        sink -- UploadSink given data chunks as they are read,
+                instead of keeping them in memory (default: None).'''
+        # Sink is given all data, and keeps it if transfer fails.
+        try:
+            self._write(sp.COMMAND_UPLOAD)
+
+            # 1. Header is fixed-length.
+            header = self._read(sp.RAW_DATA_HEADER_LENGTH)
+            data_size, _ = DataParser().parse_header(header)
+            if sink:
+                sink.write(header)
+
+            data = self._read_data(data_size, callback, feeder, sink)
+        except:
+            if sink:
+                sink.abort()
+            raise
+
+        if sink:
+            return sink.close()
+        return UploadedData(header, data)
 
+    def _read_data(self, data_size, callback, feeder, sink=None):
         # 2. Next read the flight data.
-        data = b''
-        remaining = data_size
-        while remaining > 0:
+        #
+        # Chunks are gathered in a list, and joined once.
+        chunks = []
+        read = 0
+        while read < data_size:
             # Read some data.
-            n = self.DATA_CHUNK_SIZE if remaining > self.DATA_CHUNK_SIZE \
-                    else remaining
-            data += self._serial_port.read(n)
+            n = min(self.DATA_CHUNK_SIZE, data_size - read)
+            chunk = self._serial_port.read(n)
+            if not chunk:
+                raise FlyDreamAltimeterReadError('Error while reading data '
+                        '(read: %d, expected: %d)' % (read, data_size))
+            read += len(chunk)
+
+            if sink:
+                sink.write(chunk)
+            else:
+                chunks.append(chunk)
+
+            # Decode flights while transfer is running. Transfer goes
+            # on after decoding errors: the feeder raises them again
+            # once closed.
+            if feeder:
+                try:
+                    feeder.feed(chunk)
+                except FlyDreamAltimeterProtocolError:
+                    feeder = None
 
             # Tell about progression.
             if callback:
-                callback(len(data), data_size)
-
-            # Check for more data.
-            remaining = data_size - len(data)
+                callback(read, data_size)
 
         # Provide raw data. Flight parsing is caller's responsibility.
-        return UploadedData(header, data)
+        return b''.join(chunks)
 
     def _write(self, command):
         # Write and check written byte count.
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from flydream.dataparser import DataParser
+from flydream.csvwriter import CsvWriter
+from flydream.jsonwriter import JsonWriter, JsonLinesWriter
+from flydream.columnfile import ColumnFile, ColumnFlight
+from flydream.flightdb import FlightDatabase
+from flydream.converter import RecordSink
+
+CSV_FILE_EXTENSION = '.csv'
+JSON_FILE_EXTENSION = '.json'
+NDJSON_FILE_EXTENSION = '.ndjson'
+BINARY_FILE_EXTENSION = ColumnFile.EXTENSION
+
+CELSIUS_UNIT = '°C'
+FAHRENHEIT_UNIT = '°F'
+
+METER_UNIT = 'm'
+FOOT_UNIT = 'ft'
+
+
+def length_unit_to_string(length_unit):
+    return {
+            DataParser.LENGTH_UNIT_METER: METER_UNIT,
+            DataParser.LENGTH_UNIT_FEET: FOOT_UNIT
+    }[length_unit]
+
+
+def temperature_unit_to_string(temp_unit):
+    return {
+            DataParser.TEMPERATURE_UNIT_CELSIUS: CELSIUS_UNIT,
+            DataParser.TEMPERATURE_UNIT_FAHRENHEIT: FAHRENHEIT_UNIT
+    }[temp_unit]
+
+
+def csv_header(length_unit, temp_unit):
+    return 'time(sec),temperature(%s),altitude(%s)\n' % (
+            temperature_unit_to_string(temp_unit),
+            length_unit_to_string(length_unit))
+
+
+def flight_info(flight):
+    return [('temperature_unit',
+                temperature_unit_to_string(flight.temperature_unit)),
+            ('length_unit', length_unit_to_string(flight.length_unit)),
+            ('sampling_frequency', flight.sampling_freq)]
+
+
+def indexed_flight_info(flight):
+    return [('flight', flight.index)] + flight_info(flight)
+
+
+def column_flight(flight):
+    return ColumnFlight(indexed_flight_info(flight),
+            (flight.times, flight.temperatures, flight.altitudes))
+
+
+class FlightFileSink(RecordSink):
+    ''' Base of sinks writing a file per flight.'''
+
+    description = None
+    extension = None
+
+    def __init__(self, out_prefix):
+        self.out_prefix = out_prefix
+        self._file = None
+
+    def fname(self, flight):
+        return self.out_prefix + '_%3.3d' % flight.index + self.extension
+
+    def abort(self):
+        # Remove the file of the flight being converted.
+        if self._file is not None:
+            self._file.close()
+            os.remove(self._file.name)
+            self._file = None
+
+    def begin_message(self, flights):
+        return 'Converting %d flight(s) to %s...' % (len(flights),
+                                                     self.description)
+
+    def flight_message(self, flight):
+        return '   Writing %s file' % self.fname(flight)
+
+    def _open(self, flight):
+        self._file = open(self.fname(flight), 'w')
+        return self._file
+
+    def _close(self):
+        self._file.close()
+        self._file = None
+
+
+class CsvFileSink(FlightFileSink):
+
+    description = 'CSV'
+    extension = CSV_FILE_EXTENSION
+
+    def begin_flight(self, flight):
+        self._open(flight).write(csv_header(flight.length_unit,
+                                            flight.temperature_unit))
+        self._writer = CsvWriter(self._file)
+
+    def write_records(self, flight, times, temperatures, altitudes):
+        self._writer.write_columns(times, temperatures, altitudes)
+
+    def end_flight(self, flight):
+        self._close()
+
+
+class JsonFileSink(FlightFileSink):
+
+    description = 'JSON'
+    extension = JSON_FILE_EXTENSION
+
+    def __init__(self, out_prefix, compact=False):
+        FlightFileSink.__init__(self, out_prefix)
+        self.compact = compact
+
+    def begin_flight(self, flight):
+        self._writer = JsonWriter(self._open(flight), self.compact)
+        if not self.compact:
+            self._writer.begin_flight(flight_info(flight))
+
+    def write_records(self, flight, times, temperatures, altitudes):
+        if not self.compact:
+            self._writer.write_columns(times, temperatures, altitudes)
+
+    def end_flight(self, flight):
+        if self.compact:
+            # Records are stored by columns: written at once.
+            self._writer.write_flight(flight, flight_info(flight))
+        else:
+            self._writer.end_flight()
+        self._close()
+
+
+class NdjsonFileSink(FlightFileSink):
+
+    description = 'JSON Lines'
+    extension = NDJSON_FILE_EXTENSION
+
+    def begin_flight(self, flight):
+        self._writer = JsonLinesWriter(self._open(flight))
+        self._info = indexed_flight_info(flight)
+
+    def write_records(self, flight, times, temperatures, altitudes):
+        self._writer.write_columns(self._info, times, temperatures,
+                                   altitudes)
+
+    def end_flight(self, flight):
+        self._close()
+
+
+class BinaryFileSink(FlightFileSink):
+
+    description = 'binary files'
+    extension = BINARY_FILE_EXTENSION
+
+    def end_flight(self, flight):
+        # Records are stored by columns: written at once.
+        ColumnFile([column_flight(flight)]).to_file(self.fname(flight))
+
+
+class BinaryUploadSink(RecordSink):
+    ''' Write all flights to a single binary file.'''
+
+    def __init__(self, fname):
+        self.fname = fname
+        self._flights = []
+
+    def end_flight(self, flight):
+        self._flights.append(column_flight(flight))
+
+    def close(self):
+        ColumnFile(self._flights).to_file(self.fname)
+
+    def begin_message(self, flights):
+        return 'Converting %d flight(s) to a binary file...' % len(flights)
+
+    def close_message(self):
+        return '   Writing %s file' % self.fname
+
+
+class SqliteSink(RecordSink):
+    ''' Store flights in a SQLite database, committed on close.'''
+
+    def __init__(self, database_file, source):
+        '''Arguments:
+        source -- (hash, name) of flights upload.'''
+        self.database_file = database_file
+        self.source = source
+        self._database = None
+
+    def begin_flight(self, flight):
+        if self._database is None:
+            try:
+                self._database = FlightDatabase(self.database_file)
+            except ValueError as e:
+                raise IOError('%s: %s' % (self.database_file, e))
+
+        self._flight_id = self._database.add_flight(flight,
+                self.source[0], self.source[1],
+                temperature_unit_to_string(flight.temperature_unit),
+                length_unit_to_string(flight.length_unit))
+
+    def write_records(self, flight, times, temperatures, altitudes):
+        self._database.add_records(self._flight_id, times, temperatures,
+                                   altitudes)
+
+    def close(self):
+        if self._database is not None:
+            self._database.commit()
+            self._database.close()
+            self._database = None
+
+    def abort(self):
+        # Flights added so far are not committed.
+        if self._database is not None:
+            self._database.close()
+            self._database = None
+
+    def begin_message(self, flights):
+        return 'Storing %d flight(s) in %s database...' % (len(flights),
+                self.database_file)
+
+
+class CsvStreamSink(RecordSink):
+    ''' Write flights to a single CSV table, with a leading flight
+    index column.'''
+
+    def __init__(self, out, length_unit, temp_unit):
+        out.write('flight,' + csv_header(length_unit, temp_unit))
+        self._writer = CsvWriter(out)
+
+    def write_records(self, flight, times, temperatures, altitudes):
+        self._writer.write_columns(times, temperatures, altitudes,
+                                   '%d,' % flight.index)
+
+
+class JsonStreamSink(RecordSink):
+    ''' Write flights to a JSON array of flight objects, as written
+    to JSON files, with the flight index in flight info.'''
+
+    def __init__(self, out, compact=False):
+        out.write('[')
+        self._out = out
+        self._writer = JsonWriter(out, compact)
+        self._compact = compact
+        self._flights_written = 0
+
+    def begin_flight(self, flight):
+        if self._flights_written:
+            self._out.write(',')
+        self._out.write('\n')
+        if not self._compact:
+            self._writer.begin_flight(self._info(flight))
+
+    def write_records(self, flight, times, temperatures, altitudes):
+        if not self._compact:
+            self._writer.write_columns(times, temperatures, altitudes)
+
+    def end_flight(self, flight):
+        if self._compact:
+            # Records are stored by columns: written at once.
+            self._writer.write_flight(flight, self._info(flight))
+        else:
+            self._writer.end_flight()
+        self._flights_written += 1
+
+    def close(self):
+        self._out.write('\n]\n')
+
+    def _info(self, flight):
+        return flight_info(flight) + [('flight', flight.index)]
+
+
+class NdjsonStreamSink(RecordSink):
+    ''' Write the records of all flights as JSON Lines, as written
+    to NDJSON files.'''
+
+    def __init__(self, out):
+        self._writer = JsonLinesWriter(out)
+
+    def begin_flight(self, flight):
+        self._info = indexed_flight_info(flight)
+
+    def write_records(self, flight, times, temperatures, altitudes):
+        self._writer.write_columns(self._info, times, temperatures,
+                                   altitudes)
@@ -0,0 +1,40 @@
+import os
+import tempfile
+
+
+def write_file(path, content):
+    '''Write bytes to a file, which appears atomically.
+
+    Content is written to a temporary file first, then renamed:
+    an interrupted write does not leave a partial file, and readers
+    never find one. Missing directories are created.'''
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.rename(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+def array_bytes(column):
+    '''Raw content of an array.'''
+    try:
+        return column.tobytes()
+    except AttributeError:
+        # Python 2.
+        return column.tostring()
+
+
+def array_extend(column, content):
+    '''Append raw content to an array.'''
+    try:
+        column.frombytes(content)
+    except AttributeError:
+        # Python 2.
+        column.fromstring(content)
@@ -1,4 +1,4 @@
-
+import mmap
 import os
 
 from flydream import serialprotocol as sp
@@ -14,15 +14,103 @@ class UploadedData:
         return self.header + self.data
 
     @staticmethod
-    def from_file(filename):
+    def from_file(filename, mapped=False):
+        '''Read uploaded data from file.
+
+        Keyword arguments:
+        mapped -- Memory-map the file instead of reading it
+                  (default: False).
+
+        When mapped, data is a read-only memoryview on the file
+        content past the header: file pages are only read when
+        accessed, and never copied on the heap.'''
         with open(filename, 'rb') as f:
+            if mapped and os.fstat(f.fileno()).st_size > 0:
+                return UploadedData._map_file(f)
+
             header = f.read(sp.RAW_DATA_HEADER_LENGTH)
             data = f.read()
             return UploadedData(header, data)
 
+    @staticmethod
+    def _map_file(f):
+        # Mapping stays valid once the file is closed.
+        content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = content[:sp.RAW_DATA_HEADER_LENGTH]
+        try:
+            data = memoryview(content)[sp.RAW_DATA_HEADER_LENGTH:]
+        except TypeError:
+            # Python 2 mmap objects do not support memoryview.
+            data = content[sp.RAW_DATA_HEADER_LENGTH:]
+        return UploadedData(header, data)
+
     def to_file(self, filename):
         if os.path.exists(filename):
             raise OSError('File already exists')
 
+        # Write parts one after the other, rather
+        # than a copy of their concatenation.
         with open(filename, 'wb') as f:
-            f.write(self.full_data())
+            f.write(self.header)
+            f.write(self.data)
+
+
+class UploadSink:
+    ''' Write uploaded data to a file, as it is received.
+
+    Data is written to a partial file, named after the target file
+    with the PART_EXTENSION suffix. Once all data is received,
+    close() renames it to the target file, which appears atomically.
+    If the transfer fails, abort() keeps the partial file, with the
+    data received so far, or removes it if no data was received.
+    A kept partial file is never overwritten: it must be removed
+    before writing the target file again.
+
+    Example:
+        sink = UploadSink('flight.fda')
+        raw_data = altimeter.upload(sink=sink)'''
+
+    PART_EXTENSION = '.part'
+
+    def __init__(self, filename):
+        '''Raise OSError if the target file, or the partial file,
+        already exists.'''
+        if os.path.exists(filename):
+            raise OSError('File already exists')
+
+        self.filename = filename
+        self.part_filename = filename + self.PART_EXTENSION
+        fd = os.open(self.part_filename, os.O_WRONLY | os.O_CREAT |
+                     os.O_EXCL | getattr(os, 'O_BINARY', 0))
+        self._file = os.fdopen(fd, 'wb')
+        self._written = 0
+
+    def write(self, data):
+        '''Append header, or data chunk, to the partial file.'''
+        self._file.write(data)
+        self._written += len(data)
+
+    def close(self):
+        '''Finish the file, and return it as mapped UploadedData.'''
+        self._finish()
+        if os.path.exists(self.filename):
+            raise OSError('File already exists')
+        os.rename(self.part_filename, self.filename)
+
+        return UploadedData.from_file(self.filename, mapped=True)
+
+    def abort(self):
+        '''Stop writing, keeping the partial file if not empty.
+
+        Aborting again has no effect.'''
+        if self._file.closed:
+            return
+        self._finish()
+        if self._written == 0:
+            os.remove(self.part_filename)
+
+    def _finish(self):
+        # Make sure data reached the disk before renaming.
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
@@ -5,6 +5,8 @@ except ImportError:
 
 from flydream.uploadeddata import UploadedData
 from flydream.dataparser import DataParser
+from flydream.flightindex import FlightIndexCache
+from flydream.flightcache import FlightCache
 
 from gui.util import flight_description
 
@@ -17,9 +19,13 @@ class FdaFlightList(tk.Listbox):
         self.bind('<<ListboxSelect>>', self.on_select)
 
     def load_fda_file(self, path):
-        # Load data.
-        raw_upload = UploadedData.from_file(path)
-        self._flights = DataParser().extract_flights(raw_upload.data)
+        # Locate flights, they are extracted when selected.
+        # The flight index is kept next to the file.
+        raw_upload = UploadedData.from_file(path, mapped=True)
+        self._parser = DataParser(cache=FlightCache())
+        self._data = raw_upload.data
+        self._flights = FlightIndexCache(path).flights(self._data,
+                self._parser)
 
         # Populate list.
         self.update_content()
@@ -48,7 +54,8 @@ class FdaFlightList(tk.Listbox):
 
         if not self._flights:
             return
-        flight = self._flights[int(index_str)]
+        entry = self._flights[int(index_str)]
+        flight = self._parser.extract_flight(self._data, entry)
 
         # Tell the world about current selected flight.
         self.on_flight_selected(flight)
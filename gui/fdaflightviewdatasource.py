@@ -1,4 +1,3 @@
-
 from gui.util import flight_description
 from gui.smoothcurve import gaussian_filter, get_window_weights
 
@@ -17,18 +16,17 @@ class FdaFlightViewDataSource:
         self.time_min = 0.0
         self.time_max = flight.duration
 
-        # Full data values.
-        full_time_values = [rec.time for rec in flight.records]
-        full_alt = [rec.altitude for rec in flight.records]
-        full_temp = [rec.temperature for rec in flight.records]
+        # Samples are evenly spaced: displayed ones
+        # are found by the flight, from their index.
+        self._flight = flight
+
+        # Full data values, as (time, temperature, altitude,
+        # softened altitude) columns: flight ones are not copied.
         full_soft_alt = gaussian_filter(
-                full_alt,
+                flight.altitudes,
                 get_window_weights(self.GAUSSIAN_WINDOW_WIDTH))
-
-        # Create a list, because zip returns a
-        # iterator in Python 3.
-        self.full_data = list(zip(full_time_values, full_temp,
-                full_alt, full_soft_alt))
+        self.columns = (flight.times, flight.temperatures,
+                flight.altitudes, full_soft_alt)
 
         self.compute_extrema()
 
@@ -39,9 +37,9 @@ class FdaFlightViewDataSource:
 
     def compute_extrema(self):
 
-        # http://stackoverflow.com/a/4002806
-        _, temp_max, alt_max, _ = map(max, *self.full_data)
-        _, temp_min, alt_min, _ = map(min, *self.full_data)
+        _, temps, alts, _ = self.columns
+        temp_min, temp_max = min(temps), max(temps)
+        alt_min, alt_max = min(alts), max(alts)
 
         # Add small margin to constant values.
         #
@@ -89,25 +87,24 @@ class FdaFlightViewDataSource:
     def get_displayed_sample_count(self):
         # Depending on scale factor, this count
         # may not be an integer value.
-        return len(self.full_data) / self.time_scale
+        return self._flight.record_count / self.time_scale
 
     def get_displayed_data(self):
-        # Only return values, not timestamps.
-        return [rec for rec in self.full_data
-                if self.time_lo <= rec[0] <= self.time_hi]
+        # Only displayed values are gathered as records.
+        lo, hi = self._flight.index_range(self.time_lo, self.time_hi)
+        return list(zip(*[column[lo:hi] for column in self.columns]))
 
     def find_nearest_values(self, time):
-        # FIXME: Samples are ordered, could use bisection.
-        return min(self.full_data, key=lambda x: abs(x[0] - time))
+        index = self._flight.nearest_index(time)
+        return tuple(column[index] for column in self.columns)
 
     def get_max_alt(self):
         # Return all maximum altitudes records,
         # for both raw and softened altitude.
-        max_alt = max(rec[2] for rec in self.full_data)
-        max_alt_rec = [(r[0], r[2]) for r in self.full_data if r[2] == max_alt]
-
-        max_soft = max(rec[3] for rec in self.full_data)
-        max_soft_rec = [(r[0], r[3]) for r in self.full_data
-                if r[3] == max_soft]
-
-        return max_alt_rec + max_soft_rec
+        times, _, alts, soft_alts = self.columns
+        result = []
+        for column in alts, soft_alts:
+            max_alt = max(column)
+            result.extend((times[i], alt) for i, alt in enumerate(column)
+                          if alt == max_alt)
+        return result
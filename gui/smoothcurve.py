@@ -13,11 +13,10 @@ def get_window_weights(N):
 
 def apply_filter(index, array, window):
     N = (len(window) - 1) // 2
-    # Fix out of range exception.
-    array_l = [array[0] for i in range(N)] \
-                + array \
-                + [array[-1] for i in range(N)]
-    return sum(float(array_l[N + index + i]) * window[N + i]
+    # Fix out of range exception: repeat first and
+    # last values. Works with any sequence type.
+    last = len(array) - 1
+    return sum(float(array[min(max(index + i, 0), last)]) * window[N + i]
             for i in range(-N, N + 1))
 
 
@@ -3,26 +3,41 @@
 
 from __future__ import print_function
 
+import os
 import sys
 import argparse
 import textwrap
 import time
-import json
+import hashlib
+import sqlite3
 
-from flydream.uploadeddata import UploadedData
+from collections import deque
+from functools import partial
+
+from flydream.uploadeddata import UploadedData, UploadSink
 from flydream.dataparser import DataParser
+from flydream.flight import Flight
+from flydream.flightindex import FlightIndexCache
+from flydream.batch import find_files, run_batch, BatchStatistics
+from flydream.flightstore import FlightStore
+from flydream.flightcache import FlightCache
+from flydream.converter import FlightConverter
+from flydream.sinks import CsvFileSink, JsonFileSink, NdjsonFileSink, \
+        BinaryFileSink, BinaryUploadSink, SqliteSink, CsvStreamSink, \
+        JsonStreamSink, NdjsonStreamSink, BINARY_FILE_EXTENSION
 from flydream.altimeter import Altimeter
-from flydream.exception import FlyDreamAltimeterSerialPortError
+from flydream.exception import FlyDreamAltimeterException, \
+        FlyDreamAltimeterSerialPortError, FlyDreamAltimeterProtocolError
+from flydream import serialprotocol as sp
 
 RAW_FILE_EXTENSION = '.fda'
-CSV_FILE_EXTENSION = '.csv'
-JSON_FILE_EXTENSION = '.json'
 
-CELSIUS_UNIT = '°C'
-FAHRENHEIT_UNIT = '°F'
+# Standard input/output file name.
+STDIO_FILE_NAME = '-'
+STDIN_READ_SIZE = 64 * 1024
 
-METER_UNIT = 'm'
-FOOT_UNIT = 'ft'
+# Set to disable decoded flights cache, as --no-cache does.
+NO_CACHE_VARIABLE = 'PYFDA_NO_CACHE'
 
 
 def parse_command_line():
@@ -38,8 +53,21 @@ def parse_command_line():
                             clear   - Erase all flight data on the Device
 
                         Available data (FDA file) commands:
-                            info    - Print a summary of flight data file
+                            info    - Print a summary of flight data files
                             convert - Convert data to various formats
+
+                        Available flight store commands:
+                            import  - Add FDA files to a flight store
+                            export  - Write a stored upload to a FDA file
+                            list    - Print flight store uploads
+
+                        Available cache command:
+                            cache   - Print decoded flights cache usage
+                                      ("stats"), or empty it ("clear")
+
+                        Data commands, and "import", accept several files,
+                        directories (searched for .fda files) and glob
+                        patterns.
                     '''),
             epilog='Unrelevant arguments for given command are silently '
             'ignored.')
@@ -47,10 +75,13 @@ def parse_command_line():
     # Command: What to do.
     group = parser.add_argument_group('Available commands')
     group.add_argument('command',
-            choices=['upload', 'setup', 'clear', 'convert', 'info'],
+            choices=['upload', 'setup', 'clear', 'convert', 'info',
+                     'import', 'export', 'list', 'cache'],
             help='"upload", "setup" and "clear" commands require a '
-            'connected altimeter. "convert" and "info" commands require '
-            'a raw .fda file argument.')
+            'connected altimeter. "convert", "info" and "import" commands '
+            'require raw .fda file arguments. "export" command requires '
+            'upload id arguments. "cache" command requires a "stats" or '
+            '"clear" argument.')
 
     # Device related arguments.
     group = parser.add_argument_group('Altimeter configuration')
@@ -69,12 +100,54 @@ def parse_command_line():
     group.add_argument('--json',
             action='store_true',
             help='Output JSON data (with "upload" or "convert" command)')
+    group.add_argument('--ndjson',
+            action='store_true',
+            help='Output JSON Lines data, one JSON object per record, '
+            'with flight index, sampling frequency and units (with '
+            '"upload" or "convert" command)')
+    group.add_argument('--binary',
+            action='store_true',
+            help='Output binary columnar data, one file per flight, '
+            'readable with flydream.columnfile module (with "upload" or '
+            '"convert" command)')
+    group.add_argument('--binary-upload',
+            action='store_true',
+            help='Output binary columnar data, a single file with all '
+            'flights (with "upload" or "convert" command)')
+    group.add_argument('--sqlite', metavar='DB',
+            help='Store flights and their records in SQLite database DB, '
+            'created if needed (with "upload" or "convert" command)')
+    group.add_argument('--compact',
+            action='store_true',
+            help='Output compact JSON data, with records stored by '
+            'columns (with --json)')
     group.add_argument('--prefix',
             help='Prefix of generated files (with "upload" or "convert" '
             ' commands). Use current date/time as default.')
     group.add_argument('--last', type=int, default=0, nargs='?',
             help='Convert LAST lastest flights only (with "convert"). '
             'Default: 1.')
+    group.add_argument('--jobs', type=int, default=1,
+            help='Process files with JOBS processes (with "convert" or '
+            '"info"). With a single file, decode and convert its flights '
+            'with JOBS processes (with "convert" or "upload"). Default: 1.')
+    group.add_argument('--no-cache', action='store_true',
+            default=bool(os.environ.get(NO_CACHE_VARIABLE)),
+            help='Do not read nor write decoded flights cache (with '
+            '"convert"). Default if %s environment variable is set.'
+            % NO_CACHE_VARIABLE)
+
+    # Flight store arguments.
+    group = parser.add_argument_group('Flight store '
+            '(with "import", "export" or "list" command, or "upload" '
+            'with --incremental)')
+    group.add_argument('--store', '--archive', dest='store',
+            help='Flight store directory. Each distinct flight is stored '
+            'once, whatever the upload it comes from.')
+    group.add_argument('--incremental', action='store_true',
+            help='Archive uploaded data in flight store instead of '
+            'writing a FDA file, and only convert flights that were not '
+            'archived yet (with "upload" command)')
 
     # Generated file units.
     group = parser.add_argument_group('Conversion units '
@@ -93,13 +166,18 @@ def parse_command_line():
             help='Convert altitude to feet')
 
     # Input arguments.
-    group = parser.add_argument_group('Expected input filename')
-    group.add_argument('fda_file', nargs='?', default=None,
-            help='Altimeter raw data FDA file '
-            '(with "convert" and "info" commands)')
-
-    # Extract arguments.
-    args = parser.parse_args()
+    group = parser.add_argument_group('Expected input filenames')
+    group.add_argument('fda_files', nargs='*', metavar='fda_file',
+            help='Altimeter raw data FDA files, directories or glob '
+            'patterns (with "convert", "info" and "import" commands), '
+            'or upload ids (with "export" command). With "convert", '
+            '"-" reads FDA data from standard input, and writes '
+            'converted data to standard output.')
+
+    # Extract arguments. Options may come between file arguments,
+    # where supported (Python 3.7+).
+    parse_args = getattr(parser, 'parse_intermixed_args', parser.parse_args)
+    args = parse_args()
     #print(args)  # DEBUG
 
     # Check argument coherency.
@@ -110,17 +188,49 @@ def parse_command_line():
                 % command, file=sys.stderr)
         return None
 
-    if command in ['info', 'convert']:
-        if not args.fda_file:
+    if command in ['info', 'convert', 'import', 'export']:
+        if not args.fda_files:
             print('error: Missing fda_file argument with command: %s'
                     % command, file=sys.stderr)
             return None
 
+    if command == 'cache' and args.fda_files not in [['stats'], ['clear']]:
+        print('error: Expected "stats" or "clear" argument with command: '
+                'cache', file=sys.stderr)
+        return None
+
+    if args.incremental and command != 'upload':
+        print('error: --incremental argument requires command: upload',
+                file=sys.stderr)
+        return None
+
+    if (command in ['import', 'export', 'list'] or args.incremental) \
+            and not args.store:
+        print('error: Missing --store argument with command: %s'
+                % command, file=sys.stderr)
+        return None
+
     # Make convert format default to CSV format.
     if command == 'convert':
-        if not args.csv and not args.json:
+        if not (args.csv or args.json or args.ndjson or args.binary
+                or args.binary_upload or args.sqlite):
             args.csv = True
 
+    # Standard output is given a single format.
+    if command == 'convert' and STDIO_FILE_NAME in args.fda_files:
+        if args.fda_files != [STDIO_FILE_NAME]:
+            print('error: "%s" must be the only fda_file argument.'
+                    % STDIO_FILE_NAME, file=sys.stderr)
+            return None
+        if args.binary or args.binary_upload or args.sqlite:
+            print('error: --binary, --binary-upload and --sqlite can not '
+                    'be specified with standard input.', file=sys.stderr)
+            return None
+        if args.csv + args.json + args.ndjson > 1:
+            print('error: Only one of --csv, --json and --ndjson can be '
+                    'specified with standard output.', file=sys.stderr)
+            return None
+
     # Set temperature units, defaults to celsius.
     if args.celsius and args.fahrenheit:
         print('error: --celsius and --fahrenheit can not '
@@ -150,113 +260,372 @@ def parse_command_line():
         print('error: --last argument must be positive.', file=sys.stderr)
         return None
 
+    if args.jobs < 1:
+        print('error: --jobs argument must be positive.', file=sys.stderr)
+        return None
+
     return args
 
 
-def extract_flights(fda_file,
-        length_unit=DataParser.LENGTH_UNIT_METER,
-        temp_unit=DataParser.TEMPERATURE_UNIT_CELSIUS):
+def read_flight_index(fda_file, parser, sidecar=False):
 
     print('Reading file %s...' % fda_file)
-    raw_flights = UploadedData.from_file(fda_file)
+    raw_flights = UploadedData.from_file(fda_file, mapped=True)
 
-    parser = DataParser(length_unit, temp_unit)
-    flights = parser.extract_flights(raw_flights.data)
-    print('Found %d flights:' % len(flights))
+    if sidecar:
+        # Reuse, or refresh, the index stored next to the file.
+        cache = FlightIndexCache(fda_file)
+        entries = cache.flights(raw_flights.data, parser)
+    else:
+        entries = parser.index_flights(raw_flights.data)
+    print('Found %d flights:' % len(entries))
 
-    return flights
+    return raw_flights, entries
+
+
+def extract_flights(fda_file,
+        length_unit=DataParser.LENGTH_UNIT_METER,
+        temp_unit=DataParser.TEMPERATURE_UNIT_CELSIUS,
+        jobs=1, count=0, cache=None):
+
+    # Only decode the COUNT last flights.
+    parser = DataParser(length_unit, temp_unit, workers=jobs, cache=cache)
+    raw_flights, entries = read_flight_index(fda_file, parser)
+    return raw_flights, parser.extract_flights(raw_flights.data,
+                                               entries[-count:])
 
 
 def print_file_info(fda_file):
-    flights = extract_flights(fda_file)
-    for flight in flights:
+    _, entries = read_flight_index(fda_file, DataParser(), sidecar=True)
+    for entry in entries:
         print('   %d: %8d records @ %dHz -%10.3f seconds' %
-                (flight.index, len(flight.records),
-                    flight.sampling_freq, flight.duration))
+                (entry.index, entry.record_count,
+                    entry.sampling_freq, entry.duration))
+    return sum(entry.record_count for entry in entries)
+
+
+def convert_file(fda_file, fname_prefix, args, jobs=1, batch=False):
+
+    # Tell apart files converted together.
+    if batch:
+        name = os.path.splitext(os.path.basename(fda_file))[0]
+        fname_prefix = '%s_%s' % (fname_prefix, name)
+
+    cache = None if args.no_cache else FlightCache()
+    raw_flights, flights = extract_flights(fda_file,
+            args.length_unit, args.temp_unit, jobs, args.last, cache)
+
+    source = None
+    if args.sqlite:
+        source = upload_source(raw_flights,
+                os.path.splitext(os.path.basename(fda_file))[0])
+    convert_flights(flights, fname_prefix, args, source, jobs)
+
+    # Flights are decoded, or read from cache, once converted.
+    if cache:
+        cache.save_counters()
+    return sum(flight.record_count for flight in flights)
+
+
+def process_files(args):
+
+    fda_files = find_files(args.fda_files, RAW_FILE_EXTENSION)
+    if not fda_files:
+        print('error: No FDA file found', file=sys.stderr)
+        return 1
+
+    # With several files, workers process whole files.
+    batch = len(fda_files) > 1
+    file_jobs, flight_jobs = (args.jobs, 1) if batch else (1, args.jobs)
+
+    if args.command == 'info':
+        task = print_file_info
+    else:
+        fname_prefix = args.prefix if args.prefix else default_out_filename()
+        task = partial(convert_file, fname_prefix=fname_prefix, args=args,
+                jobs=flight_jobs, batch=batch)
+
+    stats = BatchStatistics()
+    for report in run_batch(task, fda_files, file_jobs):
+        stats.add(report)
+        print(report.output, end='')
+        sys.stdout.flush()
+        if report.error is not None:
+            print('error: %s: %s' % (report.path, report.error),
+                    file=sys.stderr)
+
+    if batch:
+        print('Processed %d files (%d failed), %d records in %.3f seconds: '
+                '%.1f files/s, %.0f records/s' % (stats.files,
+                    stats.failures, stats.records, stats.elapsed,
+                    stats.files_per_second, stats.records_per_second))
+
+    return 1 if stats.failures else 0
 
 
 def default_out_filename():
     return time.strftime('%Y-%m-%d %H-%M-%S', time.localtime()) + '_flight'
 
 
-def length_unit_to_string(length_unit):
-    return {
-            DataParser.LENGTH_UNIT_METER: METER_UNIT,
-            DataParser.LENGTH_UNIT_FEET: FOOT_UNIT
-    }[length_unit]
+def flight_file_sinks(fname_prefix, args):
+    sinks = []
+    if args.csv:
+        sinks.append(CsvFileSink(fname_prefix))
+    if args.json:
+        sinks.append(JsonFileSink(fname_prefix, args.compact))
+    if args.ndjson:
+        sinks.append(NdjsonFileSink(fname_prefix))
+    if args.binary:
+        sinks.append(BinaryFileSink(fname_prefix))
+    return sinks
 
 
-def temperature_unit_to_string(temp_unit):
-    return {
-            DataParser.TEMPERATURE_UNIT_CELSIUS: CELSIUS_UNIT,
-            DataParser.TEMPERATURE_UNIT_FAHRENHEIT: FAHRENHEIT_UNIT
-    }[temp_unit]
+def convert_flight_files(flight, fname_prefix, args):
+    # Run by worker processes, with several jobs.
+    converter = FlightConverter(flight_file_sinks(fname_prefix, args))
+    try:
+        converter.convert_flight(flight)
+        converter.close()
+    except:
+        converter.abort()
+        raise
+    return flight.record_count
+
+
+class StreamConverter:
+    ''' Convert flights to a single output stream.
+
+    CSV output is a single table, with a leading flight index
+    column. JSON output is an array of flight objects. JSON Lines
+    output is the records of all flights. See CsvStreamSink,
+    JsonStreamSink and NdjsonStreamSink.
+
+    Without flight count limit, flights are converted while they
+    are received: records are written as soon as they are decoded,
+    except for compact JSON, written by whole flights.'''
+
+    def __init__(self, out, args):
+        self._out = out
+        if args.csv:
+            sink = CsvStreamSink(out, args.length_unit, args.temp_unit)
+        elif args.ndjson:
+            sink = NdjsonStreamSink(out)
+        else:
+            sink = JsonStreamSink(out, args.compact)
+        self._converter = FlightConverter([sink])
+        self._receiving = None
+
+        # Flights are only known to be the last ones at end of data.
+        self._kept = deque(maxlen=args.last) if args.last else None
+
+    def on_records(self, flight, first):
+        # Records of flight being received are decoded.
+        if self._kept is None:
+            self._begin_flight(flight)
+            self._converter.write_records(flight, first)
+
+    def on_flight(self, flight):
+        # Flight is complete.
+        if self._kept is not None:
+            self._kept.append(flight)
+        else:
+            self._begin_flight(flight)
+            self._converter.end_flight(flight)
+            self._receiving = None
+        self._out.flush()
+
+    def close(self):
+        for flight in self._kept or []:
+            self._converter.convert_flight(flight)
+        self._converter.close()
+        self._out.flush()
+
+    def _begin_flight(self, flight):
+        if flight is not self._receiving:
+            self._converter.begin_flight(flight)
+            self._receiving = flight
+
+
+def convert_stream(in_stream, out, args):
+
+    parser = DataParser(args.length_unit, args.temp_unit)
+
+    # Upload header comes first.
+    header = b''
+    while len(header) < sp.RAW_DATA_HEADER_LENGTH:
+        chunk = in_stream.read(sp.RAW_DATA_HEADER_LENGTH - len(header))
+        if not chunk:
+            break
+        header += chunk
+    parser.parse_header(header)
+
+    # Nothing is written before input is known to be valid.
+    converter = StreamConverter(out, args)
+    feeder = parser.incremental(converter.on_records, converter.on_flight)
+
+    # Then flights, converted while they are read.
+    while True:
+        chunk = in_stream.read(STDIN_READ_SIZE)
+        if not chunk:
+            break
+        feeder.feed(chunk)
+    feeder.close()
+
+    converter.close()
+
+
+def upload_source(raw_upload, name):
+    '''Return (content hash, name) of an upload.'''
+    digest = hashlib.sha1(raw_upload.header)
+    digest.update(raw_upload.data)
+    return digest.hexdigest(), name
+
+
+def convert_flights(flights, fname_prefix, args, source=None, jobs=1):
 
+    # Make last argument relevant.
+    flights = flights[-args.last:]
+
+    # Records of each flight are read once, for all formats.
+    flight_sinks = flight_file_sinks(fname_prefix, args)
+    upload_sinks = []
+    if args.binary_upload:
+        upload_sinks.append(BinaryUploadSink(fname_prefix +
+                                             BINARY_FILE_EXTENSION))
+    if args.sqlite:
+        upload_sinks.append(SqliteSink(args.sqlite, source))
+
+    # Flight files are independent: with several jobs, workers
+    # write them, while formats holding all flights are written
+    # here. Workers are given decoded flights only, without raw
+    # samples: they are smaller, and do not refer to the parser.
+    parallel = jobs > 1 and len(flights) > 1 and flight_sinks
+    converter = FlightConverter(upload_sinks if parallel
+                                else flight_sinks + upload_sinks, print)
+    try:
+        try:
+            if parallel:
+                convert_flights_parallel(converter, flights, flight_sinks,
+                        partial(convert_flight_files,
+                                fname_prefix=fname_prefix, args=args),
+                        jobs)
+            else:
+                converter.convert(flights)
+            converter.close()
+        except:
+            converter.abort()
+            raise
+    except sqlite3.Error as e:
+        raise IOError('%s: %s' % (args.sqlite, e))
+
+
+def convert_flights_parallel(converter, flights, flight_sinks, task, jobs):
+
+    # Progress of files written by workers is shown
+    # here, in flights order, as they are written.
+    for sink in flight_sinks:
+        print(sink.begin_message(flights))
+    converter.begin(flights)
+
+    reports = run_batch(task, [Flight.from_columns(flight.index,
+            flight.sampling_freq, flight.temperature_unit,
+            flight.length_unit, flight.times, flight.temperatures,
+            flight.altitudes) for flight in flights], jobs)
+    # Workers convert all flights, even after a failure:
+    # files they wrote are still reported.
+    error = None
+    for flight in flights:
+        report = next(reports)
+        if report.error is not None:
+            error = error or report.error
+            continue
+        for sink in flight_sinks:
+            print(sink.flight_message(flight))
+        if error is None:
+            converter.convert_flight(flight)
 
-def convert_to_csv(flights, out_prefix, count=0):
+    if error is not None:
+        raise IOError(error)
 
-    for flight in flights[-count:]:
 
-        fname = out_prefix + '_%3.3d' % flight.index + CSV_FILE_EXTENSION
-        print('   Writing %s file' % fname)
+def import_files(store, paths):
 
-        length_unit = length_unit_to_string(flight.length_unit)
-        temp_unit = temperature_unit_to_string(flight.temperature_unit)
+    for fda_file in find_files(paths, RAW_FILE_EXTENSION):
+        print('Importing file %s...' % fda_file)
+        upload, new_flights = store.import_file(fda_file)
+        print('   %d flights, %d new - upload %s' % (len(upload.flights),
+                len(new_flights), upload.upload_id[:12]))
 
-        with open(fname, 'w') as f:
-            f.write('time(sec),temperature(%s),altitude(%s)\n'
-                    % (temp_unit, length_unit))
-            for rec in flight.records:
-                f.write('%.3f,%d,%.1f\n' % rec)
 
+def export_uploads(store, upload_ids, prefix=None):
 
-def convert_to_json(flights, out_prefix, count=0):
+    for upload_id in upload_ids:
+        upload = store.upload(upload_id)
+        fname = (prefix + '_' + upload.upload_id[:12] if prefix
+                else upload.name or upload.upload_id) + RAW_FILE_EXTENSION
+        print('Writing upload %s to %s' % (upload.upload_id[:12], fname))
+        store.export_file(upload.upload_id, fname)
 
-    for flight in flights[-count:]:
-        fname = out_prefix + '_%3.3d' % flight.index + JSON_FILE_EXTENSION
 
-        # Prepare header.
-        length_unit = length_unit_to_string(flight.length_unit)
-        temp_unit = temperature_unit_to_string(flight.temperature_unit)
-        root = {
-                'info': {
-                    'temperature_unit': temp_unit,
-                    'length_unit': length_unit,
-                    'sampling_frequency': flight.sampling_freq
-                    },
-                'records': []
-                }
+def print_store_content(store):
 
-        # Add records.
-        for rec in flight.records:
-            root['records'].append({
-                'time': rec.time,
-                'temperature': rec.temperature,
-                'altitude': rec.altitude,
-                })
+    uploads = store.uploads()
+    print('Found %d uploads, %d distinct flights:' % (len(uploads),
+            len(store.flights())))
+    for upload in uploads:
+        print('   %s: %3d flights - %s' % (upload.upload_id[:12],
+                len(upload.flights), upload.name))
 
-        # Write to file.
-        print('   Writing %s file' % fname)
-        with open(fname, 'w') as f:
-            f.write(json.dumps(root, indent=2, separators=(',', ': ')))
 
+def new_flight_indexes(store, raw_data):
 
-def convert_flights(flights, fname_prefix, args):
+    # Flight indexes follow upload order.
+    return set(index for index, key
+               in enumerate(store.flight_hashes(raw_data.data))
+               if not store.has_flight(key))
 
-    # Make last argument relevant.
-    if args.last == 0:
-        flight_count = len(flights)
-    else:
-        flight_count = args.last
 
-    # Convert to required formats.
-    if args.csv:
-        print('Converting %d flight(s) to CSV...' % flight_count)
-        convert_to_csv(flights, fname_prefix, args.last)
+def archive_upload(store, raw_data, name):
 
-    if args.json:
-        print('Converting %d flight(s) to JSON...' % flight_count)
-        convert_to_json(flights, fname_prefix, args.last)
+    print('Archiving uploaded data to', store.path)
+    upload, new_flights = store.import_data(raw_data.data, name)
+    print('   %d flights, %d new - upload %s' % (len(upload.flights),
+            len(new_flights), upload.upload_id[:12]))
+
+
+def process_store(args):
+
+    store = FlightStore(args.store)
+    try:
+        if args.command == 'import':
+            import_files(store, args.fda_files)
+        elif args.command == 'export':
+            export_uploads(store, args.fda_files, args.prefix)
+        else:
+            print_store_content(store)
+    except (EnvironmentError, ValueError, FlyDreamAltimeterException) as e:
+        print('error: %s' % e, file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def process_cache(action):
+
+    cache = FlightCache()
+    if action == 'clear':
+        print('Clearing cache %s...' % cache.path)
+        cache.clear()
+        return 0
+
+    stats = cache.stats()
+    print('Cache %s:' % stats.path)
+    print('   %d flights, %d bytes used out of %d (%.1f%%)' % (stats.entries,
+            stats.size, stats.max_size, 100.0 * stats.size / stats.max_size))
+    lookups = stats.hits + stats.misses
+    print('   %d hits, %d misses (%.1f%% hit rate)' % (stats.hits,
+            stats.misses, 100.0 * stats.hits / lookups if lookups else 0.0))
+    return 0
 
 
 def print_disconnection_warning(message):
@@ -274,18 +643,27 @@ def main(argv):
 
     command = args.command
 
-    # Give information about given file.
-    if command == 'info':
-        print_file_info(args.fda_file)
+    # Convert standard input to standard output.
+    if command == 'convert' and args.fda_files == [STDIO_FILE_NAME]:
+        try:
+            convert_stream(getattr(sys.stdin, 'buffer', sys.stdin),
+                    sys.stdout, args)
+        except FlyDreamAltimeterException as e:
+            print('error: %s' % e, file=sys.stderr)
+            return 1
         return 0
 
-    # Convert raw uploaded data.
-    if command == 'convert':
-        fname_prefix = args.prefix if args.prefix else default_out_filename()
-        flights = extract_flights(args.fda_file,
-                args.length_unit, args.temp_unit)
-        convert_flights(flights, fname_prefix, args)
-        return 0
+    # Give information about given files, or convert them.
+    if command in ['info', 'convert']:
+        return process_files(args)
+
+    # Manage flight store.
+    if command in ['import', 'export', 'list']:
+        return process_store(args)
+
+    # Manage decoded flights cache.
+    if command == 'cache':
+        return process_cache(args.fda_files[0])
 
     # Remaining command requires a connected altimeter.
     altimeter = Altimeter(args.port)
@@ -313,23 +691,55 @@ def main(argv):
                 else:
                     print('Read %d bytes from altimeter' % total)
 
-            # Get data from device.
+            # Raw data is written while it is received,
+            # unless only flights not archived yet are kept.
+            fname_prefix = args.prefix if args.prefix \
+                    else default_out_filename()
+            sink = None
+            if not args.incremental:
+                fname = fname_prefix + RAW_FILE_EXTENSION
+                print('Writing uploaded data to', fname)
+                try:
+                    sink = UploadSink(fname)
+                except OSError as e:
+                    # Partial files of failed uploads are kept.
+                    print('error: %s' % e, file=sys.stderr)
+                    return 1
+
+            # Get data from device, decoding flights meanwhile.
             print_disconnection_warning('Reading data')
-            raw_data = altimeter.upload(progression)
+            parser = DataParser(args.length_unit, args.temp_unit)
+            feeder = parser.incremental()
+            raw_data = altimeter.upload(progression, feeder, sink)
             if len(raw_data.data) == 0:
                 print('   Altimeter does not contain any data')
 
-            # Write raw data.
-            fname_prefix = args.prefix if args.prefix \
-                    else default_out_filename()
-            fname = fname_prefix + RAW_FILE_EXTENSION
-            print('Writing uploaded data to', fname)
-            raw_data.to_file(fname)
+            # Decoding errors are raised once all data is received:
+            # uploaded data is then kept as is.
+            try:
+                flights = feeder.close()
+            except FlyDreamAltimeterProtocolError as e:
+                if sink is None:
+                    fname = fname_prefix + RAW_FILE_EXTENSION
+                    print('Writing uploaded data to', fname)
+                    raw_data.to_file(fname)
+                print('error: %s' % e, file=sys.stderr)
+                return 1
 
             # Honor conversion requests.
-            parser = DataParser(args.length_unit, args.temp_unit)
-            flights = parser.extract_flights(raw_data.data)
-            convert_flights(flights, fname_prefix, args)
+            if args.incremental:
+                store = FlightStore(args.store)
+                new_flights = new_flight_indexes(store, raw_data)
+                flights = [flight for flight in flights
+                           if flight.index in new_flights]
+            source = upload_source(raw_data, fname_prefix) \
+                    if args.sqlite else None
+            convert_flights(flights, fname_prefix, args, source, args.jobs)
+
+            # Flights are archived once converted: flights of
+            # failed conversions are still new to next uploads.
+            if args.incremental:
+                archive_upload(store, raw_data, fname_prefix)
 
     except FlyDreamAltimeterSerialPortError as e:
         print('''\nerror: %s
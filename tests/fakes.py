@@ -0,0 +1,24 @@
+from array import array
+
+from flydream.dataparser import DataParser
+
+
+class CountingDataParser(DataParser):
+    ''' DataParser counting decoded record chunks.'''
+
+    def __init__(self, *args, **kwargs):
+        DataParser.__init__(self, *args, **kwargs)
+        self.decoded = 0
+
+    def _decode_samples(self, data):
+        self.decoded += 1
+        return DataParser._decode_samples(self, data)
+
+
+class ArrayFlight:
+    ''' Flight records only, as given columns.'''
+
+    def __init__(self, times, temperatures, altitudes, temperature_type='b'):
+        self.times = array('d', times)
+        self.temperatures = array(temperature_type, temperatures)
+        self.altitudes = array('d', altitudes)
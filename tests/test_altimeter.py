@@ -2,7 +2,12 @@
 
 import unittest
 
+import os
+import shutil
+import tempfile
+
 from flydream.altimeter import Altimeter
+from flydream.uploadeddata import UploadSink
 
 from flydream.exception import FlyDreamAltimeterSerialPortError
 
@@ -23,10 +28,18 @@ class SerialDevice_TestHelper:
     def setup(self, sampling_freq):
         pass
 
-    def upload(self, callback=None):
+    def upload(self, callback=None, feeder=None, sink=None):
         pass
 
 
+class UnpluggedSerialDevice_TestHelper(SerialDevice_TestHelper):
+
+    @contextmanager
+    def opened(self):
+        raise FlyDreamAltimeterSerialPortError('Port can not be opened')
+        yield self
+
+
 class Altimeter_TestHelper(Altimeter):
 
     def __init__(self):
@@ -87,6 +100,22 @@ class TestFlyDreamDevice(unittest.TestCase):
         self._altimeter.upload(None)
         self._altimeter.upload(lambda x: x)
 
+    def test_upload_unplugged(self):
+        self._altimeter._device = UnpluggedSerialDevice_TestHelper()
+
+        directory = tempfile.mkdtemp(prefix='flydream_tests')
+        try:
+            fname = os.path.join(directory, 'upload.fda')
+            sink = UploadSink(fname)
+            with self.assertRaises(FlyDreamAltimeterSerialPortError):
+                self._altimeter.upload(sink=sink)
+
+            self.assertTrue(sink._file.closed, 'File should be closed')
+            self.assertEqual([], os.listdir(directory),
+                    'No file should be left')
+        finally:
+            shutil.rmtree(directory)
+
     def test_clear(self):
         # Just running after coverage rate...
         self.assertTrue(self._altimeter.clear(), 'Incorrect return value')
@@ -0,0 +1,94 @@
+#!/usr/bin/python
+
+from __future__ import print_function
+
+import unittest
+
+import os
+import shutil
+import tempfile
+
+from flydream.batch import find_files, run_batch, BatchStatistics
+from flydream.exception import FlyDreamAltimeterProtocolError
+
+
+def count_name_length(path):
+    print('Processing', os.path.basename(path))
+    if path.endswith('bad.fda'):
+        raise FlyDreamAltimeterProtocolError('Invalid data')
+    return len(os.path.basename(path))
+
+
+class TestFlyDreamBatch(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp(prefix='flydream_tests')
+        for name in ['b.fda', 'a.FDA', 'notes.txt',
+                os.path.join('sub', 'c.fda')]:
+            path = os.path.join(self._dir, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            open(path, 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _path(self, *names):
+        return os.path.join(self._dir, *names)
+
+    def test_find_files_in_directory(self):
+        result = find_files([self._dir], '.fda')
+        expected = [self._path('a.FDA'), self._path('b.fda'),
+                    self._path('sub', 'c.fda')]
+        self.assertEqual(expected, result, 'Incorrect files')
+
+    def test_find_files_glob(self):
+        result = find_files([self._path('*.fda'), self._path('*.txt')],
+                '.fda')
+        expected = [self._path('b.fda'), self._path('notes.txt')]
+        self.assertEqual(expected, result, 'Incorrect files')
+
+    def test_find_files_keeps_order_without_duplicates(self):
+        missing = self._path('missing.fda')
+        result = find_files([self._path('b.fda'), missing, self._dir],
+                '.fda')
+        expected = [self._path('b.fda'), missing, self._path('a.FDA'),
+                    self._path('sub', 'c.fda')]
+        self.assertEqual(expected, result, 'Incorrect files')
+
+    def test_run_batch(self):
+        self._check_run_batch(1)
+
+    def test_run_batch_workers(self):
+        self._check_run_batch(2)
+
+    def _check_run_batch(self, jobs):
+        paths = ['one.fda', 'bad.fda', 'three.fda']
+        reports = list(run_batch(count_name_length, paths, jobs))
+
+        self.assertEqual(paths, [report.path for report in reports],
+                'Incorrect report order')
+        self.assertEqual([7, 0, 9], [report.records for report in reports],
+                'Incorrect record counts')
+        self.assertEqual('Processing three.fda\n', reports[2].output,
+                'Incorrect report output')
+        self.assertEqual(None, reports[0].error, 'Unexpected error')
+        self.assertEqual('Invalid data', reports[1].error, 'Missing error')
+
+    def test_statistics(self):
+        now = [10.0]
+        stats = BatchStatistics(lambda: now[0])
+        for report in run_batch(count_name_length, ['one.fda', 'bad.fda']):
+            stats.add(report)
+        now[0] = 12.0
+
+        self.assertEqual(2, stats.files, 'Incorrect file count')
+        self.assertEqual(1, stats.failures, 'Incorrect failure count')
+        self.assertEqual(7, stats.records, 'Incorrect record count')
+        self.assertEqual(1.0, stats.files_per_second, 'Incorrect file rate')
+        self.assertEqual(3.5, stats.records_per_second,
+                'Incorrect record rate')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/python
+
+import unittest
+
+import os
+import shutil
+import tempfile
+
+from array import array
+
+from flydream.uploadeddata import UploadedData
+from flydream.dataparser import DataParser
+from flydream.columnfile import ColumnFile, ColumnFlight, numpy
+
+SAMPLE_FILE = 'tests/test_freq_2_then_1_then_8_then_4.fda'
+
+
+class TestFlyDreamColumnFile(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp(prefix='flydream_tests')
+        self._path = os.path.join(self._dir, 'flights.fdb')
+
+        raw_upload = UploadedData.from_file(SAMPLE_FILE)
+        self._flights = []
+        for length_unit, temp_unit in [
+                (DataParser.LENGTH_UNIT_METER,
+                 DataParser.TEMPERATURE_UNIT_CELSIUS),
+                (DataParser.LENGTH_UNIT_FEET,
+                 DataParser.TEMPERATURE_UNIT_FAHRENHEIT)]:
+            parser = DataParser(length_unit, temp_unit)
+            self._flights.extend(ColumnFlight(
+                    [('flight', flight.index), ('length_unit', length_unit),
+                     ('sampling_frequency', flight.sampling_freq)],
+                    (flight.times, flight.temperatures, flight.altitudes))
+                for flight in parser.extract_flights(raw_upload.data))
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_write_read(self):
+        ColumnFile(self._flights).to_file(self._path)
+        result = ColumnFile.from_file(self._path).flights
+
+        self.assertEqual(len(self._flights), len(result),
+                'Incorrect flight count')
+        for expected, flight in zip(self._flights, result):
+            self.assertEqual(expected.info, flight.info, 'Incorrect info')
+            self.assertEqual(expected.index, flight.index,
+                    'Incorrect index')
+            self.assertEqual(expected.sampling_freq, flight.sampling_freq,
+                    'Incorrect sampling frequency')
+            for name in ColumnFlight.COLUMNS:
+                self.assertEqual(expected.column(name), flight.column(name),
+                        'Incorrect %s column' % name)
+                self.assertEqual(expected.column(name).typecode,
+                        flight.column(name).typecode,
+                        'Incorrect %s column type' % name)
+
+    def test_empty_columns(self):
+        empty = ColumnFlight([('flight', 0)],
+                (array('d'), array('b'), array('d')))
+        ColumnFile([empty]).to_file(self._path)
+
+        flight = ColumnFile.from_file(self._path).flights[0]
+        self.assertEqual(0, len(flight.times), 'Unexpected times')
+        self.assertEqual(array('b'), flight.temperatures,
+                'Unexpected temperatures')
+
+    def test_not_a_column_file(self):
+        for content in [b'', b'FDA' * 10]:
+            with open(self._path, 'wb') as f:
+                f.write(content)
+            self.assertRaises(ValueError, ColumnFile.from_file, self._path)
+
+    @unittest.skipUnless(numpy, 'NumPy is not installed')
+    def test_numpy_columns(self):
+        ColumnFile(self._flights).to_file(self._path)
+        result = ColumnFile.from_file(self._path).flights
+
+        for expected, flight in zip(self._flights, result):
+            for name in ColumnFlight.COLUMNS:
+                column = flight.numpy_column(name)
+                self.assertEqual(list(expected.column(name)),
+                        column.tolist(), 'Incorrect %s column' % name)
+                self.assertFalse(column.flags.owndata,
+                        'Unexpected %s column copy' % name)
+                self.assertEqual(0, column.ctypes.data %
+                        ColumnFile.ALIGNMENT,
+                        'Unaligned %s column' % name)
+
+
+if __name__ == '__main__':
+    unittest.main()
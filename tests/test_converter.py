@@ -0,0 +1,141 @@
+#!/usr/bin/python
+
+import unittest
+
+import flydream.flight
+
+from flydream.uploadeddata import UploadedData
+from flydream.dataparser import DataParser
+from flydream.converter import RecordSink, FlightConverter
+
+SAMPLE_FILE = 'tests/test_freq_2_then_1_then_8_then_4.fda'
+
+
+class RecordingSink(RecordSink):
+
+    def __init__(self):
+        self.calls = []
+        self.records = {}
+
+    def begin_flight(self, flight):
+        self.calls.append(('begin', flight.index))
+        self.records[flight.index] = []
+
+    def write_records(self, flight, times, temperatures, altitudes):
+        self.calls.append(('records', flight.index))
+        self.records[flight.index].extend(zip(times, temperatures,
+                                              altitudes))
+
+    def end_flight(self, flight):
+        self.calls.append(('end', flight.index))
+
+    def close(self):
+        self.calls.append(('close',))
+
+    def abort(self):
+        self.calls.append(('abort',))
+
+    def begin_message(self, flights):
+        return 'begin %d' % len(flights)
+
+    def flight_message(self, flight):
+        return 'flight %d' % flight.index
+
+    def close_message(self):
+        return 'close'
+
+
+class FailingSink(RecordSink):
+
+    def end_flight(self, flight):
+        if flight.index == 1:
+            raise IOError('Disk full')
+
+
+class TestFlyDreamFlightConverter(unittest.TestCase):
+
+    def setUp(self):
+        raw_upload = UploadedData.from_file(SAMPLE_FILE)
+        self._flights = DataParser().extract_flights(raw_upload.data)
+
+    def test_convert(self):
+        sinks = [RecordingSink(), RecordingSink()]
+        converter = FlightConverter(sinks)
+        block_size = flydream.flight.BLOCK_SIZE
+        flydream.flight.BLOCK_SIZE = 100
+        try:
+            converter.convert(self._flights)
+            converter.close()
+        finally:
+            flydream.flight.BLOCK_SIZE = block_size
+
+        for sink in sinks:
+            for flight in self._flights:
+                self.assertEqual(list(zip(flight.times, flight.temperatures,
+                                          flight.altitudes)),
+                        sink.records[flight.index], 'Incorrect records')
+                self.assertEqual(-(-flight.record_count // 100),
+                        sink.calls.count(('records', flight.index)),
+                        'Incorrect block count')
+            self.assertEqual(('close',), sink.calls[-1], 'Sink not closed')
+        self.assertEqual(sinks[0].calls, sinks[1].calls,
+                'Sinks given different records')
+
+    def test_calls_order(self):
+        sink = RecordingSink()
+        converter = FlightConverter([sink])
+        converter.convert(self._flights[:2])
+        converter.close()
+
+        expected = []
+        for flight in self._flights[:2]:
+            expected.append(('begin', flight.index))
+            if flight.record_count:
+                expected.append(('records', flight.index))
+            expected.append(('end', flight.index))
+        expected.append(('close',))
+        self.assertEqual(expected, sink.calls, 'Incorrect calls')
+
+    def test_default_sink(self):
+        messages = []
+        converter = FlightConverter([RecordSink()], messages.append)
+        converter.convert(self._flights)
+        converter.close()
+        converter.abort()
+        self.assertEqual([], messages, 'Unexpected messages')
+
+    def test_progress(self):
+        messages = []
+        converter = FlightConverter([RecordingSink(), RecordingSink()],
+                                    messages.append)
+        converter.convert(self._flights[:2])
+        self.assertEqual(['begin 2', 'begin 2', 'flight 0', 'flight 0',
+                          'flight 1', 'flight 1'], messages,
+                'Incorrect progress messages')
+        converter.close()
+        self.assertEqual(['close', 'close'], messages[6:],
+                'Incorrect close messages')
+
+    def test_abort(self):
+        messages = []
+        sink = RecordingSink()
+        converter = FlightConverter([sink, FailingSink()], messages.append)
+        try:
+            converter.convert(self._flights[:3])
+            converter.close()
+        except IOError:
+            converter.abort()
+        else:
+            self.fail('Conversion did not fail')
+
+        self.assertEqual(('abort',), sink.calls[-1], 'Sink not aborted')
+        self.assertFalse(('close',) in sink.calls, 'Sink closed')
+        self.assertFalse(('begin', 2) in sink.calls,
+                'Conversion not stopped')
+        # Nothing reported for the failed flight.
+        self.assertEqual(['begin 3', 'flight 0'], messages,
+                'Incorrect progress messages')
+
+
+if __name__ == '__main__':
+    unittest.main()
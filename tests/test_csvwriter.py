@@ -0,0 +1,90 @@
+#!/usr/bin/python
+
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import flydream.flight
+
+from flydream.uploadeddata import UploadedData
+from flydream.dataparser import DataParser
+from flydream.csvwriter import CsvWriter
+
+from tests.fakes import ArrayFlight
+
+SAMPLE_FILE = 'tests/test_freq_2_then_1_then_8_then_4.fda'
+
+
+def reference_lines(flight, start=0, prefix=''):
+    return ''.join(prefix + '%.3f,%d,%.1f\n' % record
+            for record in list(zip(flight.times, flight.temperatures,
+                                   flight.altitudes))[start:])
+
+
+def write(flight, **kwargs):
+    out = StringIO()
+    CsvWriter(out).write_records(flight, **kwargs)
+    return out.getvalue()
+
+
+class TestFlyDreamCsvWriter(unittest.TestCase):
+
+    def setUp(self):
+        raw_upload = UploadedData.from_file(SAMPLE_FILE)
+        self._flights = []
+        for temp_unit in (DataParser.TEMPERATURE_UNIT_CELSIUS,
+                          DataParser.TEMPERATURE_UNIT_FAHRENHEIT):
+            parser = DataParser(DataParser.LENGTH_UNIT_FEET, temp_unit)
+            self._flights.extend(parser.extract_flights(raw_upload.data))
+
+    def _check(self, flight, **kwargs):
+        self.assertEqual(reference_lines(flight, **kwargs),
+                write(flight, **kwargs), 'Incorrect lines')
+
+    def test_flights(self):
+        for flight in self._flights:
+            self._check(flight)
+
+    def test_start_and_prefix(self):
+        for flight in self._flights:
+            self._check(flight, start=5, prefix='3,')
+
+    def test_several_blocks(self):
+        flight = self._flights[2]
+        writer = CsvWriter(StringIO())
+        block_size = flydream.flight.BLOCK_SIZE
+        flydream.flight.BLOCK_SIZE = 7
+        try:
+            writer.write_records(flight, start=3)
+        finally:
+            flydream.flight.BLOCK_SIZE = block_size
+        self.assertEqual(reference_lines(flight, start=3),
+                writer._out.getvalue(), 'Incorrect lines')
+
+    def test_empty_flight(self):
+        flight = ArrayFlight([], [], [])
+        self.assertEqual('', write(flight), 'Unexpected lines')
+
+    def test_signs(self):
+        self._check(ArrayFlight([0.0, 0.5, 1.0, 12.125], [-12, 0, 7, -128],
+                                [-0.0, -0.4, 0.0, -123.4]))
+
+    def test_truncated_temperatures(self):
+        self._check(ArrayFlight([0.0, 0.25, 0.5], [-1.9, 77.0, 99.99],
+                                [1.0, 2.0, 3.0], 'd'))
+
+    def test_inexact_values(self):
+        self._check(ArrayFlight([0.1 + 0.2, 1.0005, 2.0], [20, 21, 22],
+                                [0.05, 0.15, 1e20]))
+
+    def test_large_values(self):
+        self._check(ArrayFlight([0.0, 0.5], [20, 21], [1e20, 1e20]))
+        self._check(ArrayFlight([1e17, -1e17], [1e19, -1e19],
+                                [-1e20, 2.0 ** 53], 'd'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,12 @@ from flydream.uploadeddata import UploadedData
 from flydream.exception import FlyDreamAltimeterProtocolError
 from flydream import serialprotocol as sp
 
-from flydream.dataparser import DataParser, RawFlight
+from flydream.dataparser import DataParser, RawFlight, ElevationCache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class TestFlyDreamDataParser(unittest.TestCase):
@@ -101,6 +106,28 @@ class TestFlyDreamDataParser(unittest.TestCase):
         self.assertTrue(len(second.data) > 0, 'Empty data')
         self.assertEqual(32, len(second.data), 'Incorrect data length')
 
+    def test_raw_split_raw_flight_matches_split(self):
+        sample = UploadedData.from_file(
+                'tests/test_freq_2_then_1_then_8_then_4.fda').data
+        result = self._parser._split_raw_flight(sample)
+
+        chunks = [chunk for chunk in sample.split(sp.RAW_FLIGHTS_SEPARATOR)
+                  if len(chunk) > 0]
+        self.assertEqual(len(chunks), len(result), 'Incorrect flight count')
+        for chunk, flight in zip(chunks, result):
+            self.assertEqual(chunk[1:2], flight.sampling_rate)
+            self.assertEqual(chunk[2:], flight.data.tobytes())
+
+    def test_raw_split_raw_flight_no_copy(self):
+        sample = UploadedData.from_file(
+                'tests/test_flydreamaltimeter_sample_2_flights.fda').data
+        first, second = self._parser._split_raw_flight(sample)
+
+        self.assertTrue(isinstance(first.data, memoryview),
+                'Flight data should be a view on uploaded data')
+        self.assertTrue(isinstance(second.data, memoryview),
+                'Flight data should be a view on uploaded data')
+
     def test_convert_raw_flight_empty(self):
         flight = RawFlight(b'\x00', b'')
         result = self._parser._convert_raw_flight(flight,
@@ -319,6 +346,373 @@ class TestFlyDreamDataParser(unittest.TestCase):
         self.assertEqual(44.0, fourth.duration, 'Incorrect duration')
         self.assertEqual(176, len(fourth.records), 'Incorrect data length')
 
+    @unittest.skipUnless(numpy, 'NumPy is not installed')
+    def test_numpy_decoding_matches_record_decoding(self):
+        sample = UploadedData.from_file(
+                'tests/test_freq_2_then_1_then_8_then_4.fda')
+        units = [(length_unit, temp_unit)
+                for length_unit in (DataParser.LENGTH_UNIT_METER,
+                                    DataParser.LENGTH_UNIT_FEET)
+                for temp_unit in (DataParser.TEMPERATURE_UNIT_CELSIUS,
+                                  DataParser.TEMPERATURE_UNIT_FAHRENHEIT)]
+
+        for length_unit, temp_unit in units:
+            vectorized = DataParser(length_unit, temp_unit, use_numpy=True)
+            scalar = DataParser(length_unit, temp_unit, use_numpy=False)
+            self.assertEqual(scalar.extract_flights(sample.data),
+                    vectorized.extract_flights(sample.data),
+                    'NumPy decoding differs from record decoding')
+
+    def test_negative_temperature(self):
+        # -3 celsius degrees at 101325 Pa (zero elevation).
+        flight = RawFlight(b'\x00', b'\xFD\x01\x8B\xCD')
+        result = self._parser._convert_raw_flight(flight,
+                0,
+                DataParser.LENGTH_UNIT_METER,
+                DataParser.TEMPERATURE_UNIT_CELSIUS)
+
+        seconds, celcius, meters = result.records[0]
+        self.assertEqual(-3, celcius, 'Invalid record temperature')
+        self.assertEqual(0.0, meters, 'Invalid record height')
+
+    def test_extract_flight_does_not_decode(self):
+        sample = UploadedData.from_file(
+                'tests/test_freq_2_then_1_then_8_then_4.fda')
+        result = self._parser.extract_flights(sample.data)
+
+        self.assertEqual([216, 136, 496, 176],
+                [flight.record_count for flight in result],
+                'Incorrect record counts')
+        self.assertFalse(any(flight.decoded for flight in result),
+                'Records should not be decoded')
+
+    def test_incremental_matches_extract_flights(self):
+        sample = UploadedData.from_file(
+                'tests/test_freq_2_then_1_then_8_then_4.fda').data
+        expected = self._parser.extract_flights(sample)
+
+        # Chunks split records and separators anywhere.
+        for chunk_size in (1, 3, 7, 31, 1000, len(sample)):
+            feeder = self._parser.incremental()
+            completed = []
+            for start in range(0, len(sample), chunk_size):
+                completed += feeder.feed(sample[start:start + chunk_size])
+
+            # Last flight is only complete once all data is fed.
+            self.assertEqual(expected[:-1], completed,
+                    'Incorrect completed flights')
+            self.assertEqual(expected, feeder.close(),
+                    'Incorrect flights with %d bytes chunks' % chunk_size)
+
+    def test_incremental_on_records(self):
+        sample = UploadedData.from_file(
+                'tests/test_flydreamaltimeter_sample_2_flights.fda').data
+        received = []
+
+        def on_records(flight, first):
+            received.append((flight.index, first, flight.record_count))
+
+        feeder = self._parser.incremental(on_records)
+        for start in range(0, len(sample), 1000):
+            feeder.feed(sample[start:start + 1000])
+        feeder.close()
+
+        # First flight records are split by chunk boundaries.
+        self.assertEqual([(0, 0, 242), (0, 242, 440), (1, 0, 8)], received,
+                'Incorrect decoded records notifications')
+
+    def test_incremental_on_flight(self):
+        sample = UploadedData.from_file(
+                'tests/test_flydreamaltimeter_sample_2_flights.fda').data
+        received = []
+
+        def on_records(flight, first):
+            received.append(('records', flight.index))
+
+        def on_flight(flight):
+            received.append(('flight', flight.index))
+
+        # Both flights are in a single chunk.
+        feeder = self._parser.incremental(on_records, on_flight)
+        feeder.feed(sample)
+        feeder.close()
+
+        self.assertEqual([('records', 0), ('flight', 0), ('records', 1),
+                          ('flight', 1)], received,
+                'Incorrect flight notifications')
+
+    def test_incremental_wrong_length(self):
+        feeder = self._parser.incremental()
+        feeder.feed(sp.RAW_FLIGHTS_SEPARATOR + b'\x03\x03' + b'\x19' * 7)
+        with self.assertRaises(FlyDreamAltimeterProtocolError):
+            feeder.close()
+
+    def test_incremental_wrong_rate(self):
+        feeder = self._parser.incremental()
+        with self.assertRaises(FlyDreamAltimeterProtocolError):
+            feeder.feed(sp.RAW_FLIGHTS_SEPARATOR + b'\x03\x77')
+
+        # Parser is stopped.
+        with self.assertRaises(FlyDreamAltimeterProtocolError):
+            feeder.feed(b'\x00\x86\xa0\x19' * 3)
+        with self.assertRaises(FlyDreamAltimeterProtocolError):
+            feeder.close()
+
+    def test_elevation_cache_hits(self):
+        sample = UploadedData.from_file(
+                'tests/test_flydreamaltimeter_sample_1_flight.fda').data
+        parser = DataParser(use_numpy=False)
+        flight, = parser.extract_flights(sample)
+        flight.altitudes  # Decode records.
+
+        cache = parser.elevation_cache
+        self.assertEqual(440, cache.hits + cache.misses,
+                'Incorrect conversion count')
+        self.assertTrue(cache.misses < 100, 'Too many cache misses')
+
+        # Same flight again: every value is known.
+        misses = cache.misses
+        flight, = parser.extract_flights(sample)
+        flight.altitudes  # Decode records.
+        self.assertEqual(misses, cache.misses, 'Incorrect cache misses')
+
+    def test_elevation_cache_values(self):
+        cache = ElevationCache(self._parser._to_elevation)
+        pressures = [101325, 100000, 101325, 90000, 100000]
+        result = cache.convert(pressures,
+                DataParser.PRESSURE_REFERENCE,
+                DataParser.LENGTH_UNIT_FEET)
+
+        expected = [self._parser._to_elevation(pressure,
+                        DataParser.PRESSURE_REFERENCE,
+                        DataParser.LENGTH_UNIT_FEET)
+                    for pressure in pressures]
+        self.assertEqual(expected, result, 'Incorrect elevations')
+        self.assertEqual(3, cache.misses, 'Incorrect cache misses')
+        self.assertEqual(2, cache.hits, 'Incorrect cache hits')
+
+        # Unit is part of the key.
+        cache.convert([101325], DataParser.PRESSURE_REFERENCE,
+                DataParser.LENGTH_UNIT_METER)
+        self.assertEqual(4, cache.misses, 'Incorrect cache misses')
+
+    def test_elevation_cache_eviction(self):
+        cache = ElevationCache(self._parser._to_elevation, size=2)
+        reference = DataParser.PRESSURE_REFERENCE
+        unit = DataParser.LENGTH_UNIT_METER
+
+        cache.convert([100000, 100001, 100002], reference, unit)
+        self.assertEqual(2, len(cache), 'Incorrect cache size')
+
+        cache.clear()
+        self.assertEqual(0, len(cache), 'Incorrect cache size')
+        self.assertEqual(0, cache.misses, 'Incorrect cache misses')
+
+    def test_elevation_cache_least_recently_used(self):
+        cache = ElevationCache(self._parser._to_elevation, size=2)
+        reference = DataParser.PRESSURE_REFERENCE
+        unit = DataParser.LENGTH_UNIT_METER
+
+        cache.convert([100000], reference, unit)
+        cache.convert([100001], reference, unit)
+        cache.convert([100000], reference, unit)
+        cache.convert([100002], reference, unit)
+        self.assertEqual(1, cache.hits, 'Incorrect cache hits')
+
+        # 100001 was evicted, not 100000, used again before.
+        cache.convert([100000], reference, unit)
+        self.assertEqual(2, cache.hits, 'Incorrect cache hits')
+        cache.convert([100001], reference, unit)
+        self.assertEqual(4, cache.misses, 'Incorrect cache misses')
+
+    def test_elevation_cache_size(self):
+        with self.assertRaises(ValueError):
+            ElevationCache(self._parser._to_elevation, size=0)
+
+        cache = ElevationCache(self._parser._to_elevation, size=1)
+        cache.convert([100000, 100001], DataParser.PRESSURE_REFERENCE,
+                      DataParser.LENGTH_UNIT_METER)
+        self.assertEqual(1, len(cache), 'Incorrect cache size')
+
+    def test_flight_samples(self):
+        # -3 celsius degrees at 101325 Pa, then 25 degrees at 100000 Pa.
+        flight = RawFlight(b'\x03', b'\xFD\x01\x8B\xCD\x19\x01\x86\xA0')
+        result = self._parser._convert_raw_flight(flight,
+                0,
+                DataParser.LENGTH_UNIT_METER,
+                DataParser.TEMPERATURE_UNIT_CELSIUS)
+
+        self.assertEqual([101325, 100000], list(result.samples.pressures),
+                'Incorrect raw pressures')
+        self.assertEqual([-3, 25], list(result.samples.temperatures),
+                'Incorrect raw temperatures')
+
+    def test_flight_with_units(self):
+        sample = UploadedData.from_file(
+                'tests/test_freq_2_then_1_then_8_then_4.fda').data
+        flights = self._parser.extract_flights(sample)
+
+        parser = DataParser(DataParser.LENGTH_UNIT_FEET,
+                DataParser.TEMPERATURE_UNIT_FAHRENHEIT)
+        expected = parser.extract_flights(sample)
+
+        result = [flight.with_units(DataParser.LENGTH_UNIT_FEET,
+                                    DataParser.TEMPERATURE_UNIT_FAHRENHEIT)
+                  for flight in flights]
+        self.assertEqual(expected, result, 'Incorrect unit projection')
+
+        # Projections are kept.
+        again = flights[0].with_units(DataParser.LENGTH_UNIT_FEET,
+                DataParser.TEMPERATURE_UNIT_FAHRENHEIT)
+        self.assertTrue(again.altitudes is result[0].altitudes,
+                'Projection should not be computed again')
+
+    def test_flight_with_pressure_reference(self):
+        sample = UploadedData.from_file(
+                'tests/test_flydreamaltimeter_sample_1_flight.fda').data
+        flight, = self._parser.extract_flights(sample)
+
+        # Ground level pressure as reference.
+        reference = flight.samples.pressures[0]
+        result = flight.with_units(pressure_reference=reference)
+
+        self.assertEqual(reference, result.pressure_reference,
+                'Incorrect pressure reference')
+        self.assertEqual(0.0, result.altitudes[0], 'Incorrect altitude')
+        self.assertEqual(flight.length_unit, result.length_unit,
+                'Incorrect length unit')
+
+    def test_incremental_with_units(self):
+        sample = UploadedData.from_file(
+                'tests/test_flydreamaltimeter_sample_2_flights.fda').data
+        feeder = self._parser.incremental()
+        for start in range(0, len(sample), 100):
+            feeder.feed(sample[start:start + 100])
+        flights = feeder.close()
+
+        parser = DataParser(DataParser.LENGTH_UNIT_FEET)
+        self.assertEqual(parser.extract_flights(sample),
+                [flight.with_units(DataParser.LENGTH_UNIT_FEET)
+                 for flight in flights],
+                'Incorrect unit projection')
+
+    def test_extract_flights_workers(self):
+        sample = UploadedData.from_file(
+                'tests/test_freq_2_then_1_then_8_then_4.fda').data
+        parser = DataParser(DataParser.LENGTH_UNIT_FEET,
+                DataParser.TEMPERATURE_UNIT_FAHRENHEIT)
+        expected = parser.extract_flights(sample)
+
+        parser.workers = 2
+        result = parser.extract_flights(sample)
+
+        self.assertTrue(all(flight.samples._data is None
+                            for flight in result),
+                'Records should be decoded by workers')
+        self.assertEqual(expected, result, 'Incorrect flights')
+        self.assertEqual([0, 1, 2, 3], [flight.index for flight in result],
+                'Incorrect flights order')
+
+    def test_index_flights(self):
+        sample = UploadedData.from_file(
+                'tests/test_freq_2_then_1_then_8_then_4.fda').data
+        result = self._parser.index_flights(sample)
+
+        self.assertEqual(4, len(result), 'Incorrect flight count')
+        self.assertEqual([0, 1, 2, 3], [entry.index for entry in result],
+                'Incorrect indexes')
+        self.assertEqual([2, 1, 8, 4],
+                [entry.sampling_freq for entry in result],
+                'Incorrect frequencies')
+        self.assertEqual([216, 136, 496, 176],
+                [entry.record_count for entry in result],
+                'Incorrect record counts')
+        self.assertEqual([108.0, 136.0, 62.0, 44.0],
+                [entry.duration for entry in result],
+                'Incorrect durations')
+
+        # Offsets and lengths locate flight records.
+        raw_flights = self._parser._split_raw_flight(sample)
+        for entry, raw_flight in zip(result, raw_flights):
+            self.assertEqual(entry.record_count * 4, entry.length)
+            self.assertEqual(raw_flight.data.tobytes(),
+                    sample[entry.offset:entry.offset + entry.length],
+                    'Incorrect flight location')
+
+    def test_index_flights_empty(self):
+        self.assertEqual([], self._parser.index_flights(b''),
+                'Incorrect flight count')
+
+    def test_index_flights_wrong_length(self):
+        data = sp.RAW_FLIGHTS_SEPARATOR + b'\x03\x03' + b'\x19' * 7
+        with self.assertRaises(FlyDreamAltimeterProtocolError):
+            self._parser.index_flights(data)
+
+    def test_extract_flight_from_entry(self):
+        sample = UploadedData.from_file(
+                'tests/test_freq_2_then_1_then_8_then_4.fda').data
+        expected = self._parser.extract_flights(sample)
+        entries = self._parser.index_flights(sample)
+
+        result = self._parser.extract_flight(sample, entries[2])
+        self.assertEqual(expected[2], result, 'Incorrect flight')
+
+        result = self._parser.extract_flights(sample, entries[-2:])
+        self.assertEqual(expected[-2:], result, 'Incorrect flights')
+
+    def test_record_at(self):
+        sample = UploadedData.from_file(
+                'tests/test_freq_2_then_1_then_8_then_4.fda').data
+        expected = DataParser().extract_flights(sample)[2]
+        flight = self._parser.extract_flights(sample)[2]
+
+        for index in (0, 9, 495, -1):
+            self.assertEqual(expected.records[index],
+                    flight.record_at(index), 'Incorrect record')
+        self.assertFalse(flight.decoded, 'Records should not be decoded')
+
+        with self.assertRaises(IndexError):
+            flight.record_at(496)
+
+    def test_slice_time(self):
+        sample = UploadedData.from_file(
+                'tests/test_freq_2_then_1_then_8_then_4.fda').data
+        expected = DataParser().extract_flights(sample)[0]
+        flight = self._parser.extract_flights(sample)[0]
+
+        # 2 Hz flight: records 20 to 40, both included.
+        result = flight.slice_time(10.0, 20.0)
+        self.assertFalse(flight.decoded, 'Records should not be decoded')
+        self.assertEqual(21, result.record_count, 'Incorrect record count')
+        self.assertEqual(expected.records[20:41], list(result.records),
+                'Incorrect records')
+
+        # Bounds between records.
+        result = flight.slice_time(10.1, 19.9)
+        self.assertEqual(expected.records[21:40], list(result.records),
+                'Incorrect records')
+
+        # Out of flight bounds.
+        result = flight.slice_time(-5.0, 1000.0)
+        self.assertEqual(expected, result, 'Incorrect records')
+        result = flight.slice_time(200.0, 300.0)
+        self.assertEqual(0, result.record_count, 'Incorrect record count')
+
+    def test_nearest_index(self):
+        sample = UploadedData.from_file(
+                'tests/test_freq_2_then_1_then_8_then_4.fda').data
+        flight = self._parser.extract_flights(sample)[0]
+
+        # 2 Hz flight: ties go to the earlier record.
+        self.assertEqual(20, flight.nearest_index(10.1), 'Incorrect index')
+        self.assertEqual(20, flight.nearest_index(10.25), 'Incorrect index')
+        self.assertEqual(21, flight.nearest_index(10.3), 'Incorrect index')
+        self.assertEqual(0, flight.nearest_index(-5.0), 'Incorrect index')
+        self.assertEqual(flight.record_count - 1,
+                flight.nearest_index(1000.0), 'Incorrect index')
+        self.assertEqual((20, 41), flight.index_range(10.0, 20.0),
+                'Incorrect range')
+
 
 if __name__ == '__main__':
     unittest.main()
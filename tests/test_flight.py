@@ -0,0 +1,128 @@
+#!/usr/bin/python
+
+import unittest
+
+from array import array
+
+from flydream.flight import Flight, FlightRecord, record_blocks
+from flydream.dataparser import DataParser
+
+
+class TestFlyDreamFlight(unittest.TestCase):
+
+    def setUp(self):
+        self._flight = Flight.from_columns(3, 2.0,
+                DataParser.TEMPERATURE_UNIT_CELSIUS,
+                DataParser.LENGTH_UNIT_METER,
+                array('d', [0.0, 0.5, 1.0]),
+                array('b', [25, 24, -2]),
+                array('d', [63.6, 64.1, 65.0]))
+
+    def tearDown(self):
+        self._flight = None
+
+    def test_duration(self):
+        self.assertEqual(1.5, self._flight.duration, 'Incorrect duration')
+
+    def test_record_blocks(self):
+        self.assertEqual([[array('d', [0.5, 1.0]), array('b', [24, -2]),
+                           array('d', [64.1, 65.0])]],
+                list(record_blocks(self._flight, 1)), 'Incorrect block')
+        self.assertEqual([[0.0, 0.5], [1.0]],
+                [list(times) for times, _, _
+                 in record_blocks(self._flight, size=2)],
+                'Incorrect blocks')
+        self.assertEqual([], list(record_blocks(self._flight, 3)),
+                'Unexpected block')
+
+    def test_records_length(self):
+        self.assertEqual(3, len(self._flight.records),
+                'Incorrect record count')
+
+    def test_records_item(self):
+        record = self._flight.records[2]
+        self.assertEqual(FlightRecord(1.0, -2, 65.0), record,
+                'Incorrect record')
+        self.assertEqual(1.0, record.time, 'Incorrect record timestamp')
+
+        last = self._flight.records[-1]
+        self.assertEqual(record, last, 'Incorrect last record')
+
+    def test_records_slice(self):
+        result = self._flight.records[1:]
+        self.assertEqual([FlightRecord(0.5, 24, 64.1),
+                          FlightRecord(1.0, -2, 65.0)], result,
+                'Incorrect record slice')
+
+    def test_records_iteration(self):
+        result = list(self._flight.records)
+        self.assertEqual([FlightRecord(0.0, 25, 63.6),
+                          FlightRecord(0.5, 24, 64.1),
+                          FlightRecord(1.0, -2, 65.0)], result,
+                'Incorrect records')
+
+    def test_records_csv_formatting(self):
+        result = ['%.3f,%d,%.1f' % rec for rec in self._flight.records]
+        self.assertEqual(['0.000,25,63.6', '0.500,24,64.1', '1.000,-2,65.0'],
+                result, 'Incorrect record formatting')
+
+    def test_equality(self):
+        other = Flight.from_columns(3, 2.0,
+                DataParser.TEMPERATURE_UNIT_CELSIUS,
+                DataParser.LENGTH_UNIT_METER,
+                array('d', [0.0, 0.5, 1.0]),
+                array('d', [25.0, 24.0, -2.0]),
+                array('d', [63.6, 64.1, 65.0]))
+        self.assertEqual(self._flight, other, 'Flights should be equal')
+
+        other.index = 4
+        self.assertNotEqual(self._flight, other, 'Flights should differ')
+
+    def test_lazy_decoding(self):
+        calls = []
+
+        def decode():
+            calls.append(None)
+            return (array('d', [0.0, 1.0]),
+                    array('b', [20, 21]),
+                    array('d', [10.0, 11.0]))
+
+        flight = Flight(0, 1.0,
+                DataParser.TEMPERATURE_UNIT_CELSIUS,
+                DataParser.LENGTH_UNIT_METER,
+                2, decode)
+
+        # Flight information does not require decoding.
+        self.assertEqual(2.0, flight.duration, 'Incorrect duration')
+        self.assertEqual(2, len(flight.records), 'Incorrect record count')
+        self.assertFalse(flight.decoded, 'Records should not be decoded')
+        self.assertEqual(0, len(calls), 'Records should not be decoded')
+
+        # Records are decoded once.
+        self.assertEqual(FlightRecord(1.0, 21, 11.0), flight.records[1])
+        self.assertEqual(array('d', [10.0, 11.0]), flight.altitudes)
+        self.assertTrue(flight.decoded, 'Records should be decoded')
+        self.assertEqual(1, len(calls), 'Records should be decoded once')
+
+    def test_with_units_without_samples(self):
+        with self.assertRaises(ValueError):
+            self._flight.with_units(DataParser.LENGTH_UNIT_FEET)
+
+    def test_record_at(self):
+        self.assertEqual(FlightRecord(0.5, 24, 64.1),
+                self._flight.record_at(1), 'Incorrect record')
+        self.assertEqual(FlightRecord(1.0, -2, 65.0),
+                self._flight.record_at(-1), 'Incorrect record')
+        with self.assertRaises(IndexError):
+            self._flight.record_at(3)
+
+    def test_slice_time(self):
+        result = self._flight.slice_time(0.5, 1.0)
+        self.assertEqual([FlightRecord(0.5, 24, 64.1),
+                          FlightRecord(1.0, -2, 65.0)], list(result.records),
+                'Incorrect records')
+        self.assertEqual(3, result.index, 'Incorrect index')
+
+
+if __name__ == '__main__':
+    unittest.main()
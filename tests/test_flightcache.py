@@ -0,0 +1,178 @@
+#!/usr/bin/python
+
+import unittest
+
+import os
+import shutil
+import tempfile
+
+from array import array
+
+from flydream.uploadeddata import UploadedData
+from flydream.dataparser import DataParser
+from flydream.flightcache import FlightCache
+from flydream import serialprotocol as sp
+
+from tests.fakes import CountingDataParser
+
+SAMPLE_FILE = 'tests/test_freq_2_then_1_then_8_then_4.fda'
+
+
+class TestFlyDreamFlightCache(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp(prefix='flydream_tests')
+        self._cache = FlightCache(os.path.join(self._dir, 'cache'))
+        self._columns = (array('d', [0.0, 0.5, 1.0]),
+                         array('b', [25, 24, -2]),
+                         array('l', [208, 210, 213]))
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_get_missing(self):
+        self.assertEqual(None, self._cache.get('missing'),
+                'Unexpected entry')
+        self.assertEqual(1, self._cache.misses, 'Incorrect miss count')
+
+    def test_put_get(self):
+        self._cache.put('flight', self._columns)
+
+        result = self._cache.get('flight')
+        self.assertEqual(self._columns, result, 'Incorrect columns')
+        self.assertEqual(['d', 'b', 'l'],
+                [column.typecode for column in result],
+                'Incorrect column types')
+        self.assertEqual(1, self._cache.hits, 'Incorrect hit count')
+
+    def test_corrupted_entry(self):
+        self._cache.put('flight', self._columns)
+        path = os.path.join(self._cache.path, 'flight.fdc')
+        with open(path, 'r+b') as f:
+            f.truncate(20)
+
+        self.assertEqual(None, self._cache.get('flight'),
+                'Corrupted entry should be ignored')
+
+    def test_eviction(self):
+        self._cache.put('first', self._columns)
+        entry_size = self._cache.stats().size
+        self._cache.max_size = 2 * entry_size
+
+        # Make first entry the most recently used one.
+        self._cache.put('second', self._columns)
+        os.utime(os.path.join(self._cache.path, 'second.fdc'), (0, 0))
+        self._cache.put('third', self._columns)
+
+        self.assertEqual(2, self._cache.stats().entries,
+                'Incorrect entry count')
+        self.assertEqual(None, self._cache.get('second'),
+                'Least recently used entry should be evicted')
+        self.assertEqual(self._columns, self._cache.get('first'),
+                'Missing entry')
+
+    def test_stats_and_clear(self):
+        self._cache.put('first', self._columns)
+        self._cache.put('second', self._columns)
+
+        stats = self._cache.stats()
+        self.assertEqual(2, stats.entries, 'Incorrect entry count')
+        self.assertTrue(stats.size > 0, 'Incorrect size')
+
+        self._cache.clear()
+        self.assertEqual(0, self._cache.stats().entries,
+                'Cache should be empty')
+
+    def test_tracked_size(self):
+        self._cache.put('first', self._columns)
+        entry_size = self._cache.stats().size
+        self._cache.max_size = 3 * entry_size
+
+        # Cache directory is listed by evictions only.
+        listed = []
+        list_entries = self._cache._entries
+
+        def entries():
+            listed.append(True)
+            return list_entries()
+        self._cache._entries = entries
+
+        self._cache.put('second', self._columns)
+        self._cache.put('second', self._columns)
+        self._cache.put('third', self._columns)
+        self.assertEqual([], listed, 'Cache directory should not be listed')
+
+        self._cache.put('fourth', self._columns)
+        self.assertEqual(1, len(listed), 'Cache should be evicted')
+        self.assertEqual(3, self._cache.stats().entries,
+                'Incorrect entry count')
+
+    def test_counters(self):
+        self._cache.put('flight', self._columns)
+        self._cache.get('flight')
+        self._cache.get('missing')
+        self._cache.save_counters()
+        self.assertEqual((0, 0), (self._cache.hits, self._cache.misses),
+                'Counters should be reset')
+
+        # Counters are shared by cache instances.
+        other = FlightCache(self._cache.path)
+        other.get('flight')
+        other.save_counters()
+        stats = self._cache.stats()
+        self.assertEqual((2, 1), (stats.hits, stats.misses),
+                'Incorrect saved counters')
+
+        self._cache.clear()
+        stats = self._cache.stats()
+        self.assertEqual((0, 0), (stats.hits, stats.misses),
+                'Counters should be reset')
+
+    def test_parser_cache(self):
+        self._check_parser_cache(1)
+
+    def test_parser_cache_workers(self):
+        self._check_parser_cache(2)
+
+    def _check_parser_cache(self, workers):
+        data = UploadedData.from_file(SAMPLE_FILE).data
+        expected = DataParser().extract_flights(data)
+
+        parser = DataParser(cache=self._cache, workers=workers)
+        self.assertEqual(expected, parser.extract_flights(data),
+                'Incorrect flights')
+        self.assertEqual(4, self._cache.stats().entries,
+                'Incorrect cache entry count')
+
+        # Flights are now read from cache.
+        parser = CountingDataParser(cache=self._cache, workers=workers)
+        result = parser.extract_flights(data)
+        self.assertEqual(expected, result, 'Incorrect cached flights')
+        self.assertEqual(0, parser.decoded, 'Records should not be decoded')
+
+        # Other units are not cached yet.
+        parser = CountingDataParser(DataParser.LENGTH_UNIT_FEET,
+                cache=self._cache)
+        parser.extract_flights(data)[0].altitudes
+        self.assertEqual(1, parser.decoded, 'Records should be decoded')
+
+    def test_parser_cache_sampling_freq(self):
+        # Same records, at 1 Hz then 8 Hz.
+        records = b'\x00\x86\xa0\x19' * 3
+        data = sp.RAW_FLIGHTS_SEPARATOR + b'\x03' + sp.FREQ_1_HERTZ + \
+               records + sp.RAW_FLIGHTS_SEPARATOR + b'\x03' + \
+               sp.FREQ_8_HERTZ + records
+        expected = DataParser().extract_flights(data)
+        self.assertEqual([0.0, 0.125, 0.25], list(expected[1].times),
+                'Incorrect 8 Hz times')
+
+        for _ in range(2):
+            parser = DataParser(cache=self._cache)
+            self.assertEqual(expected, parser.extract_flights(data),
+                    'Incorrect cached flights')
+        self.assertEqual(2, self._cache.stats().entries,
+                'Incorrect cache entry count')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/python
+
+import unittest
+
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from flydream.uploadeddata import UploadedData
+from flydream.dataparser import DataParser
+from flydream.flightdb import FlightDatabase
+
+SAMPLE_FILE = 'tests/test_freq_2_then_1_then_8_then_4.fda'
+
+
+class TestFlyDreamFlightDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp(prefix='flydream_tests')
+        self._path = os.path.join(self._dir, 'flights.db')
+        self._database = FlightDatabase(self._path)
+
+        raw_upload = UploadedData.from_file(SAMPLE_FILE)
+        self._flights = DataParser().extract_flights(raw_upload.data)
+
+    def tearDown(self):
+        self._database.close()
+        shutil.rmtree(self._dir)
+
+    def test_add_flights(self):
+        flight_ids = self._database.add_flights(self._flights, 'abc',
+                'sample', 'C', 'm')
+        self.assertEqual(len(self._flights), len(flight_ids),
+                'Incorrect flight id count')
+
+        stored = self._database.flights()
+        self.assertEqual(flight_ids, [flight.flight_id for flight in stored],
+                'Incorrect flight ids')
+        for flight, row in zip(self._flights, stored):
+            self.assertEqual(('abc', 'sample', flight.index, 'C', 'm'),
+                    (row.source_hash, row.source_name, row.flight_index,
+                     row.temperature_unit, row.length_unit),
+                    'Incorrect flight source')
+            self.assertEqual(flight.sampling_freq, row.sampling_frequency,
+                    'Incorrect sampling frequency')
+            self.assertEqual(flight.record_count, row.record_count,
+                    'Incorrect record count')
+            self.assertEqual(flight.duration, row.duration,
+                    'Incorrect duration')
+            self.assertEqual(max(flight.altitudes), row.max_altitude,
+                    'Incorrect maximum altitude')
+            self.assertEqual((min(flight.temperatures),
+                              max(flight.temperatures)),
+                    (row.min_temperature, row.max_temperature),
+                    'Incorrect temperature range')
+
+            self.assertEqual(list(zip(flight.times, flight.temperatures,
+                                      flight.altitudes)),
+                    self._database.records(row.flight_id),
+                    'Incorrect records')
+
+    def test_replace_flights(self):
+        self._database.add_flights(self._flights, 'abc', 'sample', 'C', 'm')
+        self._database.add_flights(self._flights[1:2], 'abc', 'other',
+                'C', 'm')
+        self._database.add_flights(self._flights[1:2], 'abc', 'sample',
+                'F', 'ft')
+
+        stored = self._database.flights()
+        self.assertEqual(len(self._flights) + 1, len(stored),
+                'Incorrect flight count')
+        self.assertEqual(1, len([row for row in stored
+                                 if row.source_name == 'other']),
+                'Flight not replaced')
+
+        count = sqlite3.connect(self._path).execute(
+                'SELECT COUNT(*) FROM records').fetchone()[0]
+        self.assertEqual(sum(flight.record_count for flight in self._flights)
+                + self._flights[1].record_count, count,
+                'Incorrect record count')
+
+    def test_records_range(self):
+        flight_id = self._database.add_flights(self._flights[:1], 'abc',
+                'sample', 'C', 'm')[0]
+        flight = self._flights[0]
+
+        records = self._database.records(flight_id, 10.0, 20.0)
+        self.assertEqual([record for record in zip(flight.times,
+                flight.temperatures, flight.altitudes)
+                if 10.0 <= record[0] < 20.0], records, 'Incorrect records')
+
+    def test_reopen(self):
+        self._database.add_flights(self._flights, 'abc', 'sample', 'C', 'm')
+        self._database.close()
+
+        self._database = FlightDatabase(self._path)
+        self.assertEqual(len(self._flights), len(self._database.flights()),
+                'Incorrect flight count')
+
+    def test_unsupported_version(self):
+        self._database.close()
+        connection = sqlite3.connect(self._path)
+        connection.execute('PRAGMA user_version=99')
+        connection.close()
+
+        self.assertRaises(ValueError, FlightDatabase, self._path)
+        self._database = FlightDatabase(os.path.join(self._dir, 'other.db'))
+
+
+if __name__ == '__main__':
+    unittest.main()
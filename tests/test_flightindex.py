@@ -0,0 +1,128 @@
+#!/usr/bin/python
+
+import unittest
+
+import json
+import os
+import shutil
+import tempfile
+
+from flydream.uploadeddata import UploadedData
+from flydream.dataparser import DataParser
+from flydream.flightindex import FlightIndexCache
+
+from tests.fakes import CountingDataParser
+
+SAMPLE_FILE = 'tests/test_freq_2_then_1_then_8_then_4.fda'
+
+
+class TestFlyDreamFlightIndexCache(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp(prefix='flydream_tests')
+        self._fda_file = os.path.join(self._dir, 'sample.fda')
+        shutil.copy(SAMPLE_FILE, self._fda_file)
+        self._data = UploadedData.from_file(self._fda_file).data
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_path(self):
+        cache = FlightIndexCache(self._fda_file)
+        self.assertEqual(os.path.join(self._dir, 'sample.fdx'), cache.path,
+                'Incorrect index file path')
+
+    def test_build(self):
+        parser = DataParser()
+        result = FlightIndexCache(self._fda_file).flights(self._data, parser)
+
+        entries = parser.index_flights(self._data)
+        self.assertEqual(len(entries), len(result), 'Incorrect flight count')
+        for entry, flight in zip(entries, result):
+            self.assertEqual(tuple(entry), flight[:len(entry)],
+                    'Incorrect flight location')
+            self.assertEqual(entry.duration, flight.duration,
+                    'Incorrect duration')
+
+        # Maximum altitude is the altitude of the lowest pressure.
+        flight = parser.extract_flight(self._data, result[0])
+        self.assertEqual(max(flight.altitudes), result[0].max_altitude(parser),
+                'Incorrect max altitude')
+        self.assertEqual(max(flight.temperatures), result[0].max_temperature,
+                'Incorrect max temperature')
+
+        self.assertTrue(os.path.exists(
+                os.path.join(self._dir, 'sample.fdx')), 'Missing index file')
+
+    def test_reopen_does_not_decode(self):
+        expected = FlightIndexCache(self._fda_file).flights(self._data,
+                DataParser())
+
+        parser = CountingDataParser()
+        result = FlightIndexCache(self._fda_file).flights(self._data, parser)
+        self.assertEqual(expected, result, 'Incorrect flights')
+        self.assertEqual(0, parser.decoded, 'Records should not be decoded')
+
+    def test_touched_file(self):
+        cache = FlightIndexCache(self._fda_file)
+        expected = cache.flights(self._data, DataParser())
+
+        # Same content, different mtime.
+        stat = os.stat(self._fda_file)
+        os.utime(self._fda_file, (stat.st_atime, stat.st_mtime + 10))
+
+        parser = CountingDataParser()
+        self.assertEqual(expected, cache.flights(self._data, parser),
+                'Incorrect flights')
+        self.assertEqual(0, parser.decoded, 'Records should not be decoded')
+
+    def test_stale_index(self):
+        cache = FlightIndexCache(self._fda_file)
+        cache.flights(self._data, DataParser())
+
+        # Keep only first flight.
+        first = DataParser().index_flights(self._data)[0]
+        origin = UploadedData.from_file(self._fda_file)
+        os.remove(self._fda_file)
+        UploadedData(origin.header,
+                origin.data[:first.offset + first.length]).to_file(
+                        self._fda_file)
+
+        self.assertEqual(None, cache.load(), 'Index should be stale')
+        data = UploadedData.from_file(self._fda_file).data
+        result = cache.flights(data, DataParser())
+        self.assertEqual(1, len(result), 'Incorrect flight count')
+
+    def test_corrupted_index(self):
+        cache = FlightIndexCache(self._fda_file)
+        with open(cache.path, 'w') as f:
+            f.write('not an index')
+
+        self.assertEqual(None, cache.load(), 'Index should be invalid')
+        result = cache.flights(self._data, DataParser())
+        self.assertEqual(4, len(result), 'Incorrect flight count')
+
+    def test_corrupted_index_flights(self):
+        cache = FlightIndexCache(self._fda_file)
+        expected = cache.flights(self._data, DataParser())
+        with open(cache.path, 'r') as f:
+            content = json.load(f)
+
+        # Index still bound to the FDA file, with invalid flights.
+        for flights in [None, 42, [[1, 2]], [None]]:
+            content['flights'] = flights
+            with open(cache.path, 'w') as f:
+                json.dump(content, f)
+            self.assertEqual(None, cache.load(), 'Index should be invalid')
+
+        del content['flights']
+        with open(cache.path, 'w') as f:
+            json.dump(content, f)
+        self.assertEqual(None, cache.load(), 'Index should be invalid')
+
+        self.assertEqual(expected, cache.flights(self._data, DataParser()),
+                'Incorrect rebuilt index')
+
+
+if __name__ == '__main__':
+    unittest.main()
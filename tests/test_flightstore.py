@@ -0,0 +1,99 @@
+#!/usr/bin/python
+
+import unittest
+
+import os
+import shutil
+import tempfile
+
+from flydream.uploadeddata import UploadedData
+from flydream.flightstore import FlightStore
+from flydream.exception import FlyDreamAltimeterProtocolError
+from flydream import serialprotocol as sp
+
+ONE_FLIGHT_FILE = 'tests/test_flydreamaltimeter_sample_1_flight.fda'
+TWO_FLIGHTS_FILE = 'tests/test_flydreamaltimeter_sample_2_flights.fda'
+
+
+class TestFlyDreamFlightStore(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp(prefix='flydream_tests')
+        self._store = FlightStore(os.path.join(self._dir, 'store'))
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_import(self):
+        upload, new_flights = self._store.import_file(TWO_FLIGHTS_FILE)
+
+        self.assertEqual('test_flydreamaltimeter_sample_2_flights',
+                upload.name, 'Incorrect upload name')
+        self.assertEqual(2, len(upload.flights), 'Incorrect flight count')
+        self.assertEqual(upload.flights, new_flights, 'Incorrect new flights')
+        self.assertEqual(sorted(new_flights), self._store.flights(),
+                'Incorrect stored flights')
+        self.assertEqual([upload], self._store.uploads(),
+                'Incorrect stored uploads')
+
+    def test_import_duplicate_flights(self):
+        first, _ = self._store.import_file(ONE_FLIGHT_FILE)
+        second, new_flights = self._store.import_file(TWO_FLIGHTS_FILE)
+
+        # First flight of both uploads is the same one.
+        self.assertEqual(first.flights[0], second.flights[0],
+                'Flights should be the same')
+        self.assertEqual(second.flights[1:], new_flights,
+                'Incorrect new flights')
+        self.assertEqual(2, len(self._store.flights()),
+                'Flights should be stored once')
+
+        # Importing again does not add anything.
+        again, new_flights = self._store.import_file(TWO_FLIGHTS_FILE)
+        self.assertEqual(second, again, 'Incorrect upload')
+        self.assertEqual([], new_flights, 'Unexpected new flights')
+        self.assertEqual(2, len(self._store.uploads()),
+                'Incorrect upload count')
+
+    def test_import_invalid_data(self):
+        valid = sp.RAW_FLIGHTS_SEPARATOR + b'\x03\x03' + b'\x00\x86\xa0\x19'
+        for invalid in [b'\x03\x77' + b'\x00\x86\xa0\x19',
+                        b'\x03\x03' + b'\x00\x86\xa0']:
+            with self.assertRaises(FlyDreamAltimeterProtocolError):
+                self._store.import_data(valid + sp.RAW_FLIGHTS_SEPARATOR +
+                                        invalid)
+            self.assertEqual([], self._store.flights(),
+                    'Nothing should be stored')
+
+    def test_flight_hashes(self):
+        data = UploadedData.from_file(TWO_FLIGHTS_FILE).data
+        hashes = self._store.flight_hashes(data)
+        self.assertEqual([], self._store.flights(),
+                'Flights should not be stored')
+
+        upload, _ = self._store.import_data(data)
+        self.assertEqual(upload.flights, hashes, 'Incorrect flight hashes')
+
+    def test_export(self):
+        upload, _ = self._store.import_file(TWO_FLIGHTS_FILE)
+
+        fname = os.path.join(self._dir, 'exported.fda')
+        self._store.export_file(upload.upload_id[:8], fname)
+
+        origin = UploadedData.from_file(TWO_FLIGHTS_FILE)
+        result = UploadedData.from_file(fname)
+        self.assertEqual(origin.header, result.header, 'Incorrect header')
+        self.assertEqual(origin.data, result.data, 'Incorrect data')
+
+    def test_unknown_upload(self):
+        self._store.import_file(ONE_FLIGHT_FILE)
+        with self.assertRaises(ValueError):
+            self._store.upload('not an id')
+
+    def test_empty_store(self):
+        self.assertEqual([], self._store.flights(), 'Unexpected flights')
+        self.assertEqual([], self._store.uploads(), 'Unexpected uploads')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/python
+
+import unittest
+
+import json
+
+from collections import OrderedDict
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import flydream.flight
+
+from flydream.uploadeddata import UploadedData
+from flydream.dataparser import DataParser
+from flydream.jsonwriter import JsonWriter, JsonLinesWriter
+
+from tests.fakes import ArrayFlight
+
+SAMPLE_FILE = 'tests/test_freq_2_then_1_then_8_then_4.fda'
+
+INFO = [('temperature_unit', 'C'), ('length_unit', 'm'),
+        ('sampling_frequency', 2.0)]
+
+
+def json_tree(flight):
+    records = [OrderedDict([('time', time), ('temperature', temperature),
+                            ('altitude', altitude)])
+               for time, temperature, altitude in zip(flight.times,
+                       flight.temperatures, flight.altitudes)]
+    return OrderedDict([('info', OrderedDict(INFO)), ('records', records)])
+
+
+def write(flight, compact=False, block_size=None):
+    writer = JsonWriter(StringIO(), compact)
+    default_size = flydream.flight.BLOCK_SIZE
+    flydream.flight.BLOCK_SIZE = block_size or default_size
+    try:
+        writer.write_flight(flight, INFO)
+    finally:
+        flydream.flight.BLOCK_SIZE = default_size
+    return writer._out.getvalue()
+
+
+class TestFlyDreamJsonWriter(unittest.TestCase):
+
+    def setUp(self):
+        raw_upload = UploadedData.from_file(SAMPLE_FILE)
+        self._flights = DataParser().extract_flights(raw_upload.data)
+
+    def test_default_output(self):
+        for flight in self._flights:
+            expected = json.dumps(json_tree(flight), indent=2,
+                                  separators=(',', ': '))
+            self.assertEqual(expected, write(flight),
+                    'Incorrect JSON text')
+            self.assertEqual(expected, write(flight, block_size=7),
+                    'Incorrect JSON text with several blocks')
+
+    def test_empty_flight(self):
+        flight = ArrayFlight([], [], [])
+        expected = json.dumps(json_tree(flight), indent=2,
+                              separators=(',', ': '))
+        self.assertEqual(expected, write(flight), 'Incorrect JSON text')
+
+        content = json.loads(write(flight, compact=True))
+        self.assertEqual({'time': [], 'temperature': [], 'altitude': []},
+                content['records'], 'Incorrect records')
+
+    def test_compact_output(self):
+        for flight in self._flights:
+            text = write(flight, compact=True, block_size=7)
+            self.assertFalse('\n' in text or ' ' in text,
+                    'Unexpected white space')
+
+            content = json.loads(text, object_pairs_hook=OrderedDict)
+            self.assertEqual(OrderedDict(INFO), content['info'],
+                    'Incorrect info')
+            self.assertEqual(['time', 'temperature', 'altitude'],
+                    list(content['records']), 'Incorrect columns')
+            self.assertEqual(list(flight.times),
+                    content['records']['time'], 'Incorrect times')
+            self.assertEqual(list(flight.temperatures),
+                    content['records']['temperature'],
+                    'Incorrect temperatures')
+            self.assertEqual(list(flight.altitudes),
+                    content['records']['altitude'], 'Incorrect altitudes')
+
+
+class TestFlyDreamJsonLinesWriter(unittest.TestCase):
+
+    def setUp(self):
+        raw_upload = UploadedData.from_file(SAMPLE_FILE)
+        self._flights = DataParser().extract_flights(raw_upload.data)
+
+    def _lines(self, flight, info, start=0):
+        writer = JsonLinesWriter(StringIO())
+        block_size = flydream.flight.BLOCK_SIZE
+        flydream.flight.BLOCK_SIZE = 7
+        try:
+            writer.write_records(flight, info, start)
+        finally:
+            flydream.flight.BLOCK_SIZE = block_size
+        return writer._out.getvalue().splitlines()
+
+    def test_records(self):
+        for flight in self._flights:
+            info = [('flight', flight.index)] + INFO
+            lines = self._lines(flight, info, 3)
+            self.assertEqual(len(flight.times) - 3, len(lines),
+                    'Incorrect line count')
+
+            for line, record in zip(lines, list(zip(flight.times,
+                    flight.temperatures, flight.altitudes))[3:]):
+                self.assertFalse(' ' in line, 'Unexpected white space')
+                content = json.loads(line, object_pairs_hook=OrderedDict)
+                self.assertEqual(OrderedDict(info + list(zip(
+                        ['time', 'temperature', 'altitude'], record))),
+                        content, 'Incorrect record object')
+
+    def test_no_info(self):
+        lines = self._lines(ArrayFlight([0.5], [-3], [12.5]), [])
+        self.assertEqual(['{"time":0.5,"temperature":-3,"altitude":12.5}'],
+                lines, 'Incorrect lines')
+
+    def test_empty_flight(self):
+        self.assertEqual([], self._lines(ArrayFlight([], [], []), INFO),
+                'Unexpected lines')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,26 @@
 #!/bin/python
+# -*- coding: utf-8 -*-
 
 import os
+import sys
+import json
+import shutil
+import sqlite3
+import tempfile
 
 from unittest import TestCase
 from scripttest import TestFileEnvironment
 
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import pyfda
+from flydream.uploadeddata import UploadedData
+from flydream.exception import FlyDreamAltimeterProtocolError
+from flydream import serialprotocol as sp
+
 TEST_SUBDIR = 'tests/test-output'
 TEST_DIR = os.path.abspath(TEST_SUBDIR)
 TEMPLATE_DIR = os.path.abspath('tests')
@@ -21,7 +37,8 @@ class TestPyfdaCommandLineTool(TestCase):
                 base_path=TEST_DIR,
                 template_path=TEMPLATE_DIR,
                 cwd=os.getcwd(),
-                ignore_hidden=False)
+                ignore_hidden=False,
+                environ=dict(os.environ, PYFDA_NO_CACHE='1'))
         self.env.writefile(INPUT_FILE_NAME,
                 frompath='test_freq_2_then_1_then_8_then_4.fda')
 
@@ -194,3 +211,338 @@ Converting 2 flight(s) to CSV...
 """ % (INPUT_FILE_PATH, CONVERTED_PREFIX, CONVERTED_PREFIX)
         self.assertEqual(expected, result.stdout, 'Incorrect output')
         # TODO: Check converted file contents.
+
+    def test_print_fda_file_convert_parallel(self):
+        'Test: pyfda --jobs=2 --csv --json --prefix=test_convert convert ...'
+
+        cmd = './pyfda.py --jobs=2 --csv --json --last=2 --prefix=%s ' \
+                'convert %s' % (CONVERTED_PREFIX, INPUT_FILE_PATH)
+        result = self.env.run(cmd, expect_error=False)
+
+        self.assertEqual(result.returncode, 0,\
+                'Expect returncode=0, got %r' % result.returncode)
+        expected = \
+"""Reading file %s...
+Found 4 flights:
+Converting 2 flight(s) to CSV...
+Converting 2 flight(s) to JSON...
+   Writing %s_002.csv file
+   Writing %s_002.json file
+   Writing %s_003.csv file
+   Writing %s_003.json file
+""" % (INPUT_FILE_PATH, CONVERTED_PREFIX, CONVERTED_PREFIX,
+        CONVERTED_PREFIX, CONVERTED_PREFIX)
+        self.assertEqual(expected, result.stdout, 'Incorrect output')
+
+    def test_print_fda_file_convert_failure(self):
+        'Test: pyfda --csv --json convert ..., with a file not writable'
+
+        # Third JSON file can not be written.
+        os.mkdir(os.path.join(TEST_DIR, 'test_convert_002.json'))
+
+        # Conversion stops at the failed flight. With several jobs,
+        # workers convert the next ones meanwhile.
+        for jobs, flights in [(1, [0, 1]), (2, [0, 1, 3])]:
+            cmd = './pyfda.py --jobs=%d --csv --json --prefix=%s ' \
+                    'convert %s' % (jobs, CONVERTED_PREFIX, INPUT_FILE_PATH)
+            result = self.env.run(cmd, expect_error=True)
+
+            self.assertEqual(result.returncode, 1,\
+                    'Expect returncode=1, got %r' % result.returncode)
+            expected = 'Reading file %s...\nFound 4 flights:\n' \
+                    'Converting 4 flight(s) to CSV...\n' \
+                    'Converting 4 flight(s) to JSON...\n' % INPUT_FILE_PATH
+            names = []
+            for index in flights:
+                for extension in ['.csv', '.json']:
+                    names.append('test_convert_%3.3d%s' % (index, extension))
+                    expected += '   Writing %s file\n' % os.path.join(
+                            TEST_SUBDIR, names[-1])
+            self.assertEqual(expected, result.stdout, 'Incorrect output')
+            self.assertTrue('error: ' in result.stderr,
+                    'Incorrect error message')
+
+            # Files of the failed flight are removed.
+            self.assertEqual(sorted(names + ['test_convert_002.json']),
+                    sorted(name for name in os.listdir(TEST_DIR)
+                           if name.startswith('test_convert_')),
+                    'Incorrect converted files')
+
+    def test_convert_sqlite_twice(self):
+        'Test: pyfda --sqlite=flights.db convert ..., twice'
+
+        database = os.path.join(TEST_SUBDIR, 'flights.db')
+        cmd = './pyfda.py --sqlite=%s convert %s' % (database,
+                INPUT_FILE_PATH)
+        for _ in range(2):
+            result = self.env.run(cmd, expect_error=False)
+            self.assertEqual(result.returncode, 0,\
+                    'Expect returncode=0, got %r' % result.returncode)
+
+        # Flights converted again replace stored ones.
+        connection = sqlite3.connect(database)
+        try:
+            flights, records = connection.execute('SELECT COUNT(*), '
+                    'SUM(record_count) FROM flights').fetchone()
+            self.assertEqual(4, flights, 'Incorrect flight count')
+            self.assertEqual(records, connection.execute(
+                    'SELECT COUNT(*) FROM records').fetchone()[0],
+                    'Incorrect record count')
+        finally:
+            connection.close()
+
+    def test_convert_cache_stats(self):
+        'Test: pyfda convert ..., then pyfda cache stats'
+
+        # Use a cache of the test directory.
+        environ = dict(self.env.environ,
+                XDG_CACHE_HOME=os.path.join(TEST_DIR, 'cache'))
+        del environ['PYFDA_NO_CACHE']
+        self.env.environ = environ
+
+        cmd = './pyfda.py --no-cache --prefix=%s convert %s' % (
+                CONVERTED_PREFIX, INPUT_FILE_PATH)
+        self.env.run(cmd, expect_error=False)
+        result = self.env.run('./pyfda.py cache stats', expect_error=False)
+        self.assertTrue('   0 flights, 0 bytes used' in result.stdout,
+                'Cache should not be used')
+
+        cmd = './pyfda.py --last=2 --prefix=%s convert %s' % (
+                CONVERTED_PREFIX, INPUT_FILE_PATH)
+        self.env.run(cmd, expect_error=False)
+        self.env.run(cmd, expect_error=False)
+        result = self.env.run('./pyfda.py cache stats', expect_error=False)
+        self.assertTrue('   2 flights, ' in result.stdout,
+                'Incorrect cache entry count')
+        self.assertTrue('   2 hits, 2 misses (50.0% hit rate)\n'
+                in result.stdout, 'Incorrect cache counters')
+
+    def test_convert_stdin_to_stdout(self):
+        'Test: pyfda convert - < sample.fda'
+
+        with open(os.path.join(TEMPLATE_DIR,
+                'test_flydreamaltimeter_sample_2_flights.fda'), 'rb') as f:
+            sample = f.read()
+
+        cmd = './pyfda.py --last=1 convert -'
+        result = self.env.run(cmd, stdin=sample, expect_error=False)
+
+        self.assertEqual(result.returncode, 0,\
+                'Expect returncode=0, got %r' % result.returncode)
+        lines = result.stdout.splitlines()
+        self.assertEqual(9, len(lines), 'Incorrect line count')
+        self.assertEqual('flight,time(sec),temperature(°C),altitude(m)',
+                lines[0], 'Incorrect CSV header')
+        self.assertTrue(lines[1].startswith('1,0.000,'),
+                'Incorrect CSV record')
+
+    def test_convert_invalid_stdin(self):
+        'Test: pyfda --json convert - < invalid.fda'
+
+        for options in ['', '--json']:
+            cmd = './pyfda.py %s convert -' % options
+            result = self.env.run(cmd, stdin=b'not an FDA file',
+                    expect_error=True)
+
+            self.assertEqual(result.returncode, 1,\
+                    'Expect returncode=1, got %r' % result.returncode)
+            self.assertEqual('', result.stdout, 'Unexpected output')
+            self.assertTrue('error: ' in result.stderr,
+                    'Incorrect error message')
+
+    def test_convert_stdin_to_compact_json(self):
+        'Test: pyfda --json --compact convert - < sample.fda'
+
+        with open(os.path.join(TEMPLATE_DIR,
+                'test_flydreamaltimeter_sample_2_flights.fda'), 'rb') as f:
+            sample = f.read()
+
+        cmd = './pyfda.py --json --compact convert -'
+        result = self.env.run(cmd, stdin=sample, expect_error=False)
+
+        self.assertEqual(result.returncode, 0,\
+                'Expect returncode=0, got %r' % result.returncode)
+        flights = json.loads(result.stdout)
+        self.assertEqual(2, len(flights), 'Incorrect flight count')
+        self.assertEqual(1, flights[1]['info']['flight'],
+                'Incorrect flight index')
+        self.assertEqual(len(flights[1]['records']['time']),
+                len(flights[1]['records']['altitude']),
+                'Incorrect column lengths')
+
+    def test_convert_stdin_to_ndjson(self):
+        'Test: pyfda --ndjson convert - < sample.fda'
+
+        with open(os.path.join(TEMPLATE_DIR,
+                'test_flydreamaltimeter_sample_2_flights.fda'), 'rb') as f:
+            sample = f.read()
+
+        cmd = './pyfda.py --ndjson convert -'
+        result = self.env.run(cmd, stdin=sample, expect_error=False)
+
+        self.assertEqual(result.returncode, 0,\
+                'Expect returncode=0, got %r' % result.returncode)
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertEqual(448, len(records), 'Incorrect record count')
+        self.assertEqual(1, records[-1]['flight'], 'Incorrect flight index')
+        self.assertEqual(8.0, records[-1]['sampling_frequency'],
+                'Incorrect sampling frequency')
+
+
+class FakeAltimeter:
+    ''' Altimeter uploading FDA files, in order.'''
+
+    uploads = []
+
+    def __init__(self, port):
+        pass
+
+    def upload(self, callback=None, feeder=None, sink=None):
+        raw_data = UploadedData.from_file(self.uploads.pop(0))
+        if feeder:
+            try:
+                feeder.feed(raw_data.data)
+            except FlyDreamAltimeterProtocolError:
+                pass  # Raised again by feeder.close().
+        if callback:
+            callback(len(raw_data.data), len(raw_data.data))
+        if sink:
+            sink.write(raw_data.header)
+            sink.write(raw_data.data)
+            return sink.close()
+        return raw_data
+
+
+class TestPyfdaUpload(TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp(prefix='flydream_tests')
+        self._altimeter = pyfda.Altimeter
+        pyfda.Altimeter = FakeAltimeter
+
+    def tearDown(self):
+        pyfda.Altimeter = self._altimeter
+        FakeAltimeter.uploads = []
+        shutil.rmtree(self._dir)
+
+    def run_pyfda(self, *arguments):
+        argv, stdout, stderr = sys.argv, sys.stdout, sys.stderr
+        sys.argv = ['pyfda.py'] + list(arguments)
+        sys.stdout = StringIO()
+        sys.stderr = StringIO()
+        try:
+            return pyfda.main(sys.argv)
+        finally:
+            sys.argv, sys.stdout, sys.stderr = argv, stdout, stderr
+
+    def converted_files(self, name):
+        return sorted(fname for fname in os.listdir(self._dir)
+                      if fname.startswith(name + '_'))
+
+    def test_upload_invalid_data(self):
+        'Test: pyfda upload, with an unexpected sampling rate'
+
+        with open(os.path.join(TEMPLATE_DIR,
+                  'test_flydreamaltimeter_sample_2_flights.fda'), 'rb') as f:
+            sample = f.read()
+        rate = sample.index(sp.RAW_FLIGHTS_SEPARATOR) + \
+                len(sp.RAW_FLIGHTS_SEPARATOR) + 1
+        sample = sample[:rate] + b'\x77' + sample[rate + 1:]
+        invalid = os.path.join(self._dir, 'invalid')
+        with open(invalid, 'wb') as f:
+            f.write(sample)
+
+        # Uploaded data is kept, even if only new flights are.
+        store = os.path.join(self._dir, 'store')
+        for arguments in [[], ['--incremental', '--store', store]]:
+            FakeAltimeter.uploads = [invalid]
+            prefix = os.path.join(self._dir, 'upload')
+            result = self.run_pyfda(*(arguments + ['--csv', '--prefix',
+                                                   prefix, 'upload']))
+            self.assertEqual(1, result, 'Expect returncode=1, got %r'
+                    % result)
+
+            with open(prefix + '.fda', 'rb') as f:
+                self.assertEqual(f.read(), sample,
+                        'Incorrect uploaded data')
+            os.remove(prefix + '.fda')
+            self.assertEqual([], self.converted_files('upload'),
+                    'No flight should be converted')
+        self.assertFalse(os.path.exists(store), 'Nothing should be archived')
+
+    def test_upload_partial_file(self):
+        'Test: pyfda upload, with a partial file of a failed upload'
+
+        FakeAltimeter.uploads = [os.path.join(TEMPLATE_DIR,
+                'test_flydreamaltimeter_sample_1_flight.fda')]
+        prefix = os.path.join(self._dir, 'upload')
+        with open(prefix + '.fda.part', 'wb') as f:
+            f.write(b'partial')
+
+        result = self.run_pyfda('--prefix', prefix, 'upload')
+        self.assertEqual(1, result, 'Expect returncode=1, got %r' % result)
+        with open(prefix + '.fda.part', 'rb') as f:
+            self.assertEqual(b'partial', f.read(), 'Incorrect partial data')
+        self.assertEqual(1, len(FakeAltimeter.uploads),
+                'Nothing should be uploaded')
+
+    def test_upload_incremental_failure(self):
+        'Test: pyfda --incremental upload, converted after a failure'
+
+        store = os.path.join(self._dir, 'store')
+        FakeAltimeter.uploads = [
+                os.path.join(TEMPLATE_DIR,
+                    'test_flydreamaltimeter_sample_2_flights.fda')] * 2
+
+        # Converted files can not be written.
+        prefix = os.path.join(self._dir, 'missing', 'first')
+        with self.assertRaises(IOError):
+            self.run_pyfda('--incremental', '--store', store, '--csv',
+                    '--prefix', prefix, 'upload')
+        self.assertFalse(os.path.exists(store), 'Nothing should be archived')
+
+        # Flights are still new.
+        result = self.run_pyfda('--incremental', '--store', store, '--csv',
+                '--prefix', os.path.join(self._dir, 'second'), 'upload')
+        self.assertEqual(0, result, 'Expect returncode=0, got %r' % result)
+        self.assertEqual(['second_000.csv', 'second_001.csv'],
+                self.converted_files('second'),
+                'All flights should be converted')
+
+    def test_upload_incremental(self):
+        'Test: pyfda --incremental upload, with overlapping uploads'
+
+        store = os.path.join(self._dir, 'store')
+        FakeAltimeter.uploads = [
+                os.path.join(TEMPLATE_DIR,
+                    'test_flydreamaltimeter_sample_1_flight.fda'),
+                os.path.join(TEMPLATE_DIR,
+                    'test_flydreamaltimeter_sample_2_flights.fda'),
+                os.path.join(TEMPLATE_DIR,
+                    'test_flydreamaltimeter_sample_2_flights.fda')]
+        for name in ['first', 'second', 'third']:
+            result = self.run_pyfda('--incremental', '--store', store,
+                    '--csv', '--prefix', os.path.join(self._dir, name),
+                    'upload')
+            self.assertEqual(0, result, 'Expect returncode=0, got %r'
+                    % result)
+
+        # First flight of the second upload was already archived.
+        self.assertEqual(['first_000.csv'], self.converted_files('first'),
+                'Incorrect first upload conversion')
+        self.assertEqual(['second_001.csv'], self.converted_files('second'),
+                'Only the new flight should be converted')
+        self.assertEqual([], self.converted_files('third'),
+                'No flight should be converted')
+
+        # Converted flights are the expected ones.
+        self.run_pyfda('--csv', '--no-cache', '--prefix',
+                os.path.join(self._dir, 'all'), 'convert',
+                os.path.join(TEMPLATE_DIR,
+                    'test_flydreamaltimeter_sample_2_flights.fda'))
+        for name in ['first_000.csv', 'second_001.csv']:
+            with open(os.path.join(self._dir, name)) as f:
+                converted = f.read()
+            with open(os.path.join(self._dir, 'all' + name[-8:])) as f:
+                self.assertEqual(f.read(), converted,
+                        'Incorrect %s content' % name)
@@ -2,6 +2,10 @@
 
 import unittest
 
+import os
+import shutil
+import tempfile
+
 try:
     from StringIO import StringIO
 except ImportError:
@@ -14,6 +18,8 @@ from flydream.exception import FlyDreamAltimeterReadError, \
         FlyDreamAltimeterProtocolError
 
 from flydream import serialprotocol as sp
+from flydream.dataparser import DataParser
+from flydream.uploadeddata import UploadSink
 
 UNEXISTING_PORT = 'unexisting'
 
@@ -188,6 +194,85 @@ class TestFlyDreamDevice(unittest.TestCase):
         self.assertEqual(uploaded.header, sample[:12])
         self.assertEqual(len(uploaded.data), len(sample[12:]))
 
+    def test_upload_feeder(self):
+        with open('tests/test_flydreamdevice_sample.fda', 'rb') as f:
+            sample = f.read()
+
+        serialMock = SerialMock(sample)
+        self._device._serial_port = serialMock
+
+        parser = DataParser()
+        feeder = parser.incremental()
+        uploaded = self._device.upload(feeder=feeder)
+
+        self.assertEqual(parser.extract_flights(uploaded.data),
+                feeder.close(), 'Incorrect fed flights')
+
+    def test_upload_sink(self):
+        with open('tests/test_flydreamdevice_sample.fda', 'rb') as f:
+            sample = f.read()
+        self._device._serial_port = SerialMock(sample)
+
+        directory = tempfile.mkdtemp(prefix='flydream_tests')
+        try:
+            fname = os.path.join(directory, 'upload.fda')
+            uploaded = self._device.upload(sink=UploadSink(fname))
+
+            self.assertEqual(uploaded.header, sample[:12])
+            self.assertEqual(bytes(uploaded.data), sample[12:])
+            with open(fname, 'rb') as f:
+                self.assertEqual(f.read(), sample, 'Incorrect file content')
+            self.assertFalse(os.path.exists(fname + UploadSink.PART_EXTENSION),
+                    'Partial file should be renamed')
+            uploaded = None  # Release file mapping.
+        finally:
+            shutil.rmtree(directory)
+
+    def test_upload_sink_incomplete_data(self):
+        with open('tests/test_flydreamdevice_sample.fda', 'rb') as f:
+            sample = f.read()
+        self._device._serial_port = SerialMock(sample[:-100])
+
+        directory = tempfile.mkdtemp(prefix='flydream_tests')
+        try:
+            fname = os.path.join(directory, 'upload.fda')
+            with self.assertRaises(FlyDreamAltimeterReadError):
+                self._device.upload(sink=UploadSink(fname))
+
+            # Data received so far is kept.
+            self.assertFalse(os.path.exists(fname), 'Unexpected file')
+            with open(fname + UploadSink.PART_EXTENSION, 'rb') as f:
+                self.assertEqual(f.read(), sample[:-100],
+                        'Incorrect partial file content')
+        finally:
+            shutil.rmtree(directory)
+
+    def test_upload_sink_invalid_data(self):
+        with open('tests/test_flydreamdevice_sample.fda', 'rb') as f:
+            sample = f.read()
+        # Unexpected sampling rate of first flight.
+        rate = sample.index(sp.RAW_FLIGHTS_SEPARATOR) + \
+                len(sp.RAW_FLIGHTS_SEPARATOR) + 1
+        sample = sample[:rate] + b'\x77' + sample[rate + 1:]
+        self._device._serial_port = SerialMock(sample)
+
+        directory = tempfile.mkdtemp(prefix='flydream_tests')
+        try:
+            # Transfer is complete, decoding error is raised later.
+            fname = os.path.join(directory, 'upload.fda')
+            feeder = DataParser().incremental()
+            uploaded = self._device.upload(feeder=feeder,
+                                           sink=UploadSink(fname))
+            self.assertEqual(bytes(uploaded.data), sample[12:])
+            with open(fname, 'rb') as f:
+                self.assertEqual(f.read(), sample, 'Incorrect file content')
+            uploaded = None  # Release file mapping.
+
+            with self.assertRaises(FlyDreamAltimeterProtocolError):
+                feeder.close()
+        finally:
+            shutil.rmtree(directory)
+
     def test_upload_incomplete_header(self):
         with open('tests/test_flydreamdevice_sample.fda', 'rb') as f:
             sample = f.read()
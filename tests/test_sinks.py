@@ -0,0 +1,97 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import json
+import os
+import shutil
+import tempfile
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from flydream.uploadeddata import UploadedData
+from flydream.dataparser import DataParser
+from flydream.converter import FlightConverter
+from flydream.sinks import CsvFileSink, JsonFileSink, CsvStreamSink, \
+        JsonStreamSink
+
+SAMPLE_FILE = 'tests/test_freq_2_then_1_then_8_then_4.fda'
+
+
+class TestFlyDreamSinks(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp(prefix='flydream_tests')
+        raw_upload = UploadedData.from_file(SAMPLE_FILE)
+        self._flights = DataParser().extract_flights(raw_upload.data)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_file_sinks(self):
+        prefix = os.path.join(self._dir, 'flight')
+        messages = []
+        converter = FlightConverter([CsvFileSink(prefix),
+                                     JsonFileSink(prefix)], messages.append)
+        converter.convert(self._flights[:2])
+        converter.close()
+
+        self.assertEqual(['Converting 2 flight(s) to CSV...',
+                          'Converting 2 flight(s) to JSON...',
+                          '   Writing %s_000.csv file' % prefix,
+                          '   Writing %s_000.json file' % prefix,
+                          '   Writing %s_001.csv file' % prefix,
+                          '   Writing %s_001.json file' % prefix],
+                messages, 'Incorrect progress messages')
+        with open(prefix + '_001.csv') as f:
+            lines = f.read().splitlines()
+        self.assertEqual('time(sec),temperature(°C),altitude(m)', lines[0],
+                'Incorrect CSV header')
+        self.assertEqual(self._flights[1].record_count + 1, len(lines),
+                'Incorrect CSV line count')
+
+    def test_file_sink_abort(self):
+        prefix = os.path.join(self._dir, 'flight')
+        sink = CsvFileSink(prefix)
+        converter = FlightConverter([sink])
+        converter.convert_flight(self._flights[0])
+        converter.begin_flight(self._flights[1])
+        converter.abort()
+
+        # Only the file being written is removed.
+        self.assertEqual(['flight_000.csv'], os.listdir(self._dir),
+                'Incorrect converted files')
+
+    def test_stream_sinks(self):
+        out = StringIO()
+        converter = FlightConverter([CsvStreamSink(out,
+                DataParser.LENGTH_UNIT_METER,
+                DataParser.TEMPERATURE_UNIT_CELSIUS)])
+        converter.convert(self._flights)
+        converter.close()
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(sum(flight.record_count
+                             for flight in self._flights) + 1, len(lines),
+                'Incorrect CSV line count')
+        self.assertTrue(lines[-1].startswith('3,'),
+                'Incorrect flight index column')
+
+        for compact in [False, True]:
+            out = StringIO()
+            converter = FlightConverter([JsonStreamSink(out, compact)])
+            converter.convert(self._flights)
+            converter.close()
+
+            content = json.loads(out.getvalue())
+            self.assertEqual([flight.index for flight in self._flights],
+                    [item['info']['flight'] for item in content],
+                    'Incorrect flights')
+
+
+if __name__ == '__main__':
+    unittest.main()
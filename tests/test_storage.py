@@ -0,0 +1,49 @@
+#!/usr/bin/python
+
+import unittest
+
+import os
+import shutil
+import tempfile
+
+from array import array
+
+from flydream.storage import write_file, array_bytes, array_extend
+
+
+class TestFlyDreamStorage(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp(prefix='flydream_tests')
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_write_file(self):
+        path = os.path.join(self._dir, 'sub', 'dir', 'file')
+        write_file(path, b'first')
+        write_file(path, b'second')
+
+        with open(path, 'rb') as f:
+            self.assertEqual(b'second', f.read(), 'Incorrect content')
+        self.assertEqual(['file'], os.listdir(os.path.dirname(path)),
+                'Temporary file should be renamed')
+
+    def test_write_file_failure(self):
+        # Target is a directory: renaming fails.
+        path = os.path.join(self._dir, 'target')
+        os.mkdir(path)
+        with self.assertRaises(OSError):
+            write_file(path, b'content')
+        self.assertEqual(['target'], os.listdir(self._dir),
+                'Temporary file should be removed')
+
+    def test_array_bytes(self):
+        column = array('h', [1, -2, 300])
+        copy = array('h')
+        array_extend(copy, array_bytes(column))
+        self.assertEqual(column, copy, 'Incorrect array content')
+
+
+if __name__ == '__main__':
+    unittest.main()
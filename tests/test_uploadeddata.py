@@ -2,14 +2,23 @@
 
 import unittest
 
+import os
+import shutil
 import tempfile
 
-from flydream.uploadeddata import UploadedData
+from flydream.uploadeddata import UploadedData, UploadSink
 import flydream.serialprotocol as sp
+from flydream.dataparser import DataParser
 
 
 class FlyDreamUploadedData(unittest.TestCase):
 
+    def setUp(self):
+        self._dir = tempfile.mkdtemp(prefix='flydream_tests')
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
     def test_read(self):
         result = UploadedData.from_file('tests/test_flydreamdevice_sample.fda')
 
@@ -42,3 +51,92 @@ class FlyDreamUploadedData(unittest.TestCase):
 
         with self.assertRaises(OSError):
             origin.to_file(fname)
+
+    def test_read_mapped(self):
+        origin = UploadedData.from_file('tests/test_flydreamdevice_sample.fda')
+        result = UploadedData.from_file('tests/test_flydreamdevice_sample.fda',
+                mapped=True)
+
+        self.assertEqual(result.header, origin.header, 'Incorrect header')
+        self.assertEqual(len(result.data), 0x700, 'Invalid data length')
+        self.assertEqual(result.data, origin.data, 'Incorrect data')
+
+    def test_parse_mapped(self):
+        fname = 'tests/test_freq_2_then_1_then_8_then_4.fda'
+        origin = UploadedData.from_file(fname)
+        result = UploadedData.from_file(fname, mapped=True)
+
+        parser = DataParser()
+        self.assertEqual(parser.extract_flights(origin.data),
+                parser.extract_flights(result.data), 'Incorrect flights')
+
+    def test_write_mapped(self):
+        origin = UploadedData.from_file('tests/test_flydreamdevice_sample.fda',
+                mapped=True)
+
+        fname = os.path.join(self._dir, 'upload.fda')
+        origin.to_file(fname)
+
+        result = UploadedData.from_file(fname)
+        self.assertEqual(result.header, origin.header, 'Incorrect header')
+        self.assertEqual(result.data, origin.data, 'Incorrect data')
+
+    def test_read_mapped_empty(self):
+        fname = os.path.join(self._dir, 'upload.fda')
+        open(fname, 'wb').close()
+        result = UploadedData.from_file(fname, mapped=True)
+        self.assertEqual(b'', result.header, 'Incorrect header')
+        self.assertEqual(b'', result.data, 'Incorrect data')
+
+    def test_sink(self):
+        origin = UploadedData.from_file('tests/test_flydreamdevice_sample.fda')
+
+        fname = os.path.join(self._dir, 'upload.fda')
+        sink = UploadSink(fname)
+        sink.write(origin.header)
+        sink.write(origin.data[:100])
+        self.assertFalse(os.path.exists(fname), 'File should not exist yet')
+
+        sink.write(origin.data[100:])
+        result = sink.close()
+        self.assertEqual(result.header, origin.header, 'Incorrect header')
+        self.assertEqual(result.data, origin.data, 'Incorrect data')
+        self.assertFalse(os.path.exists(sink.part_filename),
+                'Partial file should be renamed')
+
+    def test_sink_abort(self):
+        fname = os.path.join(self._dir, 'upload.fda')
+        sink = UploadSink(fname)
+        sink.write(b'partial')
+        sink.abort()
+
+        self.assertFalse(os.path.exists(fname), 'File should not exist')
+        with open(sink.part_filename, 'rb') as f:
+            self.assertEqual(b'partial', f.read(), 'Incorrect partial data')
+
+    def test_sink_abort_empty(self):
+        fname = os.path.join(self._dir, 'upload.fda')
+        sink = UploadSink(fname)
+        sink.abort()
+        sink.abort()
+
+        self.assertFalse(os.path.exists(sink.part_filename),
+                'Empty partial file should be removed')
+
+    def test_sink_existing(self):
+        fname = os.path.join(self._dir, 'upload.fda')
+        open(fname, 'wb').close()
+        with self.assertRaises(OSError):
+            UploadSink(fname)
+
+    def test_sink_existing_partial_file(self):
+        fname = os.path.join(self._dir, 'upload.fda')
+        sink = UploadSink(fname)
+        sink.write(b'partial')
+        sink.abort()
+
+        # Data of failed transfer is kept.
+        with self.assertRaises(OSError):
+            UploadSink(fname)
+        with open(sink.part_filename, 'rb') as f:
+            self.assertEqual(b'partial', f.read(), 'Incorrect partial data')
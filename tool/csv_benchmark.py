@@ -0,0 +1,119 @@
+#!/usr/bin/python
+# -+- encoding: utf-8 -+-
+'''Measure CSV conversion throughput on a full device dump.
+
+The dump is built by repeating the records of a sample flight until
+the altimeter capacity is reached. Records are written by the former
+one-write-per-record loop, then by CsvWriter, to memory and to a file
+with the default buffer and a large one. All outputs must be the same.
+
+Usage: python tool/csv_benchmark.py [--feet] [--fahrenheit]'''
+
+from __future__ import print_function
+
+import os
+import sys
+import tempfile
+import time
+
+try:
+    from itertools import izip as zip
+except ImportError:
+    pass
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from flydream import serialprotocol as sp
+from flydream.dataparser import DataParser
+from flydream.uploadeddata import UploadedData
+from flydream.csvwriter import CsvWriter
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), os.pardir,
+        'tests', 'test_freq_2_then_1_then_8_then_4.fda')
+
+
+def full_device_flight(length_unit, temp_unit):
+    sample = UploadedData.from_file(SAMPLE_FILE)
+    parser = DataParser(length_unit, temp_unit)
+    entry = parser.index_flights(sample.data)[2]  # 8Hz flight.
+    records = sample.data[entry.offset:entry.offset + entry.length]
+
+    capacity = sp.FULL_ALTIMETER - sp.EMPTY_ALTIMETER
+    chunk = b'\x03' + sp.FREQ_8_HERTZ + records * (capacity // len(records))
+    flight = parser.extract_flights(sp.RAW_FLIGHTS_SEPARATOR + chunk)[0]
+    flight.altitudes  # Decode now, only formatting is measured.
+    return flight
+
+
+def per_record_loop(out, flight):
+    for rec in zip(flight.times, flight.temperatures, flight.altitudes):
+        out.write('%.3f,%d,%.1f\n' % rec)
+
+
+def csv_writer(out, flight):
+    CsvWriter(out).write_records(flight)
+
+
+def measure(name, write, flight, reference):
+    out = StringIO()
+    start = time.time()
+    write(out, flight)
+    elapsed = time.time() - start
+
+    result = out.getvalue()
+    if reference is not None and result != reference:
+        raise AssertionError('%s output differs' % name)
+
+    print('%-26s %8.3f s %12.0f rows/s' % (name, elapsed,
+            flight.record_count / elapsed))
+    return result, elapsed
+
+
+def measure_file(name, flight, reference, buffering):
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        start = time.time()
+        with open(path, 'w', buffering) as f:
+            csv_writer(f, flight)
+        elapsed = time.time() - start
+
+        with open(path, 'r') as f:
+            if f.read() != reference:
+                raise AssertionError('%s output differs' % name)
+    finally:
+        os.remove(path)
+
+    print('%-26s %8.3f s %12.0f rows/s' % (name, elapsed,
+            flight.record_count / elapsed))
+
+
+def main(argv):
+    length_unit = DataParser.LENGTH_UNIT_METER
+    if '--feet' in argv:
+        length_unit = DataParser.LENGTH_UNIT_FEET
+    temp_unit = DataParser.TEMPERATURE_UNIT_CELSIUS
+    if '--fahrenheit' in argv:
+        temp_unit = DataParser.TEMPERATURE_UNIT_FAHRENHEIT
+
+    flight = full_device_flight(length_unit, temp_unit)
+    print('%d records' % flight.record_count)
+
+    reference, base = measure('per-record write', per_record_loop, flight,
+            None)
+    _, elapsed = measure('CsvWriter', csv_writer, flight, reference)
+    print('%-26s %8.1fx' % ('speedup', base / elapsed))
+
+    # Blocks are written at once: file buffer size does not matter.
+    measure_file('CsvWriter, file', flight, reference, -1)
+    measure_file('CsvWriter, 1 MiB buffer', flight, reference, 1 << 20)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
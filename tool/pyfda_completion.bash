@@ -5,26 +5,34 @@ _pyfda()
 
   # First argument: Command or help flag.
   if (($COMP_CWORD == 1)); then
-    COMPREPLY=( $(compgen -W "--help upload setup clear convert info" -- $cur) );
+    COMPREPLY=( $(compgen -W "--help upload setup clear convert info import export list cache" -- $cur) );
     return 0
   fi
 
   # Next argument depends on chosen command.
   local cmd=${COMP_WORDS[1]}
   local units_opts="--meters --feet --celsius --fahrenheit"
-  local format_opts="--csv --json --prefix --last"
+  local format_opts="--csv --json --ndjson --binary --binary-upload --sqlite --compact --prefix --last"
   case "$cmd" in
 
     info)
-      # No flags/options, just default file completion.
-      return 1
+      case "$cur" in
+        -*)
+          COMPREPLY=( $(compgen -W "--jobs" -- $cur) );
+          return 0
+          ;;
+        *)
+          # Default file completion is possible.
+          return 1
+          ;;
+      esac
       ;;
 
     convert)
       case "$cur" in
         -*)
           # Leading dash: Many possible flags/options.
-          COMPREPLY=( $(compgen -W "$units_opts $format_opts" -- $cur) );
+          COMPREPLY=( $(compgen -W "$units_opts $format_opts --jobs --no-cache" -- $cur) );
           return 0
           ;;
         *)
@@ -34,9 +42,27 @@ _pyfda()
       esac
       ;;
 
+    import|export|list)
+      case "$cur" in
+        -*)
+          COMPREPLY=( $(compgen -W "--store --prefix" -- $cur) );
+          return 0
+          ;;
+        *)
+          # Default file completion is possible.
+          return 1
+          ;;
+      esac
+      ;;
+
+    cache)
+      COMPREPLY=( $(compgen -W "stats clear" -- $cur) );
+      return 0
+      ;;
+
     upload)
       # Only flags/options.
-      COMPREPLY=( $(compgen -W "--port $units_opts $format_opts" -- $cur) );
+      COMPREPLY=( $(compgen -W "--port $units_opts $format_opts --incremental --archive --jobs" -- $cur) );
       return 0
       ;;
 